@@ -1,9 +1,13 @@
 from django import forms
 from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
-from django.contrib.auth.forms import UserCreationForm
+from django.contrib.auth.forms import PasswordResetForm, UserCreationForm
 from django.core.exceptions import ValidationError
 
+from orders.services import outbox
+
+from .jobs import PASSWORD_RESET_JOB
+
 
 # ==================================================
 # SIGNUP FORM (PRODUCTION SAFE)
@@ -104,3 +108,38 @@ class LoginForm(forms.Form):
 
     def get_user(self):
         return getattr(self, "user", None)
+
+
+# ==================================================
+# PASSWORD RESET (EMAIL SENT BY OUTBOX WORKER)
+# ==================================================
+class OutboxPasswordResetForm(PasswordResetForm):
+    """
+    Hands the reset email to `run_worker` so the page never waits on
+    the mail server. The job stores only who and where: the token and
+    the email are generated by the worker, so no reset link is ever
+    kept in OutboxJob.payload.
+    """
+
+    def send_mail(
+        self,
+        subject_template_name,
+        email_template_name,
+        context,
+        from_email,
+        to_email,
+        html_email_template_name=None,
+    ):
+        outbox.enqueue(
+            PASSWORD_RESET_JOB,
+            {
+                "user_id": context["user"].pk,
+                "domain": context["domain"],
+                "site_name": context["site_name"],
+                "use_https": context["protocol"] == "https",
+                "subject_template": subject_template_name,
+                "email_template": email_template_name,
+                "html_template": html_email_template_name or "",
+                "from_email": from_email,
+            },
+        )
@@ -0,0 +1,63 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.core.mail import EmailMultiAlternatives
+from django.template import loader
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+
+from orders.services import outbox
+
+EMAIL_JOB = "emails.send"
+PASSWORD_RESET_JOB = "emails.password_reset"
+
+
+# =====================================================
+# OUTBOX HANDLERS (run by manage.py run_worker)
+# =====================================================
+@outbox.handler(EMAIL_JOB)
+def send_email(payload):
+    message = EmailMultiAlternatives(
+        subject=payload["subject"],
+        body=payload["body"],
+        from_email=payload.get("from_email"),
+        to=payload["to"],
+    )
+    if payload.get("html"):
+        message.attach_alternative(payload["html"], "text/html")
+    message.send()
+
+
+@outbox.handler(PASSWORD_RESET_JOB)
+def send_password_reset(payload):
+    """
+    Token and link are made here, at send time: the job row never
+    holds anything that could reset the password.
+    """
+    User = get_user_model()
+    user = User._default_manager.filter(pk=payload["user_id"], is_active=True).first()
+    if user is None or not user.has_usable_password():
+        return
+
+    context = {
+        "email": getattr(user, User.get_email_field_name()),
+        "domain": payload["domain"],
+        "site_name": payload["site_name"],
+        "uid": urlsafe_base64_encode(force_bytes(user.pk)),
+        "user": user,
+        "token": default_token_generator.make_token(user),
+        "protocol": "https" if payload["use_https"] else "http",
+    }
+
+    subject = loader.render_to_string(payload["subject_template"], context)
+    message = EmailMultiAlternatives(
+        subject="".join(subject.splitlines()),
+        body=loader.render_to_string(payload["email_template"], context),
+        from_email=payload.get("from_email"),
+        to=[context["email"]],
+    )
+    if payload["html_template"]:
+        message.attach_alternative(
+            loader.render_to_string(payload["html_template"], context),
+            "text/html",
+        )
+    message.send()
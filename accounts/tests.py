@@ -1,3 +1,38 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core import mail
 from django.test import TestCase
+from django.urls import reverse
+
+from orders.models import OutboxJob
+from orders.services import outbox
+
+from .jobs import PASSWORD_RESET_JOB
+
+
+# =====================================================
+# PASSWORD RESET VIA OUTBOX
+# =====================================================
+class PasswordResetOutboxTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            username="reset", email="reset@example.com", password="old-password-123",
+        )
+
+    def test_job_holds_no_reset_link(self):
+        self.client.post(reverse("accounts:forgot_password"), {"email": "reset@example.com"})
+
+        job = OutboxJob.objects.get(name=PASSWORD_RESET_JOB)
+        self.assertEqual(job.payload["user_id"], self.user.pk)
+        self.assertNotIn("reset/", str(job.payload))
+        self.assertEqual(mail.outbox, [])
+
+        outbox.load_handlers()
+        self.assertTrue(outbox.run_job(outbox.claim()[0]))
 
-# Create your tests here.
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["reset@example.com"])
+        link = re.search(r"https?://[^/\s]+(/accounts/reset/[^\s\"<]+)", mail.outbox[0].body).group(1)
+        response = self.client.get(link, follow=True)
+        self.assertContains(response, "new_password1")
@@ -11,7 +11,7 @@ from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
 
-from .forms import SignupForm, LoginForm
+from .forms import SignupForm, LoginForm, OutboxPasswordResetForm
 from orders.models import Order
 
 
@@ -123,6 +123,7 @@ def dashboard(request):
 
 
 class HTMLPasswordResetView(PasswordResetView):
+    form_class = OutboxPasswordResetForm
     template_name = "accounts/forgot_password.html"
     email_template_name = "accounts/password_reset_email.html"
     html_email_template_name = "accounts/password_reset_email.html"
@@ -1,3 +1,4 @@
 pip install -r requirements.txt
 python manage.py collectstatic --noinput
-python manage.py migrate
\ No newline at end of file
+python manage.py migrate
+python manage.py rebuild_product_cards
\ No newline at end of file
@@ -1,3 +1,26 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import Cart, CartLine, StockReservation
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ("product", "quantity", "cart_key", "expires_at")
+    list_filter = ("expires_at",)
+    search_fields = ("product__name", "cart_key")
+    raw_id_fields = ("product",)
+    readonly_fields = ("created_at", "updated_at")
+
+
+class CartLineInline(admin.TabularInline):
+    model = CartLine
+    raw_id_fields = ("product",)
+    extra = 0
+
+
+@admin.register(Cart)
+class CartAdmin(admin.ModelAdmin):
+    list_display = ("key", "created_at", "updated_at")
+    search_fields = ("key",)
+    readonly_fields = ("created_at", "updated_at")
+    inlines = [CartLineInline]
@@ -0,0 +1,273 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils import timezone
+
+from pages.models import Product
+
+from . import reservations
+from .models import Cart, CartLine
+
+
+# =====================================================
+# CART BACKENDS
+# =====================================================
+# Where cart lines live. Every backend exposes the same dict shape
+# the session cart always had:
+#
+#   {"<product_id>": {"qty": int, "price": "decimal as string"}}
+#
+# "price" is a display snapshot and may be missing (cookie backend).
+#
+#   session  lines in the session (rewrites the session row per change)
+#   cookie   signed compact cookie (no server write at all)
+#   db       Cart / CartLine tables, one upsert per changed line
+#
+# Selected with settings.CART_BACKEND; switching backends starts
+# everyone with an empty cart.
+class BaseCart:
+    def __init__(self, request):
+        self.request = request
+        self._lines = None
+
+    # -------------------------
+    # READ
+    # -------------------------
+    @property
+    def lines(self) -> dict:
+        if self._lines is None:
+            self._lines = self._load()
+        return self._lines
+
+    def keys(self):
+        return self.lines.keys()
+
+    def items(self):
+        return self.lines.items()
+
+    def get(self, product_id, default=None):
+        return self.lines.get(str(product_id), default)
+
+    def __contains__(self, product_id):
+        return str(product_id) in self.lines
+
+    def __len__(self):
+        return len(self.lines)
+
+    def __bool__(self):
+        return bool(self.lines)
+
+    # -------------------------
+    # WRITE
+    # -------------------------
+    def set(self, product_id, qty, price=None) -> None:
+        line = {"qty": int(qty)}
+        if price is not None:
+            line["price"] = str(price)
+        self.lines[str(product_id)] = line
+        self._set(str(product_id), line)
+
+    def remove(self, *product_ids) -> None:
+        product_ids = [str(product_id) for product_id in product_ids]
+        for product_id in product_ids:
+            self.lines.pop(product_id, None)
+        self._remove(product_ids)
+
+    def clear(self) -> None:
+        self._lines = {}
+        self._clear()
+
+    def process_response(self, response):
+        return response
+
+    # -------------------------
+    # STORAGE (per backend)
+    # -------------------------
+    def _load(self) -> dict:
+        raise NotImplementedError
+
+    def _set(self, product_id, line) -> None:
+        raise NotImplementedError
+
+    def _remove(self, product_ids) -> None:
+        raise NotImplementedError
+
+    def _clear(self) -> None:
+        raise NotImplementedError
+
+
+# =====================================================
+# SESSION
+# =====================================================
+class SessionCart(BaseCart):
+    def _load(self):
+        return dict(self.request.session.get("cart", {}))
+
+    def _save(self):
+        self.request.session["cart"] = self.lines
+        self.request.session.modified = True
+
+    def _set(self, product_id, line):
+        self._save()
+
+    def _remove(self, product_ids):
+        self._save()
+
+    def _clear(self):
+        self._save()
+
+
+# =====================================================
+# SIGNED COOKIE
+# =====================================================
+# Value: "<product_id>.<qty>|<product_id>.<qty>|..." (+ signature).
+# Prices are not stored; the cart page shows the current price.
+COOKIE_SALT = "cart.cookie"
+
+
+class CookieCart(BaseCart):
+    def __init__(self, request):
+        super().__init__(request)
+        self._dirty = False
+
+    def _signer(self):
+        return signing.get_cookie_signer(salt=COOKIE_SALT)
+
+    def _load(self):
+        value = self.request.COOKIES.get(settings.CART_COOKIE_NAME)
+        if not value:
+            return {}
+
+        try:
+            value = self._signer().unsign(value)
+            lines = {}
+            for pair in value.split("|"):
+                product_id, qty = pair.split(".")
+                lines[str(int(product_id))] = {"qty": int(qty)}
+        except (signing.BadSignature, ValueError):
+            return {}
+
+        return lines
+
+    def _set(self, product_id, line):
+        self._dirty = True
+
+    def _remove(self, product_ids):
+        self._dirty = True
+
+    def _clear(self):
+        self._dirty = True
+
+    def process_response(self, response):
+        if not self._dirty:
+            return response
+
+        if not self.lines:
+            response.delete_cookie(
+                settings.CART_COOKIE_NAME,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+            return response
+
+        value = "|".join(
+            f"{product_id}.{line['qty']}"
+            for product_id, line in sorted(self.lines.items())
+        )
+        response.set_cookie(
+            settings.CART_COOKIE_NAME,
+            self._signer().sign(value),
+            max_age=settings.CART_COOKIE_AGE,
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite=settings.SESSION_COOKIE_SAMESITE,
+        )
+        return response
+
+
+# =====================================================
+# DATABASE
+# =====================================================
+# Keyed by the reservation key, which lives in the session data and
+# is created once per cart; after that no change touches the session.
+class DatabaseCart(BaseCart):
+    def _key(self, create=False):
+        return reservations.cart_key(self.request.session, create=create)
+
+    def _load(self):
+        key = self._key()
+        if not key:
+            return {}
+
+        return {
+            str(product_id): {"qty": qty, "price": str(price)}
+            for product_id, qty, price in (
+                CartLine.objects
+                .filter(cart_id=key)
+                .values_list("product_id", "quantity", "price")
+            )
+        }
+
+    def _touch(self, key):
+        # Create or bump the cart row in one statement
+        Cart.objects.bulk_create(
+            [Cart(key=key, updated_at=timezone.now())],
+            update_conflicts=True,
+            unique_fields=["key"],
+            update_fields=["updated_at"],
+        )
+
+    @transaction.atomic
+    def _set(self, product_id, line):
+        key = self._key(create=True)
+        self._touch(key)
+
+        if "price" not in line:
+            # Keep the snapshot column filled
+            line["price"] = str(
+                Product.objects.values_list("price", flat=True).get(pk=product_id)
+            )
+
+        CartLine.objects.bulk_create(
+            [CartLine(
+                cart_id=key,
+                product_id=int(product_id),
+                quantity=line["qty"],
+                price=line["price"],
+            )],
+            update_conflicts=True,
+            unique_fields=["cart", "product"],
+            update_fields=["quantity", "price"],
+        )
+
+    def _remove(self, product_ids):
+        key = self._key()
+        if key:
+            CartLine.objects.filter(cart_id=key, product_id__in=product_ids).delete()
+
+    def _clear(self):
+        key = self._key()
+        if key:
+            CartLine.objects.filter(cart_id=key).delete()
+
+
+BACKENDS = {
+    "session": SessionCart,
+    "cookie": CookieCart,
+    "db": DatabaseCart,
+}
+
+
+def get_cart(request) -> BaseCart:
+    return BACKENDS[settings.CART_BACKEND](request)
+
+
+def prune_carts(days=None) -> int:
+    """
+    Delete db-backend carts untouched for CART_RETENTION_DAYS.
+    """
+    days = settings.CART_RETENTION_DAYS if days is None else days
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = Cart.objects.filter(updated_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,139 @@
+import re
+import time
+import uuid
+from collections import Counter
+from decimal import Decimal
+from importlib import import_module
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from cart import views
+from cart.backends import BACKENDS
+from cart.middleware import CartMiddleware
+from cart.models import Cart
+from pages.models import Collection, Product
+
+
+WRITE = re.compile(r'^\s*(?:INSERT INTO|UPDATE|DELETE FROM)\s+"?(\w+)"?', re.IGNORECASE)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the same add / update / remove sequence through every cart "
+        "backend (real session and cart middleware) and report writes "
+        "per mutation: session row, cart tables and the rest (stock "
+        "holds). Fixture data is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--lines", type=int, default=5)
+        parser.add_argument("--rounds", type=int, default=3)
+
+    def handle(self, *args, **options):
+        collection, products = self._fixtures(options)
+        try:
+            for name in BACKENDS:
+                with override_settings(CART_BACKEND=name):
+                    self._report(name, self._run(products, options))
+        finally:
+            Product.objects.filter(collection=collection).delete()
+            collection.delete()
+
+    # -------------------------
+    # FIXTURES
+    # -------------------------
+    def _fixtures(self, options):
+        tag = uuid.uuid4().hex[:8]
+        collection = Collection.objects.create(
+            name=f"Cart bench {tag}",
+            slug=f"cart-bench-{tag}",
+        )
+        products = [
+            Product.objects.create(
+                collection=collection,
+                name=f"Cart bench product {tag} {i}",
+                slug=f"cart-bench-{tag}-{i}",
+                price=Decimal("499.00"),
+                stock=10_000,
+            )
+            for i in range(options["lines"])
+        ]
+        return collection, products
+
+    # -------------------------
+    # RUN
+    # -------------------------
+    def _run(self, products, options):
+        factory = RequestFactory()
+        cookies = {}
+        stats = Counter()
+
+        def call(view, method, path, data=None, **kwargs):
+            handler = SessionMiddleware(AuthenticationMiddleware(
+                CartMiddleware(lambda request: view(request, **kwargs))
+            ))
+            request = getattr(factory, method)(path, data or {})
+            request.COOKIES.update(cookies)
+
+            started = time.perf_counter()
+            with CaptureQueriesContext(connection) as ctx:
+                response = handler(request)
+            stats["seconds"] += time.perf_counter() - started
+
+            for morsel in response.cookies.values():
+                if morsel["max-age"] == 0:
+                    cookies.pop(morsel.key, None)
+                else:
+                    cookies[morsel.key] = morsel.value
+                    stats["cookie_bytes"] = max(stats["cookie_bytes"], len(morsel.value))
+
+            for query in ctx.captured_queries:
+                match = WRITE.match(query["sql"])
+                if not match:
+                    continue
+                table = match.group(1)
+                if table == "django_session":
+                    stats["session"] += 1
+                elif table.startswith("cart_cart"):
+                    stats["cart"] += 1
+                else:
+                    stats["other"] += 1
+            return response
+
+        for _ in range(options["rounds"]):
+            for product in products:
+                call(views.cart_add, "post", "/", {"qty": 1}, product_id=product.id)
+                stats["mutations"] += 1
+            for action in ("inc", "dec"):
+                for product in products:
+                    call(views.cart_update, "post", "/", {"action": action}, product_id=product.id)
+                    stats["mutations"] += 1
+            call(views.cart_detail, "get", "/")
+            for product in products:
+                call(views.cart_remove, "post", "/", product_id=product.id)
+                stats["mutations"] += 1
+
+        session_key = cookies.get(settings.SESSION_COOKIE_NAME)
+        if session_key:
+            session = import_module(settings.SESSION_ENGINE).SessionStore(session_key)
+            Cart.objects.filter(key=session.get("reservation_key")).delete()
+            session.delete()
+
+        return stats
+
+    def _report(self, name, stats):
+        mutations = stats["mutations"] or 1
+        self.stdout.write(
+            f"{name:8} {stats['mutations']} mutations: "
+            f"session writes {stats['session'] / mutations:.2f}, "
+            f"cart table writes {stats['cart'] / mutations:.2f}, "
+            f"other writes {stats['other'] / mutations:.2f} per mutation; "
+            f"max cookie {stats['cookie_bytes']} B; "
+            f"{stats['seconds'] * 1000 / mutations:.1f} ms/mutation"
+        )
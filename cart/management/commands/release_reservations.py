@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from cart.reservations import release_expired
+
+
+class Command(BaseCommand):
+    help = (
+        "Release expired add-to-cart stock holds in bulk. run_worker "
+        "does this periodically; use this from cron or to catch up."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        released = release_expired(chunk_size=options["chunk_size"])
+        self.stdout.write(f"Released {released} expired reservations.")
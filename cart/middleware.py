@@ -0,0 +1,17 @@
+from .backends import get_cart
+
+
+class CartMiddleware:
+    """
+    Attach the visitor's cart (settings.CART_BACKEND) as request.cart.
+    Lines are loaded on first use; the cookie backend writes its
+    cookie on the way out.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.cart = get_cart(request)
+        response = self.get_response(request)
+        return request.cart.process_response(response)
@@ -1,3 +1,91 @@
 from django.db import models
 
-# Create your models here.
+from pages.models import Product
+
+
+class StockReservation(models.Model):
+    """
+    Soft hold on stock for one cart line.
+
+    Product.reserved_stock is the running total of all unreleased
+    holds, so availability is `stock - reserved_stock` without a SUM.
+    Expired holds keep counting until the sweeper releases them.
+    """
+
+    # Random id kept in the session data (survives login key rotation)
+    cart_key = models.CharField(max_length=32)
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="reservations",
+    )
+
+    quantity = models.PositiveIntegerField()
+    expires_at = models.DateTimeField()
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cart_key", "product"],
+                name="unique_reservation_per_cart_line",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="reservation_expiry_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} × {self.product_id} ({self.cart_key[:8]})"
+
+
+class Cart(models.Model):
+    """
+    Cart of the "db" cart backend, keyed by the session's reservation
+    key so the session row is written once (when the key is made),
+    not on every cart change.
+    """
+
+    key = models.CharField(max_length=32, unique=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return self.key
+
+
+class CartLine(models.Model):
+    """
+    One product line of a Cart. Written with per-line upserts.
+    """
+
+    cart = models.ForeignKey(
+        Cart,
+        to_field="key",
+        on_delete=models.CASCADE,
+        related_name="lines",
+    )
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+
+    quantity = models.PositiveIntegerField()
+    # Snapshot for display only (pricing happens at checkout)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cart", "product"],
+                name="unique_cart_line",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} × {self.product_id}"
@@ -0,0 +1,162 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from orders.services.inventory_service import hold_stock, release_holds
+from pages.models import Product
+
+from .models import StockReservation
+
+
+# =====================================================
+# SOFT RESERVATIONS (ADD-TO-CART HOLDS)
+# =====================================================
+# A cart line holds its quantity for CART_RESERVATION_TTL_MINUTES.
+# Lock order everywhere: reservation rows first, then products
+# (cart, checkout and sweeper), so they never deadlock.
+def cart_key(session, create=True):
+    """
+    Reservation owner id for a session's cart.
+    """
+    if create and "reservation_key" not in session:
+        session["reservation_key"] = uuid.uuid4().hex
+    return session.get("reservation_key")
+
+
+def _expiry():
+    return timezone.now() + timedelta(minutes=settings.CART_RESERVATION_TTL_MINUTES)
+
+
+@transaction.atomic
+def reserve(key, product_id, quantity) -> int:
+    """
+    Set this cart's hold on a product to `quantity`, or as much of it
+    as is unheld. Returns the quantity now held (0 = none left).
+    """
+    reservation = (
+        StockReservation.objects
+        .select_for_update()
+        .filter(cart_key=key, product_id=product_id)
+        .first()
+    )
+    held = reservation.quantity if reservation else 0
+    wanted = max(quantity, 0)
+
+    if wanted > held and not hold_stock(product_id, wanted - held):
+        product = (
+            Product.objects
+            .only("stock", "reserved_stock", "stock_shards")
+            .get(pk=product_id)
+        )
+        if product.stock_shards:
+            # Hot product: no holds, checkout's shard UPDATE decides
+            if reservation:
+                release_holds({product_id: held})
+                reservation.delete()
+            return min(wanted, product.stock)
+
+        # Not enough for all of it → take what is left
+        wanted = min(wanted, held + product.available_stock)
+        if wanted > held and not hold_stock(product_id, wanted - held):
+            wanted = held
+
+    if wanted < held:
+        release_holds({product_id: held - wanted})
+
+    if wanted == 0:
+        if reservation:
+            reservation.delete()
+        return 0
+
+    if reservation:
+        reservation.quantity = wanted
+        reservation.expires_at = _expiry()
+        reservation.save(update_fields=["quantity", "expires_at", "updated_at"])
+    else:
+        StockReservation.objects.create(
+            cart_key=key,
+            product_id=product_id,
+            quantity=wanted,
+            expires_at=_expiry(),
+        )
+
+    return wanted
+
+
+@transaction.atomic
+def release(key, product_ids=None) -> None:
+    """
+    Drop a cart's holds (all, or for some products).
+    """
+    reservations = StockReservation.objects.select_for_update().filter(cart_key=key)
+    if product_ids is not None:
+        reservations = reservations.filter(product_id__in=list(product_ids))
+
+    rows = list(reservations.values_list("pk", "product_id", "quantity"))
+    if not rows:
+        return
+
+    release_holds({product_id: quantity for _pk, product_id, quantity in rows})
+    StockReservation.objects.filter(pk__in=[pk for pk, _, _ in rows]).delete()
+
+
+def held_quantities(key) -> dict:
+    """
+    {product_id: qty} held by a cart (expired-but-unswept included:
+    they still count against everyone else).
+    """
+    if not key:
+        return {}
+    return dict(
+        StockReservation.objects
+        .filter(cart_key=key)
+        .values_list("product_id", "quantity")
+    )
+
+
+# =====================================================
+# SWEEPER
+# =====================================================
+def release_expired(*, chunk_size=500, max_chunks=None) -> int:
+    """
+    Release expired holds in chunks: one counter UPDATE and one
+    DELETE per chunk. Safe to run concurrently (SKIP LOCKED).
+    Returns holds released.
+    """
+    released = chunks = 0
+    now = timezone.now()
+
+    while max_chunks is None or chunks < max_chunks:
+        with transaction.atomic():
+            expired = (
+                StockReservation.objects
+                .filter(expires_at__lt=now)
+                .order_by("expires_at")
+            )
+            if connection.features.has_select_for_update_skip_locked:
+                expired = expired.select_for_update(skip_locked=True)
+            else:
+                expired = expired.select_for_update()
+
+            ids = list(expired.values_list("pk", flat=True)[:chunk_size])
+            if not ids:
+                break
+
+            release_holds(dict(
+                StockReservation.objects
+                .filter(pk__in=ids)
+                .order_by("product_id")
+                .values("product_id")
+                .annotate(total=Sum("quantity"))
+                .values_list("product_id", "total")
+            ))
+            StockReservation.objects.filter(pk__in=ids).delete()
+
+        released += len(ids)
+        chunks += 1
+
+    return released
@@ -1,3 +1,82 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.utils import timezone
+
+from orders.management.commands.bench_checkout import ADDRESS
+from orders.services.order_service import create_order_from_cart
+from pages.models import Collection, Product
+
+from . import reservations
+from .models import StockReservation
+
+
+# =====================================================
+# ADD-TO-CART HOLDS
+# =====================================================
+class ReservationTests(TestCase):
+    def setUp(self):
+        collection = Collection.objects.create(name="Holds", slug="holds")
+        self.product = Product.objects.create(
+            collection=collection,
+            name="Held product",
+            slug="held",
+            price=Decimal("499.00"),
+            stock=5,
+        )
+
+    def _counters(self):
+        self.product.refresh_from_db()
+        return self.product.stock, self.product.reserved_stock
+
+    def test_second_cart_gets_only_the_unheld_rest(self):
+        self.assertEqual(reservations.reserve("a", self.product.pk, 4), 4)
+        self.assertEqual(reservations.reserve("b", self.product.pk, 3), 1)
+        self.assertEqual(reservations.reserve("c", self.product.pk, 1), 0)
+        self.assertEqual(self._counters(), (5, 5))
+
+    def test_shrinking_and_release_give_holds_back(self):
+        reservations.reserve("a", self.product.pk, 4)
+        reservations.reserve("a", self.product.pk, 1)
+        self.assertEqual(self._counters(), (5, 1))
+
+        reservations.release("a")
+        self.assertEqual(self._counters(), (5, 0))
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_sweeper_releases_expired_holds(self):
+        reservations.reserve("a", self.product.pk, 2)
+        reservations.reserve("b", self.product.pk, 1)
+        StockReservation.objects.filter(cart_key="a").update(
+            expires_at=timezone.now() - timedelta(minutes=1),
+        )
+
+        self.assertEqual(reservations.release_expired(), 1)
+        self.assertEqual(self._counters(), (5, 1))
+
+    def test_checkout_turns_holds_into_sales(self):
+        user = get_user_model().objects.create_user(username="holder")
+        reservations.reserve("a", self.product.pk, 3)
+        reservations.reserve("b", self.product.pk, 2)
+
+        create_order_from_cart(
+            user=user,
+            cart={str(self.product.pk): {"qty": 3}},
+            address_data=ADDRESS,
+            payment_method="COD",
+            reservation_key="a",
+        )
+        self.assertEqual(self._counters(), (2, 2))
+        self.assertFalse(StockReservation.objects.filter(cart_key="a").exists())
 
-# Create your tests here.
+        # The remaining units are held by cart "b"
+        with self.assertRaises(ValueError):
+            create_order_from_cart(
+                user=user,
+                cart={str(self.product.pk): {"qty": 1}},
+                address_data=ADDRESS,
+                payment_method="COD",
+            )
+        self.assertEqual(self._counters(), (2, 2))
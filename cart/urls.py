@@ -31,4 +31,28 @@ urlpatterns = [
         views.cart_remove,
         name="cart_remove"
     ),
+
+    # =====================================================
+    # JSON API (POST ONLY, RETURNS DELTAS)
+    # =====================================================
+    path(
+        "api/add/<int:product_id>/",
+        views.api_add,
+        name="api_add"
+    ),
+    path(
+        "api/update/<int:product_id>/",
+        views.api_update,
+        name="api_update"
+    ),
+    path(
+        "api/remove/<int:product_id>/",
+        views.api_remove,
+        name="api_remove"
+    ),
+    path(
+        "api/batch/",
+        views.api_batch,
+        name="api_batch"
+    ),
 ]
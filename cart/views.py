@@ -1,17 +1,22 @@
+import json
 from decimal import Decimal
 
+from django.http import JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views.decorators.http import require_POST
 
+from orders.services.recommendation_service import bought_together_for_products
 from pages.models import Product
 
+from . import reservations
+
 
 # =====================================================
-# CART UTILS (CENTRALIZED, SAFE)
+# CART DETAIL
 # =====================================================
-def _get_cart(session):
+def cart_detail(request):
     """
-    Cart structure (SESSION ONLY, NOT SOURCE OF TRUTH):
+    Cart lines come from request.cart (settings.CART_BACKEND):
 
     {
         "product_id": {
@@ -20,19 +25,7 @@ def _get_cart(session):
         }
     }
     """
-    return session.setdefault("cart", {})
-
-
-def _save_cart(session, cart):
-    session["cart"] = cart
-    session.modified = True
-
-
-# =====================================================
-# CART DETAIL
-# =====================================================
-def cart_detail(request):
-    cart = _get_cart(request.session)
+    cart = request.cart
 
     product_ids = list(cart.keys())
     products = Product.objects.filter(
@@ -42,7 +35,9 @@ def cart_detail(request):
 
     cart_items = []
     total = Decimal("0.00")
-    updated = False
+    held = reservations.held_quantities(
+        reservations.cart_key(request.session, create=False)
+    )
 
     for product in products:
         pid = str(product.id)
@@ -54,34 +49,30 @@ def cart_detail(request):
         try:
             qty = int(item.get("qty", 0))
         except (TypeError, ValueError):
-            cart.pop(pid, None)
-            updated = True
+            cart.remove(pid)
             continue
 
         # Defensive cleanup
         if qty <= 0:
-            cart.pop(pid, None)
-            updated = True
+            cart.remove(pid)
             continue
 
-        # Clamp to available stock (best-effort)
-        if product.stock <= 0:
-            cart.pop(pid, None)
-            updated = True
+        # Clamp to what this cart can still get (best-effort):
+        # its own holds plus stock nobody holds
+        available = product.available_stock + held.get(product.id, 0)
+        if available <= 0:
+            cart.remove(pid)
             continue
 
-        if qty > product.stock:
-            qty = product.stock
-            item["qty"] = qty
-            updated = True
-
-        # Price is DISPLAY ONLY
+        # Price is DISPLAY ONLY (cookie carts keep no snapshot)
         try:
             price = Decimal(item.get("price"))
         except Exception:
             price = product.price
-            item["price"] = str(product.price)
-            updated = True
+
+        if qty > available:
+            qty = available
+            cart.set(pid, qty, price)
 
         subtotal = price * qty
         total += subtotal
@@ -93,19 +84,96 @@ def cart_detail(request):
             "subtotal": subtotal,
         })
 
-    if updated:
-        _save_cart(request.session, cart)
-
     return render(
         request,
         "cart/cart.html",
         {
             "cart_items": cart_items,
             "total": total,
+            "bought_together": bought_together_for_products(
+                [item["product"].id for item in cart_items]
+            ) if cart_items else [],
         }
     )
 
 
+# =====================================================
+# MUTATIONS (SHARED BY THE HTML AND JSON VIEWS)
+# =====================================================
+# Defensive cap per add (prevents abuse)
+MAX_ADD = 10
+
+# Line changes accepted by one batch request
+BATCH_MAX_LINES = 50
+
+
+def _line_qty(cart, pid) -> int:
+    try:
+        return int(cart.get(pid, {}).get("qty", 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _remove(request, product_id) -> None:
+    if product_id in request.cart:
+        request.cart.remove(product_id)
+
+    key = reservations.cart_key(request.session, create=False)
+    if key:
+        reservations.release(key, [product_id])
+
+
+def _set(request, product, qty, price=None) -> int:
+    """
+    Set a cart line to `qty` (0 removes it), holding stock for it.
+    Returns the quantity the cart now has.
+    """
+    cart = request.cart
+    pid = str(product.id)
+
+    if qty <= 0:
+        _remove(request, product.id)
+        return 0
+
+    # Hold the units for this cart; others see them as taken
+    final_qty = reservations.reserve(
+        reservations.cart_key(request.session), product.id, qty
+    )
+    if not final_qty:
+        if pid in cart:
+            cart.remove(pid)
+        return 0
+
+    # Snapshot price (DISPLAY ONLY)
+    if final_qty != _line_qty(cart, pid) or price is None:
+        cart.set(pid, final_qty, price or product.price)
+    return final_qty
+
+
+def _add(request, product, qty) -> int:
+    if not product.can_fulfill(1):
+        return 0
+
+    qty = min(qty, MAX_ADD)
+    return _set(request, product, _line_qty(request.cart, str(product.id)) + qty)
+
+
+def _update(request, product, action) -> int:
+    pid = str(product.id)
+    item = request.cart.get(pid)
+    qty = _line_qty(request.cart, pid)
+
+    if qty <= 0:
+        _remove(request, product.id)
+        return 0
+
+    if action == "inc" and product.can_fulfill(qty + 1):
+        return _set(request, product, qty + 1, item.get("price"))
+    if action == "dec":
+        return _set(request, product, qty - 1, item.get("price"))
+    return qty
+
+
 # =====================================================
 # ADD TO CART
 # =====================================================
@@ -117,9 +185,6 @@ def cart_add(request, product_id):
         is_active=True
     )
 
-    cart = _get_cart(request.session)
-    pid = str(product.id)
-
     try:
         qty = int(request.POST.get("qty", 1))
     except (TypeError, ValueError):
@@ -128,29 +193,13 @@ def cart_add(request, product_id):
     if qty <= 0:
         return redirect("cart:cart_detail")
 
-    # Defensive cap (prevents abuse)
-    qty = min(qty, 10)
-
-    if not product.can_fulfill(1):
+    if not _add(request, product, qty):
         return redirect(
             "pages:product_detail",
             collection_slug=product.collection.slug,
             product_slug=product.slug,
         )
 
-    current = cart.get(pid, {})
-    current_qty = int(current.get("qty", 0))
-
-    final_qty = min(current_qty + qty, product.stock)
-
-    cart[pid] = {
-        "qty": final_qty,
-        # Snapshot price (DISPLAY ONLY)
-        "price": str(product.price),
-    }
-
-    _save_cart(request.session, cart)
-
     # BUY NOW shortcut
     if request.POST.get("action") == "buy":
         return redirect("orders:checkout")
@@ -163,10 +212,7 @@ def cart_add(request, product_id):
 # =====================================================
 @require_POST
 def cart_remove(request, product_id):
-    cart = _get_cart(request.session)
-    cart.pop(str(product_id), None)
-    _save_cart(request.session, cart)
-
+    _remove(request, product_id)
     return redirect("cart:cart_detail")
 
 
@@ -175,11 +221,7 @@ def cart_remove(request, product_id):
 # =====================================================
 @require_POST
 def cart_update(request, product_id):
-    cart = _get_cart(request.session)
-    pid = str(product_id)
-
-    item = cart.get(pid)
-    if not item:
+    if product_id not in request.cart:
         return redirect("cart:cart_detail")
 
     product = get_object_or_404(
@@ -188,24 +230,154 @@ def cart_update(request, product_id):
         is_active=True
     )
 
-    action = request.POST.get("action")
+    _update(request, product, request.POST.get("action"))
+    return redirect("cart:cart_detail")
+
+
+# =====================================================
+# JSON API (DELTAS, NO RE-RENDER)
+# =====================================================
+# Same mutations as above; the response carries only the changed
+# lines, the new total and the badge count:
+#
+#   {
+#       "lines": [{"product_id": 7, "qty": 2, "price": "499.00",
+#                  "subtotal": "998.00", "stock": 12}],
+#       "total": "998.00",
+#       "count": 1
+#   }
+#
+# A removed line comes back with qty 0.
+def _totals(cart) -> Decimal:
+    """
+    Cart total as the cart page shows it: active products only,
+    snapshot price or (cookie carts) the current one. One query.
+    """
+    product_ids = []
+    for pid in cart.keys():
+        try:
+            product_ids.append(int(pid))
+        except (TypeError, ValueError):
+            continue
+
+    total = Decimal("0.00")
+    for product_id, current in (
+        Product.objects
+        .filter(id__in=product_ids, is_active=True)
+        .values_list("id", "price")
+    ):
+        item = cart.get(product_id)
+        try:
+            price = Decimal(item.get("price"))
+        except Exception:
+            price = current
+        total += price * _line_qty(cart, str(product_id))
+    return total
+
+
+def _line(cart, product) -> dict:
+    item = cart.get(product.id) or {}
+    qty = _line_qty(cart, str(product.id))
+    try:
+        price = Decimal(item.get("price"))
+    except Exception:
+        price = product.price
+
+    return {
+        "product_id": product.id,
+        "qty": qty,
+        "price": str(price),
+        "subtotal": str(price * qty),
+        "stock": product.stock,
+    }
+
+
+def _delta(request, products, status=200):
+    cart = request.cart
+    return JsonResponse(
+        {
+            "lines": [_line(cart, product) for product in products],
+            "total": str(_totals(cart)),
+            "count": len(cart),
+        },
+        status=status,
+    )
+
+
+def _unavailable():
+    return JsonResponse({"error": "Product unavailable"}, status=404)
+
+
+@require_POST
+def api_add(request, product_id):
+    product = Product.objects.filter(id=product_id, is_active=True).first()
+    if product is None:
+        return _unavailable()
 
     try:
-        qty = int(item.get("qty", 0))
+        qty = int(request.POST.get("qty", 1))
     except (TypeError, ValueError):
-        cart.pop(pid, None)
-        _save_cart(request.session, cart)
-        return redirect("cart:cart_detail")
+        qty = 1
 
-    if action == "inc":
-        if product.can_fulfill(qty + 1):
-            item["qty"] = qty + 1
+    if qty > 0:
+        _add(request, product, qty)
+    return _delta(request, [product])
 
-    elif action == "dec":
-        if qty > 1:
-            item["qty"] = qty - 1
-        else:
-            cart.pop(pid, None)
 
-    _save_cart(request.session, cart)
-    return redirect("cart:cart_detail")
+@require_POST
+def api_update(request, product_id):
+    product = Product.objects.filter(id=product_id, is_active=True).first()
+    if product is None:
+        return _unavailable()
+
+    if product_id in request.cart:
+        _update(request, product, request.POST.get("action"))
+    return _delta(request, [product])
+
+
+@require_POST
+def api_remove(request, product_id):
+    _remove(request, product_id)
+
+    product = Product.objects.filter(id=product_id).first()
+    return _delta(request, [product] if product else [])
+
+
+@require_POST
+def api_batch(request):
+    """
+    Apply several line changes in one request. JSON body:
+
+        {"lines": [{"product_id": 7, "qty": 3}, {"product_id": 9, "qty": 0}]}
+
+    `qty` is the wanted quantity (0 removes the line).
+    """
+    try:
+        changes = {
+            int(change["product_id"]): int(change["qty"])
+            for change in json.loads(request.body)["lines"]
+        }
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": "Invalid batch"}, status=400)
+
+    if len(changes) > BATCH_MAX_LINES:
+        return JsonResponse({"error": "Too many lines"}, status=400)
+
+    products = {
+        product.id: product
+        for product in Product.objects.filter(id__in=changes, is_active=True)
+    }
+
+    for product_id, qty in sorted(changes.items()):
+        product = products.get(product_id)
+        if product is None:
+            _remove(request, product_id)
+            continue
+
+        current = _line_qty(request.cart, str(product_id))
+        _set(request, product, min(qty, current + MAX_ADD))
+
+    return _delta(
+        request,
+        [products[product_id] for product_id in sorted(products)],
+    )
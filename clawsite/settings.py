@@ -3,6 +3,7 @@ Django settings for clawsite
 Production-ready (Render-safe)
 """
 
+from decimal import Decimal
 from pathlib import Path
 import os
 import dj_database_url
@@ -72,6 +73,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "cart.middleware.CartMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -124,9 +126,65 @@ else:
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / "db.sqlite3",
+            # Take the write lock at BEGIN: web + run_worker threads
+            # then queue on the busy timeout instead of failing
+            "OPTIONS": {"transaction_mode": "IMMEDIATE"},
+            # Test database on disk: the checkout tests run threads,
+            # which cannot share an in-memory database
+            "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
         }
     }
 
+# =================================================
+# CACHE
+# =================================================
+# Shared across gunicorn workers on a node, so tag invalidation
+# done by one worker is seen by all of them. REDIS_URL (needs the
+# `redis` package) shares it across nodes; CACHE_BACKEND=db uses the
+# database (run `manage.py createcachetable` first).
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ["REDIS_URL"],
+        }
+    }
+elif os.getenv("CACHE_BACKEND") == "db":
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+            "LOCATION": "clawstory_cache",
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": os.getenv("CACHE_LOCATION", "/tmp/clawstory-cache"),
+        }
+    }
+
+CATALOG_PAGE_CACHE_TIMEOUT = int(os.getenv("CATALOG_PAGE_CACHE_TIMEOUT", 60 * 15))
+CATALOG_HTTP_MAX_AGE = int(os.getenv("CATALOG_HTTP_MAX_AGE", 60))
+
+# In-process tier in front of CACHES for catalog rows (pages.catalog_cache)
+CATALOG_LOCAL_CACHE_ENTRIES = int(os.getenv("CATALOG_LOCAL_CACHE_ENTRIES", 1_000))
+CATALOG_LOCAL_CACHE_TTL = int(os.getenv("CATALOG_LOCAL_CACHE_TTL", 300))
+
+# Each process checks the catalog change log (pages.catalog_bus) at
+# most this often: the cross-node invalidation delay
+CATALOG_BUS_POLL_SECONDS = float(os.getenv("CATALOG_BUS_POLL_SECONDS", 1))
+
+# How long a skipped change-log id is re-read before it is taken as
+# rolled back. Must exceed the longest transaction that writes catalog
+# data, or a change committed later than this is never applied.
+CATALOG_BUS_GAP_SECONDS = float(os.getenv("CATALOG_BUS_GAP_SECONDS", 60))
+
+# Listing stock badges (pages:availability): "low" at or below this
+# many unheld units; per-process snapshots rebuild at most this often
+LOW_STOCK_THRESHOLD = int(os.getenv("LOW_STOCK_THRESHOLD", 5))
+AVAILABILITY_REFRESH_SECONDS = int(os.getenv("AVAILABILITY_REFRESH_SECONDS", 2))
+
 # =================================================
 # PASSWORD VALIDATION
 # =================================================
@@ -201,6 +259,77 @@ STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "")
 STRIPE_PUBLISHABLE_KEY = os.getenv("STRIPE_PUBLISHABLE_KEY", "")
 STRIPE_WEBHOOK_SECRET = os.getenv("STRIPE_WEBHOOK_SECRET", "")
 
+# Point at a local fake API (manage.py fake_stripe_server) in development
+STRIPE_API_BASE = os.getenv("STRIPE_API_BASE", "")
+
+# Webhook events are applied by the worker in batches
+WEBHOOK_BATCH_SIZE = int(os.getenv("WEBHOOK_BATCH_SIZE", 200))
+WEBHOOK_MAX_ATTEMPTS = int(os.getenv("WEBHOOK_MAX_ATTEMPTS", 5))
+
+# manage.py reconcile_payments re-scans intents created this far back
+RECONCILE_LOOKBACK_HOURS = int(os.getenv("RECONCILE_LOOKBACK_HOURS", 24))
+
+# "stripe" in production; "fake" for local load tests
+PAYMENT_GATEWAY = os.getenv("PAYMENT_GATEWAY", "stripe")
+FAKE_GATEWAY_LATENCY = float(os.getenv("FAKE_GATEWAY_LATENCY", 0))
+
+
+# =================================================
+# OUTBOX WORKER (manage.py run_worker)
+# =================================================
+OUTBOX_WORKER_CONCURRENCY = int(os.getenv("OUTBOX_WORKER_CONCURRENCY", 4))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 8))
+OUTBOX_LEASE_SECONDS = int(os.getenv("OUTBOX_LEASE_SECONDS", 300))
+OUTBOX_BACKOFF_BASE = int(os.getenv("OUTBOX_BACKOFF_BASE", 5))
+OUTBOX_BACKOFF_MAX = int(os.getenv("OUTBOX_BACKOFF_MAX", 60 * 60))
+OUTBOX_RETENTION_DAYS = int(os.getenv("OUTBOX_RETENTION_DAYS", 7))
+
+# Payment page waits this long for the worker before creating the intent inline
+PAYMENT_INTENT_WAIT_SECONDS = int(os.getenv("PAYMENT_INTENT_WAIT_SECONDS", 15))
+
+# Unpaid online orders are cancelled (stock released) after this long;
+# run_worker sweeps every ORDER_EXPIRY_INTERVAL_SECONDS
+PENDING_ORDER_TTL_MINUTES = int(os.getenv("PENDING_ORDER_TTL_MINUTES", 60))
+ORDER_EXPIRY_INTERVAL_SECONDS = int(os.getenv("ORDER_EXPIRY_INTERVAL_SECONDS", 60))
+
+# Add-to-cart holds stock this long; expired holds are released by
+# the same run_worker sweep
+CART_RESERVATION_TTL_MINUTES = int(os.getenv("CART_RESERVATION_TTL_MINUTES", 15))
+
+# Cart storage: "session" | "cookie" (signed, no server writes) |
+# "db" (Cart/CartLine tables). Switching empties existing carts.
+CART_BACKEND = os.getenv("CART_BACKEND", "session")
+CART_COOKIE_NAME = "cart"
+CART_COOKIE_AGE = 60 * 60 * 24 * 30
+CART_RETENTION_DAYS = int(os.getenv("CART_RETENTION_DAYS", 30))
+
+# Shard count used by the admin "hot-product mode" action
+HOT_PRODUCT_SHARDS = int(os.getenv("HOT_PRODUCT_SHARDS", 8))
+# Product.stock of a hot product is refreshed from its shards by one
+# outbox job per this many seconds, not once per order
+HOT_STOCK_MATERIALIZE_SECONDS = int(os.getenv("HOT_STOCK_MATERIALIZE_SECONDS", 2))
+
+# Inventory snapshots stop below a missing ledger id until it shows up.
+# On Postgres a missing id is given up on once every transaction that
+# was open when it was first seen has ended; elsewhere after this long,
+# which must exceed the longest stock-changing transaction.
+LEDGER_GAP_SECONDS = float(os.getenv("LEDGER_GAP_SECONDS", 60))
+
+# Checkout pricing (quotes are signed and reused by create_order)
+SHIPPING_CHARGE = Decimal(os.getenv("SHIPPING_CHARGE", "0"))
+FREE_SHIPPING_THRESHOLD = (
+    Decimal(os.environ["FREE_SHIPPING_THRESHOLD"])
+    if os.getenv("FREE_SHIPPING_THRESHOLD") else None
+)
+TAX_RATE = Decimal(os.getenv("TAX_RATE", "0"))
+CHECKOUT_QUOTE_MAX_AGE = int(os.getenv("CHECKOUT_QUOTE_MAX_AGE", 60 * 10))
+
+# Checkout waiting room: max shoppers in checkout at once across all
+# web nodes (0 = off). Admitted shoppers have LEASE seconds to order.
+WAITING_ROOM_CAPACITY = int(os.getenv("WAITING_ROOM_CAPACITY", 0))
+WAITING_ROOM_LEASE_SECONDS = int(os.getenv("WAITING_ROOM_LEASE_SECONDS", 600))
+WAITING_ROOM_POLL_SECONDS = int(os.getenv("WAITING_ROOM_POLL_SECONDS", 3))
+
 
 # =================================================
 # PRODUCTION SECURITY (SAFE)
@@ -2,11 +2,15 @@ from django.contrib import admin
 from django.utils.html import format_html
 
 from .models import (
+    InventoryMovement,
+    InventorySnapshot,
     Order,
     OrderItem,
+    OutboxJob,
     PaymentTransaction,
     WebhookEvent,
 )
+from .services import outbox
 
 
 # ==================================================
@@ -237,6 +241,7 @@ class WebhookEventAdmin(admin.ModelAdmin):
         "event_type",
         "linked_order",
         "processed",
+        "attempts",
         "received_at",
     )
 
@@ -252,6 +257,9 @@ class WebhookEventAdmin(admin.ModelAdmin):
         "payload",
         "processed",
         "processed_at",
+        "event_created",
+        "attempts",
+        "last_error",
         "received_at",
     )
 
@@ -261,3 +269,80 @@ class WebhookEventAdmin(admin.ModelAdmin):
         return obj.order.order_number if obj.order else "—"
 
     linked_order.short_description = "Order"
+
+
+# ==================================================
+# OUTBOX JOB ADMIN (DEAD-LETTER INSPECTION)
+# ==================================================
+@admin.register(OutboxJob)
+class OutboxJobAdmin(admin.ModelAdmin):
+    list_display = (
+        "name",
+        "key",
+        "status",
+        "attempts",
+        "run_after",
+        "created_at",
+    )
+
+    list_filter = ("status", "name")
+    search_fields = ("key",)
+
+    readonly_fields = (
+        "name",
+        "key",
+        "payload",
+        "status",
+        "attempts",
+        "max_attempts",
+        "run_after",
+        "claim_token",
+        "locked_at",
+        "last_error",
+        "created_at",
+        "updated_at",
+    )
+
+    ordering = ("-created_at",)
+    actions = ("retry_jobs",)
+
+    @admin.action(description="Retry selected dead-letter jobs")
+    def retry_jobs(self, request, queryset):
+        retried = outbox.retry_dead(queryset)
+        self.message_user(request, f"{retried} job(s) queued again.")
+
+
+# ==================================================
+# INVENTORY LEDGER (APPEND-ONLY, READ-ONLY)
+# ==================================================
+@admin.register(InventoryMovement)
+class InventoryMovementAdmin(admin.ModelAdmin):
+    list_display = ("id", "product", "delta", "reason", "order", "created_at")
+    list_filter = ("reason",)
+    search_fields = ("product__name", "order__order_number")
+    list_select_related = ("product", "order")
+    ordering = ("-id",)
+    show_full_result_count = False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(InventorySnapshot)
+class InventorySnapshotAdmin(admin.ModelAdmin):
+    list_display = ("product", "stock", "movement_id", "taken_at")
+    search_fields = ("product__name",)
+    list_select_related = ("product",)
+    ordering = ("-taken_at",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
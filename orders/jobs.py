@@ -0,0 +1,60 @@
+import logging
+from datetime import timedelta
+
+import stripe
+
+from orders.models import Order, PaymentTransaction
+from orders.services import outbox
+from orders.services.expiry_service import CANCEL_INTENT_JOB
+from orders.services.order_service import PAYMENT_INTENT_JOB, start_online_payment
+from orders.services.stripe import cancel_payment_intent
+from orders.services.webhook_service import WEBHOOK_DRAIN_JOB, drain_webhooks
+
+logger = logging.getLogger("payments.stripe")
+
+WEBHOOK_RETRY_DELAY = timedelta(seconds=30)
+
+
+# =====================================================
+# OUTBOX HANDLERS (run by manage.py run_worker)
+# =====================================================
+@outbox.handler(PAYMENT_INTENT_JOB)
+def create_payment_intent(payload):
+    order = (
+        Order.objects
+        .filter(pk=payload["order_id"], status=Order.PAYMENT_PENDING)
+        .first()
+    )
+    if order:
+        start_online_payment(order=order)
+
+
+@outbox.handler(WEBHOOK_DRAIN_JOB)
+def drain_webhook_backlog(payload):
+    stats = drain_webhooks()
+
+    # Failed events (and the events held back behind them) get another drain
+    if stats["failed"] and not outbox.has_pending(WEBHOOK_DRAIN_JOB, "drain", include_running=False):
+        outbox.enqueue(WEBHOOK_DRAIN_JOB, key="drain", delay=WEBHOOK_RETRY_DELAY)
+
+
+@outbox.handler(CANCEL_INTENT_JOB)
+def cancel_expired_intent(payload):
+    payment = (
+        PaymentTransaction.objects
+        .filter(order_id=payload["order_id"], gateway="stripe")
+        .exclude(intent_id="")
+        .first()
+    )
+    if payment is None or payment.intent_id.startswith("pi_fake_"):
+        return
+
+    try:
+        cancel_payment_intent(payment.intent_id)
+    except stripe.error.InvalidRequestError:
+        # Already succeeded or canceled: a late success on a
+        # cancelled order needs a manual refund
+        logger.warning(
+            "Could not cancel intent %s of expired order %s",
+            payment.intent_id, payload["order_id"],
+        )
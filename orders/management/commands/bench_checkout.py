@@ -0,0 +1,188 @@
+import random
+import threading
+import time
+import uuid
+from collections import Counter
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections, connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from orders.models import Order
+from orders.services.order_service import create_order_from_cart
+from pages.models import Collection, Product
+
+
+ADDRESS = {
+    "full_name": "Checkout Bench",
+    "phone": "9999999999",
+    "address_line": "1 Bench Street",
+    "city": "Pune",
+    "state": "MH",
+    "pincode": "411001",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Stress create_order_from_cart with many parallel checkouts of "
+        "the same products (shuffled cart order) and verify there is "
+        "no deadlock and no oversell. Fixture data is deleted afterwards. "
+        "Run against Postgres: SQLite serializes writers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=16)
+        parser.add_argument("--checkouts", type=int, default=200)
+        parser.add_argument("--products", type=int, default=10)
+        parser.add_argument("--stock", type=int, default=150)
+
+    def handle(self, *args, **options):
+        collection, products, user = self._fixtures(options)
+        try:
+            self._query_counts(user, products)
+            self._stress(user, products, options)
+        finally:
+            self._cleanup(collection, user)
+
+    # -------------------------
+    # FIXTURES
+    # -------------------------
+    def _fixtures(self, options):
+        tag = uuid.uuid4().hex[:8]
+        collection = Collection.objects.create(
+            name=f"Checkout bench {tag}",
+            slug=f"checkout-bench-{tag}",
+        )
+        products = [
+            Product.objects.create(
+                collection=collection,
+                name=f"Bench product {tag} {i}",
+                slug=f"bench-{tag}-{i}",
+                price=Decimal("499.00"),
+                stock=options["stock"],
+            )
+            for i in range(options["products"])
+        ]
+        user = get_user_model().objects.create_user(
+            username=f"checkout-bench-{tag}",
+        )
+        return collection, products, user
+
+    def _cleanup(self, collection, user):
+        Order.objects.filter(user=user).delete()
+        Product.objects.filter(collection=collection).delete()
+        collection.delete()
+        user.delete()
+
+    def _cart(self, products, rng=random):
+        cart = {
+            str(product.pk): {"qty": 1, "price": str(product.price)}
+            for product in products
+        }
+        items = list(cart.items())
+        rng.shuffle(items)
+        return dict(items)
+
+    # -------------------------
+    # ROUND-TRIPS PER CHECKOUT
+    # -------------------------
+    def _query_counts(self, user, products):
+        for size in sorted({1, len(products)}):
+            with CaptureQueriesContext(connection) as ctx:
+                create_order_from_cart(
+                    user=user,
+                    cart=self._cart(products[:size]),
+                    address_data=ADDRESS,
+                    payment_method="ONLINE",
+                )
+            self.stdout.write(
+                f"{size:>3} line cart → {len(ctx.captured_queries)} queries"
+            )
+
+    # -------------------------
+    # PARALLEL CHECKOUTS
+    # -------------------------
+    def _stress(self, user, products, options):
+        ids = [product.pk for product in products]
+        before = dict(
+            Product.objects.filter(pk__in=ids).values_list("pk", "stock")
+        )
+
+        since = timezone.now()
+        outcomes = Counter()
+        lock = threading.Lock()
+        remaining = iter(range(options["checkouts"]))
+
+        def worker(seed):
+            rng = random.Random(seed)
+            try:
+                while True:
+                    with lock:
+                        if next(remaining, None) is None:
+                            return
+                    size = rng.randint(1, len(products))
+                    cart = self._cart(rng.sample(products, size), rng)
+                    try:
+                        create_order_from_cart(
+                            user=user,
+                            cart=cart,
+                            address_data=ADDRESS,
+                            payment_method="COD",
+                        )
+                        result = "ok"
+                    except ValueError:
+                        result = "out_of_stock"
+                    except DatabaseError as exc:
+                        result = (
+                            "deadlock" if "deadlock" in str(exc).lower()
+                            else "db_error"
+                        )
+                    with lock:
+                        outcomes[result] += 1
+            finally:
+                close_old_connections()
+                connection.close()
+
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=worker, args=(seed,))
+            for seed in range(options["workers"])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(
+            f"{options['checkouts']} checkouts / {options['workers']} workers "
+            f"in {elapsed:.2f}s: {dict(outcomes)}"
+        )
+
+        # Every unit sold must be backed by an order item
+        after = dict(
+            Product.objects.filter(pk__in=ids).values_list("pk", "stock")
+        )
+        sold = Counter()
+        for order in Order.objects.filter(user=user, stock_locked=True, created_at__gte=since).prefetch_related("items"):
+            for item in order.items.all():
+                sold[item.product_id] += item.quantity
+
+        mismatched = [
+            pk for pk in ids
+            if after[pk] != before[pk] - sold[pk] or after[pk] < 0
+        ]
+
+        if outcomes["deadlock"] or mismatched:
+            raise CommandError(
+                f"deadlocks={outcomes['deadlock']} "
+                f"stock mismatches={mismatched}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            "No deadlocks, stock matches sold quantities."
+        ))
@@ -0,0 +1,124 @@
+import multiprocessing
+import time
+from collections import Counter
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import CommandError
+from django.db import DatabaseError, connections
+
+from orders.models import OutboxJob
+from orders.services.order_service import create_order_from_cart
+from pages import stock_shards
+from pages.models import Product
+
+from .bench_checkout import ADDRESS, Command as CheckoutBenchCommand
+
+
+def _checkout_batch(args):
+    """
+    Runs in a child process: `count` single-item COD checkouts.
+    """
+    product_id, user_id, count = args
+    connections.close_all()
+
+    user = get_user_model().objects.get(pk=user_id)
+    cart = {str(product_id): {"qty": 1}}
+    outcomes = Counter()
+
+    for _ in range(count):
+        try:
+            create_order_from_cart(
+                user=user,
+                cart=cart,
+                address_data=ADDRESS,
+                payment_method="COD",
+            )
+            outcomes["ok"] += 1
+        except ValueError:
+            outcomes["out_of_stock"] += 1
+        except DatabaseError:
+            outcomes["db_error"] += 1
+
+    connections.close_all()
+    return outcomes
+
+
+class Command(CheckoutBenchCommand):
+    help = (
+        "Flash-sale benchmark: many processes check out the same product. "
+        "Reports orders/second for each shard count (0 = plain product "
+        "row) and the debounced Product.stock refreshes queued, and "
+        "verifies no unit is oversold. Fixture data is deleted "
+        "afterwards. Run against Postgres: SQLite serializes writers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=8)
+        parser.add_argument("--checkouts", type=int, default=400)
+        parser.add_argument(
+            "--shards",
+            default="0,1,4,16",
+            help="Comma-separated shard counts to compare.",
+        )
+        parser.add_argument("--stock", type=int, default=None, help="Default: 2 × checkouts.")
+
+    def handle(self, *args, **options):
+        options["products"] = 1
+        options["stock"] = options["stock"] or options["checkouts"] * 2
+        shard_counts = [int(value) for value in options["shards"].split(",")]
+
+        collection, products, user = self._fixtures(options)
+        product = products[0]
+        try:
+            for shards in shard_counts:
+                self._measure(product, user, shards, options)
+        finally:
+            self._cleanup(collection, user)
+
+    def _measure(self, product, user, shards, options):
+        stock_shards.disable(product.pk)
+        Product.objects.filter(pk=product.pk).update(stock=options["stock"])
+        if shards:
+            stock_shards.enable(product.pk, shards)
+
+        processes = max(options["processes"], 1)
+        per_process, extra = divmod(options["checkouts"], processes)
+        batches = [
+            (product.pk, user.pk, per_process + (1 if i < extra else 0))
+            for i in range(processes)
+        ]
+
+        # Children must not share the parent's connection
+        connections.close_all()
+        started = time.perf_counter()
+        with multiprocessing.get_context("fork").Pool(processes) as pool:
+            results = pool.map(_checkout_batch, batches)
+        elapsed = time.perf_counter() - started
+
+        outcomes = sum(results, Counter())
+
+        # Product row refreshes queued by the orders (run_worker would
+        # run each after HOT_STOCK_MATERIALIZE_SECONDS)
+        jobs = OutboxJob.objects.filter(name=stock_shards.MATERIALIZE_JOB, key=str(product.pk))
+        queued = jobs.count()
+        materialize_ms = 0.0
+        if queued:
+            started = time.perf_counter()
+            stock_shards.materialize([product.pk])
+            materialize_ms = (time.perf_counter() - started) * 1000
+        jobs.delete()
+
+        stock_shards.disable(product.pk)
+        left = Product.objects.get(pk=product.pk).stock
+        if left != options["stock"] - outcomes["ok"]:
+            raise CommandError(
+                f"shards={shards}: stock {left}, expected "
+                f"{options['stock'] - outcomes['ok']}"
+            )
+
+        self.stdout.write(
+            f"shards={shards:>3}: {outcomes['ok']} orders in {elapsed:.2f}s "
+            f"→ {outcomes['ok'] / elapsed:,.0f} orders/s "
+            f"({dict(outcomes)}); "
+            f"{queued} stock refresh job(s) queued, {materialize_ms:.1f} ms to run"
+        )
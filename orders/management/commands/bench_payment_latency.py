@@ -0,0 +1,100 @@
+import threading
+import time
+
+from django.db import DatabaseError, connection, transaction
+from django.test.utils import override_settings
+
+from orders.services import fake_gateway
+from orders.services.order_service import create_order_from_cart, start_online_payment
+
+from .bench_checkout import ADDRESS, Command as CheckoutBenchCommand
+
+
+class Command(CheckoutBenchCommand):
+    help = (
+        "Show how gateway latency affects concurrent checkouts of one "
+        "product: payment call inside the checkout transaction (legacy) "
+        "versus commit-then-call. Uses the fake gateway; fixture data is "
+        "deleted afterwards. Run against Postgres for meaningful numbers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--latency", type=float, default=0.5)
+        parser.add_argument("--products", type=int, default=1)
+        parser.add_argument("--stock", type=int, default=10_000)
+
+    def handle(self, *args, **options):
+        collection, products, user = self._fixtures(options)
+        try:
+            with override_settings(
+                PAYMENT_GATEWAY="fake",
+                FAKE_GATEWAY_LATENCY=options["latency"],
+            ):
+                for mode in ("legacy", "commit-then-call"):
+                    self._measure(mode, user, products, options)
+        finally:
+            self._cleanup(collection, user)
+
+    # -------------------------
+    # CHECKOUT FLOWS
+    # -------------------------
+    def _legacy(self, user, cart):
+        with transaction.atomic():
+            order = create_order_from_cart(
+                user=user,
+                cart=cart,
+                address_data=ADDRESS,
+                payment_method="ONLINE",
+            )
+            fake_gateway.create_payment_intent(
+                order=order,
+                idempotency_key=f"order-{order.id}",
+            )
+
+    def _commit_then_call(self, user, cart):
+        order = create_order_from_cart(
+            user=user,
+            cart=cart,
+            address_data=ADDRESS,
+            payment_method="ONLINE",
+        )
+        start_online_payment(order=order)
+
+    def _measure(self, mode, user, products, options):
+        flow = self._legacy if mode == "legacy" else self._commit_then_call
+        cart = self._cart(products)
+
+        durations = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker():
+            started = time.perf_counter()
+            try:
+                flow(user, cart)
+            except DatabaseError as exc:
+                with lock:
+                    errors.append(str(exc))
+            finally:
+                connection.close()
+            with lock:
+                durations.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        threads = [
+            threading.Thread(target=worker)
+            for _ in range(options["workers"])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        durations.sort()
+        self.stdout.write(
+            f"{mode:>17}: {options['workers']} checkouts in {elapsed:.2f}s, "
+            f"median {durations[len(durations) // 2]:.2f}s, "
+            f"slowest {durations[-1]:.2f}s, errors {len(errors)}"
+        )
@@ -0,0 +1,48 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from orders.services.expiry_service import expire_pending_orders
+
+
+class Command(BaseCommand):
+    help = (
+        "Cancel PAYMENT_PENDING orders older than the TTL and release "
+        "their stock. run_worker sweeps periodically; use this from "
+        "cron or to catch up. Safe to run concurrently."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ttl-minutes",
+            type=int,
+            default=settings.PENDING_ORDER_TTL_MINUTES,
+        )
+        parser.add_argument("--chunk-size", type=int, default=200)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep sweeping every --interval seconds.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=settings.ORDER_EXPIRY_INTERVAL_SECONDS,
+        )
+
+    def handle(self, *args, **options):
+        ttl = timedelta(minutes=options["ttl_minutes"])
+
+        while True:
+            started = time.perf_counter()
+            expired = expire_pending_orders(ttl=ttl, chunk_size=options["chunk_size"])
+            self.stdout.write(
+                f"Expired {expired} pending orders "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
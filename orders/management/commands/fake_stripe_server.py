@@ -0,0 +1,169 @@
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from django.core.management.base import BaseCommand
+
+from orders.models import PaymentTransaction
+
+
+class FakeStripe:
+    """
+    In-memory subset of the PaymentIntents API:
+    create (idempotent), retrieve and list (newest first, cursor paged).
+    """
+
+    def __init__(self):
+        self.intents = {}
+        self.by_idempotency_key = {}
+        self.lock = threading.Lock()
+
+    def add(self, *, amount, currency, metadata, status="requires_payment_method", created=None, intent_id=None):
+        intent_id = intent_id or f"pi_{uuid.uuid4().hex[:24]}"
+        intent = {
+            "id": intent_id,
+            "object": "payment_intent",
+            "amount": amount,
+            "currency": currency,
+            "status": status,
+            "created": int(created or time.time()),
+            "client_secret": f"{intent_id}_secret_{uuid.uuid4().hex[:12]}",
+            "metadata": metadata,
+            "latest_charge": f"ch_{uuid.uuid4().hex[:24]}" if status == "succeeded" else None,
+        }
+        self.intents[intent_id] = intent
+        return intent
+
+    def create(self, params, idempotency_key):
+        with self.lock:
+            if idempotency_key and idempotency_key in self.by_idempotency_key:
+                return self.by_idempotency_key[idempotency_key]
+
+            metadata = {
+                key[len("metadata["):-1]: values[0]
+                for key, values in params.items()
+                if key.startswith("metadata[")
+            }
+            intent = self.add(
+                amount=int(params.get("amount", ["0"])[0]),
+                currency=params.get("currency", ["inr"])[0],
+                metadata=metadata,
+            )
+            if idempotency_key:
+                self.by_idempotency_key[idempotency_key] = intent
+            return intent
+
+    def list(self, query):
+        limit = min(int(query.get("limit", ["10"])[0]), 100)
+        created_gte = int(query.get("created[gte]", ["0"])[0])
+        starting_after = query.get("starting_after", [None])[0]
+
+        with self.lock:
+            rows = sorted(
+                (i for i in self.intents.values() if i["created"] >= created_gte),
+                key=lambda i: (i["created"], i["id"]),
+                reverse=True,
+            )
+
+        if starting_after:
+            ids = [row["id"] for row in rows]
+            rows = rows[ids.index(starting_after) + 1:] if starting_after in ids else []
+
+        return {
+            "object": "list",
+            "url": "/v1/payment_intents",
+            "has_more": len(rows) > limit,
+            "data": rows[:limit],
+        }
+
+
+def make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/v1/payment_intents":
+                return self._send(200, api.list(parse_qs(url.query)))
+
+            prefix = "/v1/payment_intents/"
+            if url.path.startswith(prefix) and url.path[len(prefix):] in api.intents:
+                return self._send(200, api.intents[url.path[len(prefix):]])
+
+            self._send(404, {"error": {"type": "invalid_request_error", "message": "No such resource"}})
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/v1/payment_intents":
+                return self._send(404, {"error": {"type": "invalid_request_error", "message": "No such resource"}})
+
+            length = int(self.headers.get("Content-Length") or 0)
+            params = parse_qs(self.rfile.read(length).decode())
+            self._send(200, api.create(params, self.headers.get("Idempotency-Key")))
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve a local fake of the Stripe PaymentIntents API for "
+        "reconciliation tests. Seeds one intent per recorded payment "
+        "with a random final status. Point STRIPE_API_BASE at it."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--port", type=int, default=12111)
+        parser.add_argument("--succeeded", type=float, default=0.5, help="Share of seeded intents that succeeded.")
+        parser.add_argument("--canceled", type=float, default=0.1, help="Share of seeded intents that were canceled.")
+        parser.add_argument("--extra", type=int, default=0, help="Intents unknown to this database.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        api = FakeStripe()
+        rng = random.Random(options["seed"])
+
+        seeded = 0
+        for payment in PaymentTransaction.objects.filter(gateway="stripe").exclude(intent_id="").select_related("order"):
+            roll = rng.random()
+            status = (
+                "succeeded" if roll < options["succeeded"]
+                else "canceled" if roll < options["succeeded"] + options["canceled"]
+                else "requires_payment_method"
+            )
+            api.add(
+                intent_id=payment.intent_id,
+                amount=int(payment.amount * 100),
+                currency=payment.currency.lower(),
+                metadata={"order_id": str(payment.order_id), "order_number": payment.order.order_number},
+                status=status,
+                created=payment.created_at.timestamp(),
+            )
+            seeded += 1
+
+        for _ in range(options["extra"]):
+            api.add(amount=100, currency="inr", metadata={}, status="succeeded")
+
+        server = ThreadingHTTPServer(("127.0.0.1", options["port"]), make_handler(api))
+        self.stdout.write(
+            f"Fake Stripe on http://127.0.0.1:{options['port']} "
+            f"({seeded} seeded, {options['extra']} extra intents). Ctrl+C to stop."
+        )
+        self.stdout.flush()
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
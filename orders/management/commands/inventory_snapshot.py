@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from orders.services import ledger_service
+
+
+class Command(BaseCommand):
+    help = (
+        "Write per-product inventory snapshots from the movement ledger "
+        "(run_worker does this hourly), check stock drift against the "
+        "ledger, or answer \"stock at time T\"."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--drift",
+            action="store_true",
+            help="Only report products whose stock differs from the ledger.",
+        )
+        parser.add_argument("--product", type=int, help="Product id for --at.")
+        parser.add_argument("--at", help="ISO datetime: print stock of --product at that time.")
+
+    def handle(self, *args, **options):
+        if options["at"]:
+            moment = parse_datetime(options["at"])
+            if moment is None or not options["product"]:
+                raise CommandError("--at needs an ISO datetime and --product")
+            stock = ledger_service.stock_at(options["product"], moment)
+            self.stdout.write(
+                "No snapshot that old." if stock is None
+                else f"Product {options['product']} at {moment}: {stock}"
+            )
+            return
+
+        if options["drift"]:
+            rows = ledger_service.drift()
+            for product_id, expected, actual in rows:
+                self.stdout.write(
+                    f"Product {product_id}: ledger {expected}, stock {actual} "
+                    f"({actual - expected:+d})"
+                )
+            style = self.style.WARNING if rows else self.style.SUCCESS
+            self.stdout.write(style(f"{len(rows)} products drifted."))
+            return
+
+        created = ledger_service.take_snapshots()
+        self.stdout.write(self.style.SUCCESS(f"{created} snapshots written."))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.services.webhook_service import backlog_metrics, drain_webhooks
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply pending Stripe webhook events in batches (grouped per "
+        "order) and report throughput and lag. run_worker does this "
+        "automatically; use this for backfills or monitoring."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None)
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep draining every --interval seconds.",
+        )
+        parser.add_argument("--interval", type=float, default=2.0)
+
+    def handle(self, *args, **options):
+        while True:
+            stats = drain_webhooks(batch_size=options["batch_size"])
+            backlog = backlog_metrics()
+
+            self.stdout.write(
+                f"processed={stats['processed']} failed={stats['failed']} "
+                f"held_back={stats['held_back']} "
+                f"batches={stats['batches']} "
+                f"rate={stats['events_per_second']}/s "
+                f"lag_max={stats['lag_max_seconds']}s | "
+                f"backlog={backlog['backlog']} "
+                f"oldest={backlog['oldest_pending_seconds']}s "
+                f"dead={backlog['dead']}"
+            )
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
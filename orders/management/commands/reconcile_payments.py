@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from orders.services.reconciliation_service import reconcile_payments, reset_checkpoint
+
+
+class Command(BaseCommand):
+    help = (
+        "Catch up on missed Stripe webhooks: page through recent "
+        "PaymentIntents from the last checkpoint and apply succeeded / "
+        "canceled states our PaymentTransactions never received."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--page-size", type=int, default=100)
+        parser.add_argument("--max-pages", type=int, default=None)
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Forget the checkpoint and rescan the initial window.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Report differences without applying or checkpointing.",
+        )
+
+    def handle(self, *args, **options):
+        if options["reset"]:
+            reset_checkpoint()
+
+        def on_page(number, stats):
+            self.stdout.write(
+                f"page {number}: {stats['seen']} intents, "
+                f"{stats['succeeded']} succeeded / {stats['canceled']} canceled "
+                f"to apply, {stats['unknown']} unknown"
+            )
+
+        started = time.perf_counter()
+        totals = reconcile_payments(
+            page_size=options["page_size"],
+            max_pages=options["max_pages"],
+            dry_run=options["dry_run"],
+            on_page=on_page,
+        )
+
+        verb = "would apply" if options["dry_run"] else "applied"
+        status = "complete" if totals["complete"] else "paused (resume with the next run)"
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['seen']} intents over {totals['pages']} pages in "
+            f"{time.perf_counter() - started:.2f}s; {verb} "
+            f"{totals['succeeded']} succeeded, {totals['canceled']} canceled; "
+            f"run {status}"
+        ))
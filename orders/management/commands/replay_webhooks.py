@@ -0,0 +1,237 @@
+import queue
+import threading
+import time
+import uuid
+import zlib
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.db.models import Q
+from django.db.models.functions import Coalesce
+from django.utils.dateparse import parse_datetime
+
+from orders.models import WebhookEvent
+from orders.services.webhook_service import process_webhook_event, record_failure
+
+# Sentinel closing a shard queue
+_DONE = object()
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-run webhook handlers over unprocessed (or selected) events. "
+        "Events are streamed oldest first and sharded by order, so each "
+        "order's events are applied in order by a single thread."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--since", help="ISO datetime (received_at >=)")
+        parser.add_argument("--until", help="ISO datetime (received_at <)")
+        parser.add_argument(
+            "--type",
+            action="append",
+            dest="types",
+            help="Event type, repeatable (e.g. payment_intent.succeeded).",
+        )
+        parser.add_argument(
+            "--order",
+            action="append",
+            dest="orders",
+            help="Order id or order number, repeatable.",
+        )
+        parser.add_argument(
+            "--event",
+            action="append",
+            dest="events",
+            help="Stripe event id, repeatable.",
+        )
+        parser.add_argument(
+            "--include-processed",
+            action="store_true",
+            help="Also re-apply events already marked processed.",
+        )
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--chunk-size", type=int, default=2_000)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report what would be replayed.",
+        )
+
+    # -------------------------
+    # SELECTION
+    # -------------------------
+    def _queryset(self, options):
+        events = WebhookEvent.objects.all()
+
+        if not options["include_processed"]:
+            events = events.filter(processed=False)
+
+        for name in ("since", "until"):
+            if options[name]:
+                moment = parse_datetime(options[name])
+                if moment is None:
+                    raise CommandError(f"--{name}: not an ISO datetime")
+                lookup = "received_at__gte" if name == "since" else "received_at__lt"
+                events = events.filter(**{lookup: moment})
+
+        if options["types"]:
+            events = events.filter(event_type__in=options["types"])
+
+        if options["events"]:
+            events = events.filter(event_id__in=options["events"])
+
+        if options["orders"]:
+            ids, numbers = [], []
+            for value in options["orders"]:
+                try:
+                    ids.append(str(uuid.UUID(value)))
+                except ValueError:
+                    numbers.append(value)
+
+            events = events.filter(
+                Q(order_id__in=ids) |
+                Q(order__order_number__in=numbers) |
+                # Events recorded before the order link was stored
+                Q(payload__data__object__metadata__order_id__in=ids)
+            )
+
+        return events
+
+    def _stream(self, events, chunk_size):
+        """
+        Yield (webhook_id, shard_key) oldest first, in bounded memory.
+        """
+        rows = (
+            events
+            .annotate(applied_at=Coalesce("event_created", "received_at"))
+            .order_by("applied_at", "received_at")
+            .values_list(
+                "pk",
+                "order_id",
+                "payload__data__object__metadata__order_id",
+            )
+            .iterator(chunk_size=chunk_size)
+        )
+        for pk, order_id, metadata_order_id in rows:
+            yield pk, str(order_id or metadata_order_id or pk)
+
+    # -------------------------
+    # RUN
+    # -------------------------
+    def handle(self, *args, **options):
+        events = self._queryset(options)
+        total = events.count()
+
+        if options["dry_run"]:
+            return self._dry_run(events, total, options)
+
+        if not total:
+            self.stdout.write("Nothing to replay.")
+            return
+
+        workers = max(options["workers"], 1)
+        shards = [queue.Queue(maxsize=options["chunk_size"]) for _ in range(workers)]
+
+        stats = Counter()
+        lock = threading.Lock()
+
+        def consume(shard):
+            failed_keys = set()
+            try:
+                while True:
+                    item = shard.get()
+                    if item is _DONE:
+                        return
+                    webhook_id, key = item
+
+                    # Keep per-order ordering: skip after a failure
+                    if key in failed_keys:
+                        result = "skipped"
+                    else:
+                        try:
+                            process_webhook_event(
+                                webhook_id=webhook_id,
+                                force=options["include_processed"],
+                            )
+                            result = "ok"
+                        except Exception:
+                            record_failure(WebhookEvent(pk=webhook_id))
+                            failed_keys.add(key)
+                            result = "failed"
+
+                    with lock:
+                        stats[result] += 1
+            finally:
+                close_old_connections()
+                connection.close()
+
+        threads = [
+            threading.Thread(target=consume, args=(shard,), daemon=True)
+            for shard in shards
+        ]
+        for thread in threads:
+            thread.start()
+
+        started = time.perf_counter()
+        last_report = started
+
+        for webhook_id, key in self._stream(events, options["chunk_size"]):
+            shards[zlib.crc32(key.encode()) % workers].put((webhook_id, key))
+
+            now = time.perf_counter()
+            if now - last_report >= 2:
+                self._progress(stats, lock, total, now - started)
+                last_report = now
+
+        for shard in shards:
+            shard.put(_DONE)
+        for thread in threads:
+            while thread.is_alive():
+                thread.join(timeout=2)
+                if thread.is_alive():
+                    self._progress(stats, lock, total, time.perf_counter() - started)
+
+        self._progress(stats, lock, total, time.perf_counter() - started)
+
+        style = self.style.SUCCESS if not stats["failed"] else self.style.WARNING
+        self.stdout.write(style(
+            f"Replay finished: {stats['ok']} applied, {stats['failed']} failed, "
+            f"{stats['skipped']} skipped behind failures."
+        ))
+
+    def _progress(self, stats, lock, total, elapsed):
+        with lock:
+            done = stats["ok"] + stats["failed"] + stats["skipped"]
+            failed = stats["failed"]
+
+        rate = done / elapsed if elapsed else 0.0
+        eta = (total - done) / rate if rate else 0.0
+        self.stdout.write(
+            f"{done}/{total} ({failed} failed) "
+            f"{rate:.0f} events/s, ETA {eta:.0f}s"
+        )
+
+    def _dry_run(self, events, total, options):
+        by_type = Counter()
+        shard_sizes = Counter()
+        keys = set()
+        workers = max(options["workers"], 1)
+
+        for (event_type,) in events.values_list("event_type").iterator(
+            chunk_size=options["chunk_size"]
+        ):
+            by_type[event_type] += 1
+
+        for _webhook_id, key in self._stream(events, options["chunk_size"]):
+            keys.add(key)
+            shard_sizes[zlib.crc32(key.encode()) % workers] += 1
+
+        self.stdout.write(f"Would replay {total} events across {len(keys)} orders/events:")
+        for event_type, count in by_type.most_common():
+            self.stdout.write(f"  {event_type}: {count}")
+        self.stdout.write(
+            f"Largest shard: {max(shard_sizes.values(), default=0)} events "
+            f"over {workers} workers."
+        )
@@ -0,0 +1,120 @@
+import logging
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, close_old_connections, connection
+
+from cart.backends import prune_carts
+from cart.reservations import release_expired
+from orders.services import outbox, waiting_room
+from orders.services.expiry_service import expire_pending_orders
+from orders.services.ledger_service import take_snapshots
+from pages import catalog_bus
+
+logger = logging.getLogger("orders.outbox")
+
+
+class Command(BaseCommand):
+    help = (
+        "Run outbox jobs (payment intents, webhook processing, emails) "
+        "and the periodic sweeps (pending orders, cart reservations). "
+        "Scale by running more processes or raising --concurrency."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=settings.OUTBOX_WORKER_CONCURRENCY,
+            help="Worker threads in this process.",
+        )
+        parser.add_argument("--batch", type=int, default=10)
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when the queue is empty.",
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Drain due jobs and exit (cron / tests).",
+        )
+
+    def handle(self, *args, **options):
+        handlers = outbox.load_handlers()
+        self.stdout.write(
+            f"Outbox worker: {options['concurrency']} threads, "
+            f"handlers: {', '.join(sorted(handlers)) or '-'}"
+        )
+
+        stop = threading.Event()
+        if not options["once"]:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *_: stop.set())
+
+        stats = {"done": 0, "failed": 0}
+        lock = threading.Lock()
+
+        def loop():
+            while not stop.is_set():
+                close_old_connections()
+                try:
+                    jobs = outbox.claim(limit=options["batch"])
+                except DatabaseError:
+                    logger.exception("Outbox claim failed")
+                    jobs = None
+
+                if not jobs:
+                    if options["once"] and jobs is not None:
+                        break
+                    stop.wait(options["poll_interval"])
+                    continue
+
+                for job in jobs:
+                    ok = outbox.run_job(job)
+                    with lock:
+                        stats["done" if ok else "failed"] += 1
+
+            connection.close()
+
+        threads = [
+            threading.Thread(target=loop, daemon=True)
+            for _ in range(max(options["concurrency"], 1))
+        ]
+        for thread in threads:
+            thread.start()
+
+        last_prune = last_expiry = 0.0
+        while any(thread.is_alive() for thread in threads):
+            if not options["once"] and time.monotonic() - last_prune > 3600:
+                try:
+                    outbox.prune()
+                    waiting_room.prune()
+                    prune_carts()
+                    catalog_bus.prune()
+                    take_snapshots()
+                except DatabaseError:
+                    logger.exception("Hourly maintenance failed")
+                last_prune = time.monotonic()
+            if (
+                not options["once"]
+                and time.monotonic() - last_expiry > settings.ORDER_EXPIRY_INTERVAL_SECONDS
+            ):
+                # SKIP LOCKED: safe with several worker processes
+                try:
+                    expire_pending_orders()
+                    release_expired()
+                except DatabaseError:
+                    logger.exception("Expiry sweep failed")
+                last_expiry = time.monotonic()
+            for thread in threads:
+                thread.join(timeout=1.0)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Outbox worker stopped: {stats['done']} done, "
+            f"{stats['failed']} failed"
+        ))
@@ -0,0 +1,43 @@
+# Generated by Django 6.0 on 2026-10-17 01:15
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0007_order_status_created_idx'),
+        ('pages', '0013_stock_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryMovement',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('delta', models.IntegerField()),
+                ('reason', models.CharField(choices=[('SALE', 'Sale'), ('RESTORE', 'Order cancelled / failed'), ('RESTOCK', 'Restock'), ('ADJUSTMENT', 'Manual adjustment')], max_length=10)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('order', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='orders.order')),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pages.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'id'], name='movement_product_pos_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='InventorySnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stock', models.IntegerField()),
+                ('movement_id', models.BigIntegerField()),
+                ('taken_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('product', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pages.product')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'taken_at'], name='snapshot_product_time_idx')],
+            },
+        ),
+    ]
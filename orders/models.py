@@ -106,6 +106,12 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Expiry sweeper: WHERE status = ... AND created_at < ...
+            models.Index(fields=["status", "created_at"], name="order_status_created_idx"),
+        ]
+
     def save(self, *args, **kwargs):
         if not self.order_number:
             self.order_number = self.generate_order_number()
@@ -242,6 +248,13 @@ class WebhookEvent(models.Model):
     processed = models.BooleanField(default=False)
     processed_at = models.DateTimeField(null=True, blank=True)
 
+    # Stripe's own event timestamp → per-order processing order
+    event_created = models.DateTimeField(null=True, blank=True)
+
+    # Processing failures (event is skipped after WEBHOOK_MAX_ATTEMPTS)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
     received_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
@@ -250,7 +263,282 @@ class WebhookEvent(models.Model):
             models.Index(fields=["gateway"]),
             models.Index(fields=["event_type"]),
             models.Index(fields=["processed"]),
+            models.Index(
+                fields=["processed", "received_at"],
+                name="webhook_backlog_idx",
+            ),
         ]
 
     def __str__(self):
         return f"{self.gateway} | {self.event_type}"
+
+
+# =====================================================
+# SYNC CHECKPOINT (INCREMENTAL JOBS)
+# =====================================================
+class SyncCheckpoint(models.Model):
+    """
+    Last position reached by an incremental background job.
+    """
+
+    name = models.CharField(max_length=100, unique=True)
+    cursor = models.CharField(max_length=255, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.cursor or '-'}"
+
+
+# =====================================================
+# CO-PURCHASE COUNTS (SPARSE PRODUCT × PRODUCT)
+# =====================================================
+class ProductPairCount(models.Model):
+    """
+    Number of purchased orders containing both products.
+    Stored in both directions so a product's row range is one lookup.
+    """
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    other = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    orders = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "other"],
+                name="unique_product_pair",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} + {self.other_id} × {self.orders}"
+
+
+class FrequentlyBoughtTogether(models.Model):
+    """
+    Top-K co-purchased products per product (compact read table).
+    """
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    recommended = models.ForeignKey(
+        "pages.ProductCard",
+        on_delete=models.CASCADE,
+        related_name="bought_with",
+    )
+    orders = models.PositiveIntegerField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ("product", "rank")
+        indexes = [
+            models.Index(fields=["product", "rank"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "recommended"],
+                name="unique_bought_together",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} → {self.recommended_id} (#{self.rank})"
+
+
+# =====================================================
+# OUTBOX JOB (TRANSACTIONAL SIDE EFFECTS)
+# =====================================================
+class OutboxJob(models.Model):
+    """
+    Side effect written in the same transaction as the business
+    change and executed later by `manage.py run_worker`.
+    """
+
+    PENDING = "PENDING"
+    RUNNING = "RUNNING"
+    DONE = "DONE"
+    DEAD = "DEAD"
+
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (DONE, "Done"),
+        (DEAD, "Dead letter"),
+    ]
+
+    name = models.CharField(max_length=100)
+    key = models.CharField(max_length=150, blank=True, db_index=True)
+    payload = models.JSONField(default=dict)
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING,
+    )
+
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=8)
+    run_after = models.DateTimeField(default=timezone.now)
+
+    claim_token = models.CharField(max_length=32, blank=True, db_index=True)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ("run_after",)
+        indexes = [
+            models.Index(fields=["status", "run_after"], name="outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} | {self.status} | {self.key or self.pk}"
+
+
+# =====================================================
+# INVENTORY LEDGER (APPEND-ONLY)
+# =====================================================
+class InventoryMovement(models.Model):
+    """
+    One stock change of one product, written in the same transaction
+    as the stock UPDATE. Never updated or deleted.
+
+    Single secondary index (product, id): the ledger position is the
+    id, so "movements of P since snapshot S" is one index range scan
+    and inserts maintain nothing else.
+    """
+
+    SALE = "SALE"
+    RESTORE = "RESTORE"
+    RESTOCK = "RESTOCK"
+    ADJUSTMENT = "ADJUSTMENT"
+
+    REASON_CHOICES = (
+        (SALE, "Sale"),
+        (RESTORE, "Order cancelled / failed"),
+        (RESTOCK, "Restock"),
+        (ADJUSTMENT, "Manual adjustment"),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False,
+    )
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="+",
+        db_index=False,
+    )
+
+    delta = models.IntegerField()
+    reason = models.CharField(max_length=10, choices=REASON_CHOICES)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["product", "id"], name="movement_product_pos_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} {self.delta:+d} ({self.reason})"
+
+
+class InventorySnapshot(models.Model):
+    """
+    Stock of a product at ledger position `movement_id`, derived from
+    the previous snapshot plus the movements in between.
+    """
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False,
+    )
+    stock = models.IntegerField()
+    movement_id = models.BigIntegerField()
+    taken_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["product", "taken_at"], name="snapshot_product_time_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} = {self.stock} @ {self.movement_id}"
+
+
+# =====================================================
+# CHECKOUT WAITING ROOM
+# =====================================================
+class CheckoutTicket(models.Model):
+    """
+    A shopper's place in the checkout waiting room.
+    Admission is FIFO by id (orders.services.waiting_room).
+    """
+
+    WAITING = "WAITING"
+    ADMITTED = "ADMITTED"
+    DONE = "DONE"
+
+    STATUS_CHOICES = (
+        (WAITING, "Waiting"),
+        (ADMITTED, "Admitted"),
+        (DONE, "Done"),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False,
+    )
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=WAITING,
+    )
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(default=timezone.now)
+    # End of the admission lease
+    expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"], name="ticket_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.status}"
+
+    @property
+    def is_admitted(self) -> bool:
+        return (
+            self.status == self.ADMITTED
+            and self.expires_at is not None
+            and self.expires_at > timezone.now()
+        )
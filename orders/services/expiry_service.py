@@ -0,0 +1,89 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from orders.models import Order, PaymentTransaction
+from orders.services import outbox
+from orders.services.inventory_service import restore_inventory_bulk
+
+logger = logging.getLogger("orders.expiry")
+
+
+CANCEL_INTENT_JOB = "payments.cancel_intent"
+
+
+# =====================================================
+# EXPIRE STALE PAYMENT_PENDING ORDERS
+# =====================================================
+# Orders abandoned on the payment page would otherwise stay
+# PAYMENT_PENDING forever. Chunks are selected through the
+# (status, created_at) index and locked with SKIP LOCKED, so
+# several workers can sweep at once without waiting on each
+# other or on a webhook that is finishing the same order.
+def _expired(cutoff):
+    orders = (
+        Order.objects
+        .filter(status=Order.PAYMENT_PENDING, created_at__lt=cutoff)
+        .order_by("created_at")
+    )
+    if connection.features.has_select_for_update_skip_locked:
+        return orders.select_for_update(skip_locked=True)
+    # SQLite: writers are serialized anyway
+    return orders.select_for_update()
+
+
+def expire_chunk(*, cutoff, chunk_size) -> int:
+    """
+    Cancel one chunk of expired orders in one transaction.
+    Returns the number of orders cancelled.
+    """
+    with transaction.atomic():
+        orders = list(_expired(cutoff)[:chunk_size])
+        if not orders:
+            return 0
+
+        ids = [order.pk for order in orders]
+        restore_inventory_bulk(ids)
+
+        for order in orders:
+            order.transition(Order.CANCELLED)
+
+        # Stop the customer paying for a cancelled order
+        for order_id in (
+            PaymentTransaction.objects
+            .filter(order_id__in=ids, gateway="stripe")
+            .exclude(intent_id="")
+            .values_list("order_id", flat=True)
+        ):
+            outbox.enqueue(
+                CANCEL_INTENT_JOB,
+                {"order_id": str(order_id)},
+                key=str(order_id),
+            )
+
+    return len(orders)
+
+
+def expire_pending_orders(*, ttl=None, chunk_size=200, max_chunks=None) -> int:
+    """
+    Cancel PAYMENT_PENDING orders older than `ttl`
+    (default PENDING_ORDER_TTL_MINUTES). Returns orders cancelled.
+    """
+    ttl = ttl or timedelta(minutes=settings.PENDING_ORDER_TTL_MINUTES)
+    cutoff = timezone.now() - ttl
+
+    expired = chunks = 0
+    while max_chunks is None or chunks < max_chunks:
+        count = expire_chunk(cutoff=cutoff, chunk_size=chunk_size)
+        if not count:
+            break
+        expired += count
+        chunks += 1
+
+    if expired:
+        logger.info("Expired %s pending orders", expired)
+
+    return expired
@@ -0,0 +1,39 @@
+import hashlib
+import logging
+import time
+from types import SimpleNamespace
+
+from django.conf import settings
+
+logger = logging.getLogger("payments.fake")
+
+
+# ======================================================
+# FAKE PAYMENT GATEWAY (LOCAL / LOAD TESTS ONLY)
+# ======================================================
+# Same call signature as orders.services.stripe.create_payment_intent.
+# Enabled with PAYMENT_GATEWAY=fake; FAKE_GATEWAY_LATENCY (seconds)
+# simulates a slow Stripe response. Intents are derived from the
+# idempotency key, so retries return the same intent like Stripe does.
+def create_payment_intent(*, order, idempotency_key: str):
+    latency = settings.FAKE_GATEWAY_LATENCY
+    if latency:
+        time.sleep(latency)
+
+    digest = hashlib.sha256(idempotency_key.encode()).hexdigest()[:24]
+    intent = SimpleNamespace(
+        id=f"pi_fake_{digest}",
+        client_secret=f"pi_fake_{digest}_secret_{digest[:8]}",
+        metadata={
+            "order_id": str(order.id),
+            "order_number": order.order_number,
+            "user_id": str(order.user_id),
+        },
+    )
+
+    logger.info(
+        "Fake PaymentIntent created",
+        extra={"order_id": str(order.id), "intent_id": intent.id},
+    )
+
+    return intent
@@ -1,7 +1,217 @@
 from django.db import transaction
-from django.db.models import F
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+from django.db.models.functions import Greatest
 
+from orders.models import InventoryMovement, Order, OrderItem
+from orders.services.ledger_service import log_movements
+from pages import availability, stock_shards
+from pages.models import Product
+from pages.signals import notify_products_updated
 
+
+# =====================================================
+# BULK STOCK ENGINE
+# =====================================================
+# One UPDATE per order instead of one locked read + save per item:
+#
+#   UPDATE product
+#      SET stock = stock - CASE id WHEN 1 THEN 2 WHEN 7 THEN 1 END
+#    WHERE id IN (1, 7)
+#      AND stock >= CASE id WHEN 1 THEN 2 WHEN 7 THEN 1 END
+#
+# Rows with too little stock fail the WHERE → affected row count
+# is short → the whole order is rolled back.
+#
+# Hot products (stock_shards > 0) skip the product row and go through
+# pages.stock_shards instead.
+#
+# Every change appends InventoryMovement rows in the same transaction.
+
+
+class _Shortfall(Exception):
+    pass
+
+
+def _order_quantities(order) -> dict:
+    """
+    {product_id: total quantity} for an order.
+    """
+    return dict(
+        order.items
+        .order_by("product_id")
+        .values("product_id")
+        .annotate(total=Sum("quantity"))
+        .values_list("product_id", "total")
+    )
+
+
+def _per_product(quantities: dict) -> Case:
+    return Case(
+        *[
+            When(pk=product_id, then=Value(qty))
+            for product_id, qty in quantities.items()
+        ],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def _split_hot(quantities: dict):
+    """
+    ({cold product_id: qty}, {hot product_id: shard count}).
+    """
+    hot = dict(
+        Product.objects
+        .filter(pk__in=quantities, stock_shards__gt=0)
+        .values_list("pk", "stock_shards")
+    )
+    cold = {
+        product_id: qty
+        for product_id, qty in quantities.items()
+        if product_id not in hot
+    }
+    return cold, hot
+
+
+def decrement_stock(quantities: dict, *, reason=InventoryMovement.SALE, order=None) -> None:
+    """
+    Take stock for {product_id: qty} in one guarded statement.
+    Raises ValueError naming the short products; nothing is applied.
+    """
+    if not quantities:
+        return
+
+    cold, hot = _split_hot(quantities)
+    amount = _per_product(cold)
+
+    try:
+        with transaction.atomic():
+            if cold:
+                updated = (
+                    Product.objects
+                    .filter(pk__in=cold, stock__gte=amount)
+                    .update(stock=F("stock") - amount)
+                )
+                if updated != len(cold):
+                    raise _Shortfall
+            for product_id in sorted(hot):
+                stock_shards.take(product_id, quantities[product_id], shards=hot[product_id])
+            log_movements(
+                {product_id: -qty for product_id, qty in quantities.items()},
+                reason=reason,
+                order=order,
+            )
+    except _Shortfall:
+        short = (
+            Product.objects
+            .filter(pk__in=cold, stock__lt=amount)
+            .values_list("name", flat=True)
+        )
+        raise ValueError(
+            f"Insufficient stock for {', '.join(short) or 'order'}"
+        )
+
+    notify_products_updated(cold, stock_only=True)
+
+
+def _give(quantities: dict) -> None:
+    cold, hot = _split_hot(quantities)
+
+    if cold:
+        Product.objects.filter(pk__in=cold).update(
+            stock=F("stock") + _per_product(cold)
+        )
+    for product_id in sorted(hot):
+        stock_shards.give(product_id, quantities[product_id], shards=hot[product_id])
+
+    notify_products_updated(cold, stock_only=True)
+
+
+@transaction.atomic
+def increment_stock(quantities: dict, *, reason=InventoryMovement.RESTORE, order=None) -> None:
+    """
+    Give back stock for {product_id: qty} in one statement.
+    """
+    if not quantities:
+        return
+
+    _give(quantities)
+    log_movements(quantities, reason=reason, order=order)
+
+
+# =====================================================
+# RESERVATION COUNTERS
+# =====================================================
+# Product.reserved_stock = units held by carts (cart.StockReservation).
+# Holds never touch `stock`; they only narrow what others can take.
+def hold_stock(product_id, quantity) -> bool:
+    """
+    Reserve `quantity` more units if that many are unheld.
+    Hot products are never held (that would write their row).
+    """
+    held = bool(
+        Product.objects
+        .filter(
+            pk=product_id,
+            stock_shards=0,
+            stock__gte=F("reserved_stock") + quantity,
+        )
+        .update(reserved_stock=F("reserved_stock") + quantity)
+    )
+    if held:
+        availability.invalidate()
+    return held
+
+
+def release_holds(quantities: dict) -> None:
+    """
+    Drop holds for {product_id: qty} in one statement.
+    """
+    if not quantities:
+        return
+
+    Product.objects.filter(pk__in=quantities).update(
+        reserved_stock=Greatest(F("reserved_stock") - _per_product(quantities), 0)
+    )
+    availability.invalidate()
+
+
+def take_reserved_stock(quantities: dict, held: dict, hot=None, *, order=None) -> None:
+    """
+    Take stock for {product_id: qty} and drop the buyer's own holds
+    ({product_id: qty}) in one statement. Callers hold the product
+    row locks and have checked availability, so no guard.
+
+    `hot` ({product_id: shard count}) products are not locked by the
+    caller; they are taken from their shards (guarded).
+    """
+    hot = hot or {}
+    cold = {
+        product_id: qty
+        for product_id, qty in quantities.items()
+        if product_id not in hot
+    }
+
+    if cold:
+        Product.objects.filter(pk__in=cold).update(
+            stock=F("stock") - _per_product(cold),
+            reserved_stock=Greatest(F("reserved_stock") - _per_product(held), 0),
+        )
+        notify_products_updated(cold, stock_only=True)
+
+    for product_id in sorted(hot):
+        stock_shards.take(product_id, quantities[product_id], shards=hot[product_id])
+
+    log_movements(
+        {product_id: -qty for product_id, qty in quantities.items()},
+        reason=InventoryMovement.SALE,
+        order=order,
+    )
+
+
+# =====================================================
+# ORDER INVENTORY
+# =====================================================
 @transaction.atomic
 def restore_inventory(order):
     """
@@ -24,12 +234,7 @@ def restore_inventory(order):
     if order.stock_restored:
         return
 
-    for item in order.items.select_related("product").select_for_update():
-        product = item.product
-
-        # Atomic increment
-        product.stock = F("stock") + item.quantity
-        product.save(update_fields=["stock"])
+    increment_stock(_order_quantities(order), order=order)
 
     order.stock_restored = True
     order.save(update_fields=["stock_restored"])
@@ -57,17 +262,48 @@ def lock_inventory(order):
     if order.stock_locked:
         return
 
-    for item in order.items.select_related("product").select_for_update():
-        product = item.product
-
-        if product.stock < item.quantity:
-            raise ValueError(
-                f"Insufficient stock for {product}"
-            )
-
-        # Atomic decrement
-        product.stock = F("stock") - item.quantity
-        product.save(update_fields=["stock"])
+    decrement_stock(_order_quantities(order), order=order)
 
     order.stock_locked = True
     order.save(update_fields=["stock_locked"])
+
+
+def restore_inventory_bulk(order_ids) -> int:
+    """
+    Restore inventory of many orders with one UPDATE.
+    Callers must hold the order row locks (and a transaction).
+    Returns orders restored.
+    """
+    order_ids = list(
+        Order.objects
+        .filter(pk__in=list(order_ids), stock_locked=True, stock_restored=False)
+        .values_list("pk", flat=True)
+    )
+    if not order_ids:
+        return 0
+
+    lines = list(
+        OrderItem.objects
+        .filter(order_id__in=order_ids)
+        .order_by("product_id")
+        .values("order_id", "product_id")
+        .annotate(total=Sum("quantity"))
+        .values_list("order_id", "product_id", "total")
+    )
+    quantities = {}
+    for _order_id, product_id, qty in lines:
+        quantities[product_id] = quantities.get(product_id, 0) + qty
+
+    _give(quantities)
+    InventoryMovement.objects.bulk_create([
+        InventoryMovement(
+            product_id=product_id,
+            order_id=order_id,
+            delta=qty,
+            reason=InventoryMovement.RESTORE,
+        )
+        for order_id, product_id, qty in lines
+    ])
+    Order.objects.filter(pk__in=order_ids).update(stock_restored=True)
+
+    return len(order_ids)
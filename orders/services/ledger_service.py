@@ -0,0 +1,227 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from orders.models import InventoryMovement, InventorySnapshot
+from pages.models import Product
+
+
+# Ids are allocated before commit, so a missing id may still be
+# committed by a slow transaction. A snapshot never moves its mark
+# past such a gap until it shows up or is known to be rolled back.
+# {id: (first seen, Postgres xmax then)}, kept between runs.
+GAPS_KEY = "ledger:snapshot:gaps"
+
+BATCH_SIZE = 500
+
+
+# =====================================================
+# WRITE
+# =====================================================
+def log_movements(deltas: dict, *, reason, order=None) -> None:
+    """
+    Append {product_id: signed delta} to the ledger (one INSERT).
+    Call inside the transaction that changes the stock.
+    """
+    InventoryMovement.objects.bulk_create([
+        InventoryMovement(
+            product_id=product_id,
+            order=order,
+            delta=delta,
+            reason=reason,
+        )
+        for product_id, delta in deltas.items()
+        if delta
+    ])
+
+
+# =====================================================
+# LEDGER STOCK
+# =====================================================
+def _movement_sum(after, upto=None) -> Coalesce:
+    """
+    Sum of a product's deltas with after < id (<= upto).
+    """
+    movements = InventoryMovement.objects.filter(product=OuterRef("pk"), pk__gt=after)
+    if upto is not None:
+        movements = movements.filter(pk__lte=upto)
+    return Coalesce(
+        Subquery(
+            movements
+            .values("product")
+            .annotate(total=Sum("delta"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def _with_latest_snapshot(products):
+    latest = (
+        InventorySnapshot.objects
+        .filter(product=OuterRef("pk"))
+        .order_by("-taken_at", "-pk")
+    )
+    return products.annotate(
+        snapshot_stock=Subquery(latest.values("stock")[:1]),
+        snapshot_mark=Subquery(latest.values("movement_id")[:1]),
+    )
+
+
+def _xid_horizon():
+    """
+    (xmin, xmax) of the current Postgres snapshot: every transaction
+    below xmin has ended. None on other databases.
+    """
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT pg_snapshot_xmin(s)::text::bigint, pg_snapshot_xmax(s)::text::bigint "
+            "FROM pg_current_snapshot() AS s"
+        )
+        return cursor.fetchone()
+
+
+def _settled_mark() -> int:
+    """
+    Highest ledger id with every id at or below it either visible or
+    known to be rolled back.
+    """
+    start = InventorySnapshot.objects.aggregate(mark=Max("movement_id"))["mark"] or 0
+    ids = (
+        InventoryMovement.objects
+        .filter(pk__gt=start)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+        .iterator(chunk_size=BATCH_SIZE * 10)
+    )
+
+    top = start
+    missing = []
+    for movement_id in ids:
+        missing.extend(range(top + 1, movement_id))
+        top = movement_id
+
+    # Read after the scan: a transaction holding a missing id already
+    # had its xid, so it is below this xmax
+    horizon = _xid_horizon()
+    now = time.time()
+    known = cache.get(GAPS_KEY) or {}
+    gaps = {gap: known.get(gap, (now, horizon and horizon[1])) for gap in missing}
+    cache.set(GAPS_KEY, gaps, None)
+
+    for gap in missing:
+        seen_at, xmax = gaps[gap]
+        if horizon is not None:
+            rolled_back = xmax is not None and horizon[0] >= xmax
+        else:
+            rolled_back = now - seen_at > settings.LEDGER_GAP_SECONDS
+        if not rolled_back:
+            return gap - 1
+    return top
+
+
+# =====================================================
+# SNAPSHOTS
+# =====================================================
+def take_snapshots() -> int:
+    """
+    One snapshot per product at the settled ledger mark.
+
+    - with a previous snapshot: previous stock + movements since
+    - first snapshot: Product.stock minus movements after the mark
+      (same statement, so both come from one consistent read)
+    """
+    mark = _settled_mark()
+    now = timezone.now()
+    created = 0
+
+    rows = (
+        _with_latest_snapshot(Product.objects.order_by("pk"))
+        .annotate(
+            since=_movement_sum(OuterRef("snapshot_mark"), mark),
+            after_mark=_movement_sum(mark),
+        )
+        .values_list("pk", "stock", "snapshot_stock", "snapshot_mark", "since", "after_mark")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+
+    batch = []
+    for product_id, stock, snapshot_stock, snapshot_mark, since, after_mark in rows:
+        if snapshot_mark is not None and snapshot_mark >= mark:
+            continue
+        batch.append(InventorySnapshot(
+            product_id=product_id,
+            stock=(
+                snapshot_stock + since if snapshot_stock is not None
+                else stock - after_mark
+            ),
+            movement_id=mark,
+            taken_at=now,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            created += len(InventorySnapshot.objects.bulk_create(batch))
+            batch = []
+
+    if batch:
+        created += len(InventorySnapshot.objects.bulk_create(batch))
+
+    return created
+
+
+# =====================================================
+# QUERIES
+# =====================================================
+def stock_at(product_id, at):
+    """
+    Stock of a product at time `at`: nearest earlier snapshot plus
+    the movements after it (an index range on (product, id)).
+    None if there is no snapshot that old.
+    """
+    snapshot = (
+        InventorySnapshot.objects
+        .filter(product_id=product_id, taken_at__lte=at)
+        .order_by("-taken_at", "-pk")
+        .first()
+    )
+    if snapshot is None:
+        return None
+
+    delta = (
+        InventoryMovement.objects
+        .filter(product_id=product_id, pk__gt=snapshot.movement_id, created_at__lte=at)
+        .aggregate(total=Sum("delta"))["total"]
+    ) or 0
+
+    return snapshot.stock + delta
+
+
+def drift(product_ids=None) -> list:
+    """
+    Products whose stock differs from what the ledger says:
+    [(product_id, ledger stock, actual stock)]. Products without
+    a snapshot are skipped.
+    """
+    products = Product.objects.order_by("pk")
+    if product_ids is not None:
+        products = products.filter(pk__in=list(product_ids))
+
+    rows = (
+        _with_latest_snapshot(products)
+        .filter(snapshot_mark__isnull=False)
+        .annotate(since=_movement_sum(OuterRef("snapshot_mark")))
+        .values_list("pk", "stock", "snapshot_stock", "since")
+        .iterator(chunk_size=BATCH_SIZE)
+    )
+
+    return [
+        (product_id, snapshot_stock + since, stock)
+        for product_id, stock, snapshot_stock, since in rows
+        if snapshot_stock + since != stock
+    ]
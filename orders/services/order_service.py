@@ -1,41 +1,90 @@
 from decimal import Decimal
 
+from django.conf import settings
 from django.db import transaction
 from django.db.models import F
 
+from cart.models import StockReservation
 from pages.models import Product
 from orders.models import Order, OrderItem, PaymentTransaction
-from orders.services.inventory_service import lock_inventory
+from orders.services.inventory_service import lock_inventory, take_reserved_stock
+from orders.services import fake_gateway, outbox, pricing_service
 from orders.services.stripe import create_payment_intent
 
 
+PAYMENT_INTENT_JOB = "payments.create_intent"
+
+
 # =====================================================
 # CREATE ORDER FROM CART (CANONICAL + SAFE)
 # =====================================================
+# Columns needed to lock and check stock when a quote supplies the rest
+STOCK_FIELDS = ("id", "is_active", "stock", "reserved_stock", "stock_shards")
+
+
 @transaction.atomic
-def create_order_from_cart(*, user, cart, address_data, payment_method):
+def create_order_from_cart(*, user, cart, address_data, payment_method, reservation_key=None, quote=None):
     """
     Creates an order and immutable order items.
-    Inventory is NOT locked here unless COD.
+    Stock is taken here: the cart's reservations (`reservation_key`)
+    turn into locked stock; unreserved units must not be held by
+    other carts.
+
+    `quote` (verified pricing_service quote) supplies prices, totals
+    and item snapshots; without one the locked rows are priced here.
+
+    Constant number of queries regardless of cart size.
     """
 
-    subtotal = Decimal("0.00")
-    order_items = []
+    quantities = pricing_service.cart_quantities(cart)
 
-    # Lock products to prevent oversell
-    for product_id, item in cart.items():
-        product = (
-            Product.objects
+    # Reservation rows are locked before products (same order as the
+    # cart and the expiry sweeper)
+    reservations = []
+    if reservation_key:
+        reservations = list(
+            StockReservation.objects
             .select_for_update()
-            .get(id=product_id, is_active=True)
+            .filter(cart_key=reservation_key, product_id__in=quantities)
+            .values_list("pk", "product_id", "quantity")
         )
-
-        qty = int(item.get("qty", 0))
-        if qty <= 0 or qty > product.stock:
+    held = {product_id: qty for _pk, product_id, qty in reservations}
+
+    # Lock every product in ONE query, always in id order, so two
+    # checkouts sharing products queue up instead of deadlocking.
+    # Hot products (stock shards) are not locked: their shard UPDATE
+    # is the guard, so they are read without a lock.
+    candidates = Product.objects.filter(id__in=quantities, is_active=True)
+    if quote is not None:
+        candidates = candidates.only(*STOCK_FIELDS)
+
+    products = list(
+        candidates
+        .select_for_update()
+        .filter(stock_shards=0)
+        .order_by("id")
+    )
+    if len(products) != len(quantities):
+        products = sorted(
+            products + list(candidates.filter(stock_shards__gt=0)),
+            key=lambda product: product.id,
+        )
+    if len(products) != len(quantities):
+        raise Product.DoesNotExist("Product unavailable")
+
+    hot = {
+        product.id: product.stock_shards
+        for product in products
+        if product.stock_shards
+    }
+
+    for product in products:
+        qty = quantities[product.id]
+        if product.id not in hot and qty > product.available_stock + held.get(product.id, 0):
             raise ValueError("Invalid quantity")
 
-        subtotal += product.price * qty
-        order_items.append((product, qty))
+    if quote is None:
+        quote = pricing_service.price(products, quantities, user=user)
 
     status = (
         Order.PAID if payment_method == "COD"
@@ -51,28 +100,46 @@ def create_order_from_cart(*, user, cart, address_data, payment_method):
         state=address_data["state"],
         pincode=address_data["pincode"],
         country=address_data.get("country", "India"),
-        subtotal=subtotal,
-        total_amount=subtotal,
-        currency="INR",
+        subtotal=Decimal(quote["subtotal"]),
+        shipping_charge=Decimal(quote["shipping"]),
+        tax=Decimal(quote["tax"]),
+        discount=Decimal(quote["discount"]),
+        total_amount=Decimal(quote["total"]),
+        currency=quote["currency"],
         status=status,
+        stock_locked=True,
     )
 
-    for product, qty in order_items:
-        OrderItem.objects.create(
+    # Items are written in product id order → later per-item
+    # locks (inventory) follow the same order
+    OrderItem.objects.bulk_create([
+        OrderItem(
             order=order,
-            product=product,
-            product_name=product.name,
-            product_sku=getattr(product, "sku", ""),
-            product_slug=product.slug,
-            product_image=product.image.url if product.image else "",
-            price=product.price,
-            quantity=qty,
+            product_id=line["product_id"],
+            product_name=line["name"],
+            product_sku=line["sku"],
+            product_slug=line["slug"],
+            product_image=line["image"],
+            price=Decimal(line["price"]),
+            quantity=line["qty"],
         )
+        for line in quote["lines"]
+    ])
+
+    # Rows are locked and checked above → one unguarded UPDATE
+    take_reserved_stock(quantities, held, hot=hot, order=order)
+    if reservations:
+        StockReservation.objects.filter(pk__in=[pk for pk, _, _ in reservations]).delete()
 
-    # Lock inventory immediately for COD orders
     if payment_method == "COD":
-        lock_inventory(order)
         order.transition(Order.PROCESSING)
+    else:
+        # Committed together with the order; run_worker creates the intent
+        outbox.enqueue(
+            PAYMENT_INTENT_JOB,
+            {"order_id": str(order.id)},
+            key=str(order.id),
+        )
 
     return order
 
@@ -80,42 +147,66 @@ def create_order_from_cart(*, user, cart, address_data, payment_method):
 # =====================================================
 # START STRIPE PAYMENT (IDEMPOTENT)
 # =====================================================
-@transaction.atomic
+# Commit-then-call: the gateway request never runs inside a
+# transaction, so a slow Stripe response cannot hold product or
+# order locks. Retrying is safe at any point: the idempotency key
+# makes Stripe return the same intent for the same order.
+def _payment_gateway():
+    if settings.PAYMENT_GATEWAY == "fake":
+        return fake_gateway.create_payment_intent
+    return create_payment_intent
+
+
 def start_online_payment(*, order):
     """
     Creates or reuses a Stripe PaymentIntent safely.
+    Must be called after the order is committed.
     """
 
-    payment = (
-        PaymentTransaction.objects
-        .select_for_update()
-        .filter(order=order, gateway="stripe")
-        .first()
-    )
+    if transaction.get_connection().in_atomic_block:
+        raise RuntimeError("start_online_payment must run outside a transaction")
 
-    if payment and payment.client_secret:
-        return payment
+    idempotency_key = f"order-{order.id}"
 
-    intent = create_payment_intent(
+    # 1) Short transaction: reserve the payment row
+    with transaction.atomic():
+        Order.objects.select_for_update().filter(pk=order.pk).first()
+
+        payment = (
+            PaymentTransaction.objects
+            .filter(order=order, gateway="stripe")
+            .first()
+        )
+        if payment and payment.client_secret:
+            return payment
+
+        if payment is None:
+            payment = PaymentTransaction.objects.create(
+                order=order,
+                gateway="stripe",
+                amount=order.total_amount,
+                currency=order.currency,
+                status=PaymentTransaction.CREATED,
+                idempotency_key=idempotency_key,
+            )
+
+    # 2) Network call, no locks held
+    intent = _payment_gateway()(
         order=order,
-        idempotency_key=f"order-{order.id}",
+        idempotency_key=idempotency_key,
     )
 
-    if payment is None:
-        payment = PaymentTransaction.objects.create(
-            order=order,
-            gateway="stripe",
-            intent_id=intent.id,
-            client_secret=intent.client_secret,
-            amount=order.total_amount,
-            currency=order.currency,
-            status=PaymentTransaction.CREATED,
-            idempotency_key=f"order-{order.id}",
+    # 3) Short transaction: record the intent
+    with transaction.atomic():
+        payment = (
+            PaymentTransaction.objects
+            .select_for_update()
+            .get(pk=payment.pk)
         )
-    else:
-        payment.intent_id = intent.id
-        payment.client_secret = intent.client_secret
-        payment.save(update_fields=["intent_id", "client_secret"])
+        if not payment.client_secret:
+            payment.intent_id = intent.id
+            payment.client_secret = intent.client_secret
+            payment.save(update_fields=["intent_id", "client_secret"])
 
     return payment
 
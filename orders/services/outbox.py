@@ -0,0 +1,216 @@
+import logging
+import random
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from orders.models import OutboxJob
+
+logger = logging.getLogger("orders.outbox")
+
+
+# =====================================================
+# TRANSACTIONAL OUTBOX
+# =====================================================
+# enqueue() inserts a job row in the caller's transaction: the side
+# effect exists if and only if the business change committed.
+# `manage.py run_worker` claims due jobs and runs their handler.
+#
+# Handlers live in `<app>/jobs.py` modules and register by name:
+#
+#   @outbox.handler("payments.create_intent")
+#   def create_intent(payload): ...
+#
+# Handlers must be idempotent: a job whose worker died mid-run is
+# claimed again once its lease expires.
+
+_handlers = {}
+
+
+def handler(name):
+    def register(func):
+        _handlers[name] = func
+        return func
+    return register
+
+
+def load_handlers() -> dict:
+    autodiscover_modules("jobs")
+    return _handlers
+
+
+def enqueue(name, payload=None, *, key="", delay=None, max_attempts=None) -> OutboxJob:
+    """
+    Add a job in the current transaction.
+    """
+    return OutboxJob.objects.create(
+        name=name,
+        key=key,
+        payload=payload or {},
+        run_after=timezone.now() + (delay or timedelta()),
+        max_attempts=max_attempts or settings.OUTBOX_MAX_ATTEMPTS,
+    )
+
+
+def has_pending(name, key, *, include_running=True) -> bool:
+    statuses = [OutboxJob.PENDING]
+    if include_running:
+        statuses.append(OutboxJob.RUNNING)
+
+    return OutboxJob.objects.filter(
+        name=name,
+        key=key,
+        status__in=statuses,
+    ).exists()
+
+
+# =====================================================
+# CLAIMING
+# =====================================================
+def claim(limit=10) -> list:
+    """
+    Atomically take up to `limit` due jobs for this worker.
+
+    Postgres: candidates are read with FOR UPDATE SKIP LOCKED, so
+    concurrent workers never wait on each other. SQLite has no row
+    locks: one UPDATE ... WHERE id IN (SELECT ... LIMIT n) takes the
+    database write lock up front, and re-checking the claimable
+    condition guarantees a job is handed to exactly one worker.
+    """
+    now = timezone.now()
+    lease_expired = now - timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+
+    # A job that takes its worker down (OOM, SIGKILL) never reaches the
+    # failure path of run_job: dead-letter it here once its lease has
+    # expired on the last attempt, instead of retrying it forever.
+    dead = OutboxJob.objects.filter(
+        status=OutboxJob.RUNNING,
+        locked_at__lt=lease_expired,
+        attempts__gte=F("max_attempts"),
+    ).update(
+        status=OutboxJob.DEAD,
+        locked_at=None,
+        last_error="Lease expired on the last attempt (worker died mid-run?)",
+        updated_at=now,
+    )
+    if dead:
+        logger.error("%s outbox job(s) lost their worker on the last attempt → dead letter", dead)
+
+    claimable = (
+        Q(status=OutboxJob.PENDING, run_after__lte=now) |
+        Q(
+            status=OutboxJob.RUNNING,
+            locked_at__lt=lease_expired,
+            attempts__lt=F("max_attempts"),
+        )
+    )
+    candidates = OutboxJob.objects.filter(claimable).order_by("run_after")
+    token = uuid.uuid4().hex
+
+    claimed = {
+        "status": OutboxJob.RUNNING,
+        "claim_token": token,
+        "locked_at": now,
+        "attempts": F("attempts") + 1,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(
+                candidates
+                .select_for_update(skip_locked=True)
+                .values_list("pk", flat=True)[:limit]
+            )
+            if not ids:
+                return []
+            OutboxJob.objects.filter(pk__in=ids).update(**claimed)
+    else:
+        count = OutboxJob.objects.filter(
+            claimable,
+            pk__in=candidates.values("pk")[:limit],
+        ).update(**claimed)
+        if not count:
+            return []
+
+    return list(OutboxJob.objects.filter(claim_token=token))
+
+
+# =====================================================
+# EXECUTION
+# =====================================================
+def backoff(attempts: int) -> timedelta:
+    """
+    Exponential backoff with jitter: base × 2^(attempts-1), capped.
+    """
+    seconds = min(
+        settings.OUTBOX_BACKOFF_BASE * 2 ** max(attempts - 1, 0),
+        settings.OUTBOX_BACKOFF_MAX,
+    )
+    return timedelta(seconds=seconds * random.uniform(0.8, 1.2))
+
+
+def run_job(job) -> bool:
+    """
+    Execute one claimed job. Returns True on success.
+    """
+    func = _handlers.get(job.name)
+
+    try:
+        if func is None:
+            raise LookupError(f"No outbox handler registered for {job.name!r}")
+        func(job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        dead = job.attempts >= job.max_attempts
+
+        OutboxJob.objects.filter(pk=job.pk, claim_token=job.claim_token).update(
+            status=OutboxJob.DEAD if dead else OutboxJob.PENDING,
+            run_after=timezone.now() + backoff(job.attempts),
+            last_error=error[-5_000:],
+            locked_at=None,
+            updated_at=timezone.now(),
+        )
+        logger.error(
+            "Outbox job %s (%s) failed, attempt %s/%s%s",
+            job.pk, job.name, job.attempts, job.max_attempts,
+            " → dead letter" if dead else "",
+        )
+        return False
+
+    OutboxJob.objects.filter(pk=job.pk, claim_token=job.claim_token).update(
+        status=OutboxJob.DONE,
+        locked_at=None,
+        last_error="",
+        updated_at=timezone.now(),
+    )
+    return True
+
+
+def retry_dead(queryset) -> int:
+    """
+    Move dead-lettered jobs back to the queue with fresh attempts.
+    """
+    return queryset.filter(status=OutboxJob.DEAD).update(
+        status=OutboxJob.PENDING,
+        attempts=0,
+        run_after=timezone.now(),
+        updated_at=timezone.now(),
+    )
+
+
+def prune(*, days=None) -> int:
+    """
+    Delete finished jobs older than the retention window.
+    """
+    days = settings.OUTBOX_RETENTION_DAYS if days is None else days
+    deleted, _ = OutboxJob.objects.filter(
+        status=OutboxJob.DONE,
+        updated_at__lt=timezone.now() - timedelta(days=days),
+    ).delete()
+    return deleted
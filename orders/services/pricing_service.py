@@ -0,0 +1,144 @@
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.conf import settings
+from django.core import signing
+
+from pages.models import Product
+
+
+QUOTE_SALT = "orders.quote"
+
+CENT = Decimal("0.01")
+
+
+# =====================================================
+# CART → QUANTITIES
+# =====================================================
+def cart_quantities(cart) -> dict:
+    """
+    {int product_id: qty} from the session cart.
+    """
+    try:
+        quantities = {
+            int(product_id): int(item.get("qty", 0))
+            for product_id, item in cart.items()
+        }
+    except (TypeError, ValueError, AttributeError):
+        raise ValueError("Invalid cart")
+
+    if any(qty <= 0 for qty in quantities.values()):
+        raise ValueError("Invalid quantity")
+
+    return quantities
+
+
+# =====================================================
+# PRICING
+# =====================================================
+def _money(value) -> Decimal:
+    return Decimal(value).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def _charges(subtotal: Decimal) -> dict:
+    threshold = settings.FREE_SHIPPING_THRESHOLD
+    shipping = (
+        Decimal("0.00") if threshold is not None and subtotal >= threshold
+        else settings.SHIPPING_CHARGE
+    )
+    discount = Decimal("0.00")
+    tax = _money((subtotal - discount) * settings.TAX_RATE)
+    return {
+        "shipping": _money(shipping),
+        "tax": tax,
+        "discount": discount,
+        "total": _money(subtotal - discount + shipping + tax),
+    }
+
+
+def price(products, quantities: dict, *, user) -> dict:
+    """
+    Quote for already-loaded products: line totals, subtotal,
+    shipping, tax, discount and total, computed once.
+    Money values are strings so the quote can be signed as JSON.
+    """
+    lines = []
+    subtotal = Decimal("0.00")
+
+    for product in sorted(products, key=lambda product: product.id):
+        qty = quantities[product.id]
+        line_total = product.price * qty
+        subtotal += line_total
+        lines.append({
+            "product_id": product.id,
+            "name": product.name,
+            "sku": getattr(product, "sku", ""),
+            "slug": product.slug,
+            "image": product.image.url if product.image else "",
+            "qty": qty,
+            "price": str(product.price),
+            "line_total": str(line_total),
+        })
+
+    charges = _charges(subtotal)
+
+    return {
+        "user": user.pk,
+        "currency": "INR",
+        "lines": lines,
+        "subtotal": str(subtotal),
+        **{key: str(value) for key, value in charges.items()},
+    }
+
+
+def quote_cart(cart, *, user):
+    """
+    Load every cart product in ONE query and price the cart.
+    Returns (quote, products). Raises Product.DoesNotExist /
+    ValueError like create_order_from_cart.
+    """
+    quantities = cart_quantities(cart)
+    products = list(
+        Product.objects
+        .filter(id__in=quantities, is_active=True)
+        .order_by("id")
+    )
+    if len(products) != len(quantities):
+        raise Product.DoesNotExist("Product unavailable")
+
+    return price(products, quantities, user=user), products
+
+
+# =====================================================
+# SIGNED QUOTES
+# =====================================================
+# The checkout page embeds the signed quote; create_order reuses it
+# instead of re-pricing, as long as it is fresh, belongs to the
+# user and still matches the cart line for line.
+def sign(quote: dict) -> str:
+    return signing.dumps(quote, salt=QUOTE_SALT, compress=True)
+
+
+def verify(token, *, user, cart):
+    """
+    The quote behind `token`, or None if it is stale, tampered,
+    someone else's, or no longer matches the cart.
+    """
+    if not token:
+        return None
+
+    try:
+        quote = signing.loads(
+            token,
+            salt=QUOTE_SALT,
+            max_age=settings.CHECKOUT_QUOTE_MAX_AGE,
+        )
+        quantities = cart_quantities(cart)
+    except (signing.BadSignature, ValueError):
+        return None
+
+    if quote.get("user") != user.pk:
+        return None
+    if {line["product_id"]: line["qty"] for line in quote["lines"]} != quantities:
+        return None
+
+    return quote
@@ -0,0 +1,223 @@
+from collections import Counter
+from datetime import timedelta
+from itertools import combinations
+
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from orders.models import (
+    FrequentlyBoughtTogether,
+    Order,
+    OrderItem,
+    ProductPairCount,
+    SyncCheckpoint,
+)
+from pages.models import ProductCard
+from pages.page_cache import invalidate_products
+
+
+CHECKPOINT_NAME = "copurchase"
+
+TOP_K = 8
+
+# Rows pulled per DB round-trip while streaming OrderItem
+CHUNK_SIZE = 5_000
+
+# Pairs held in memory before merging into ProductPairCount
+FLUSH_PAIRS = 50_000
+
+# Pairs per upsert statement (3 parameters each: stays under SQLite's
+# 999 bound-parameter limit)
+UPSERT_BATCH = 300
+
+# Orders younger than this may still change status → not counted yet
+SETTLE_DELAY = timedelta(hours=6)
+
+PURCHASED_STATUSES = (
+    Order.PAID,
+    Order.PROCESSING,
+    Order.SHIPPED,
+    Order.DELIVERED,
+)
+
+
+# =====================================================
+# CHECKPOINT
+# =====================================================
+def _load_checkpoint():
+    checkpoint, _ = SyncCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+    if not checkpoint.cursor:
+        return checkpoint, None, None
+
+    created_at, order_id = checkpoint.cursor.split("|", 1)
+    return checkpoint, parse_datetime(created_at), order_id
+
+
+def _save_checkpoint(checkpoint, created_at, order_id):
+    checkpoint.cursor = f"{created_at.isoformat()}|{order_id}"
+    checkpoint.save(update_fields=["cursor", "updated_at"])
+
+
+# =====================================================
+# STREAMING CO-OCCURRENCE
+# =====================================================
+def _stream_orders(since, since_order_id, until):
+    """
+    Yield (order_id, created_at, {product_ids}) for purchased
+    orders in (checkpoint, until], oldest first, streaming
+    OrderItem in chunks instead of loading it.
+    """
+    items = OrderItem.objects.filter(
+        order__status__in=PURCHASED_STATUSES,
+        order__created_at__lte=until,
+    )
+    if since is not None:
+        items = items.filter(
+            Q(order__created_at__gt=since) |
+            Q(order__created_at=since, order_id__gt=since_order_id)
+        )
+
+    rows = (
+        items
+        .order_by("order__created_at", "order_id")
+        .values_list("order_id", "order__created_at", "product_id")
+        .iterator(chunk_size=CHUNK_SIZE)
+    )
+
+    current_id, current_at, products = None, None, set()
+    for order_id, created_at, product_id in rows:
+        if order_id != current_id:
+            if current_id is not None:
+                yield current_id, current_at, products
+            current_id, current_at, products = order_id, created_at, set()
+        products.add(product_id)
+
+    if current_id is not None:
+        yield current_id, current_at, products
+
+
+def _add_pair_counts(pairs: Counter) -> None:
+    """
+    Add counts to ProductPairCount in place: an upsert that adds to the
+    stored value, so nothing is read back (SQLite ≥ 3.24 / Postgres).
+    """
+    table = connection.ops.quote_name(ProductPairCount._meta.db_table)
+    items = list(pairs.items())
+
+    with connection.cursor() as cursor:
+        for start in range(0, len(items), UPSERT_BATCH):
+            batch = items[start:start + UPSERT_BATCH]
+            cursor.execute(
+                f"INSERT INTO {table} (product_id, other_id, orders) "
+                f"VALUES {', '.join(['(%s, %s, %s)'] * len(batch))} "
+                f"ON CONFLICT (product_id, other_id) "
+                f"DO UPDATE SET orders = {table}.orders + excluded.orders",
+                [value for (a, b), count in batch for value in (a, b, count)],
+            )
+
+
+@transaction.atomic
+def _flush(pairs: Counter, checkpoint, last_order) -> set:
+    """
+    Merge in-memory pair counts into ProductPairCount and
+    advance the checkpoint in the same transaction.
+    Returns the touched product ids.
+    """
+    _add_pair_counts(pairs)
+
+    if last_order:
+        _save_checkpoint(checkpoint, last_order[1], last_order[0])
+
+    return {a for a, _b in pairs}
+
+
+def refresh_copurchases(*, now=None) -> dict:
+    """
+    Incrementally count co-purchases of orders placed since the last
+    run, then refresh the top-K table of every touched product.
+    Memory is bounded by FLUSH_PAIRS, not by the number of orders.
+    """
+    now = now or timezone.now()
+    checkpoint, since, since_order_id = _load_checkpoint()
+
+    pairs = Counter()
+    touched = set()
+    orders = 0
+    last_order = None
+
+    for order_id, created_at, products in _stream_orders(
+        since, since_order_id, now - SETTLE_DELAY
+    ):
+        for a, b in combinations(sorted(products), 2):
+            pairs[(a, b)] += 1
+            pairs[(b, a)] += 1
+
+        orders += 1
+        last_order = (order_id, created_at)
+
+        if len(pairs) >= FLUSH_PAIRS:
+            touched |= _flush(pairs, checkpoint, last_order)
+            pairs.clear()
+
+    touched |= _flush(pairs, checkpoint, last_order)
+    refresh_top_k(touched)
+
+    return {"orders": orders, "products": len(touched)}
+
+
+# =====================================================
+# TOP-K TABLE
+# =====================================================
+def refresh_top_k(product_ids) -> None:
+    product_ids = list(product_ids)
+
+    for start in range(0, len(product_ids), 500):
+        batch = product_ids[start:start + 500]
+
+        with transaction.atomic():
+            FrequentlyBoughtTogether.objects.filter(product_id__in=batch).delete()
+
+            entries = []
+            for product_id in batch:
+                top = (
+                    ProductPairCount.objects
+                    .filter(
+                        product_id=product_id,
+                        other_id__in=ProductCard.objects.values("pk"),
+                    )
+                    .order_by("-orders", "other_id")
+                    .values_list("other_id", "orders")[:TOP_K]
+                )
+                entries.extend(
+                    FrequentlyBoughtTogether(
+                        product_id=product_id,
+                        recommended_id=other_id,
+                        orders=count,
+                        rank=rank,
+                    )
+                    for rank, (other_id, count) in enumerate(top, start=1)
+                )
+
+            FrequentlyBoughtTogether.objects.bulk_create(entries)
+
+            # Product pages render this list
+            invalidate_products(batch, stock_only=True)
+
+
+# =====================================================
+# READ HELPERS
+# =====================================================
+def bought_together_for_products(product_ids, limit=4):
+    """
+    Cards most often bought with any of the given products
+    (e.g. a cart), excluding the products themselves. One query.
+    """
+    return (
+        ProductCard.objects
+        .filter(bought_with__product_id__in=product_ids, is_active=True)
+        .exclude(pk__in=product_ids)
+        .annotate(together=Sum("bought_with__orders"))
+        .order_by("-together")[:limit]
+    )
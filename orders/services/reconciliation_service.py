@@ -0,0 +1,181 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.db import transaction
+
+from orders.models import Order, PaymentTransaction, SyncCheckpoint
+from orders.services.stripe import (
+    handle_payment_intent_failed,
+    handle_payment_intent_succeeded,
+    list_payment_intents,
+)
+
+logger = logging.getLogger("payments.reconcile")
+
+
+CHECKPOINT_NAME = "stripe-payment-intents"
+
+# First run (no checkpoint) looks back this far
+INITIAL_WINDOW_HOURS = 24 * 7
+
+
+# =====================================================
+# CHECKPOINT
+# =====================================================
+# cursor JSON:
+#   watermark  newest intent `created` seen by a finished run
+#   window     lower `created` bound of the run in progress
+#   after      last intent id of the last finished page (resume point)
+#   newest     newest `created` seen by the run in progress
+def _load():
+    checkpoint, _ = SyncCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+    state = json.loads(checkpoint.cursor) if checkpoint.cursor else {}
+    return checkpoint, state
+
+
+def _save(checkpoint, state):
+    checkpoint.cursor = json.dumps(state, separators=(",", ":"))
+    checkpoint.save(update_fields=["cursor", "updated_at"])
+
+
+# =====================================================
+# DIFF ONE PAGE
+# =====================================================
+def _is_pending(payment) -> bool:
+    return (
+        payment.status != PaymentTransaction.SUCCESS
+        and payment.order.status == Order.PAYMENT_PENDING
+    )
+
+
+def reconcile_page(intents, *, dry_run=False) -> dict:
+    """
+    Compare one page of gateway intents with PaymentTransaction
+    (one IN query) and apply missed terminal states through the
+    webhook handlers. Only terminal states are applied: `succeeded`
+    and `canceled`; a failed attempt can still be retried by the
+    customer on the same intent.
+    """
+    stats = {"seen": len(intents), "succeeded": 0, "canceled": 0, "unknown": 0}
+    if not intents:
+        return stats
+
+    payments = {
+        payment.intent_id: payment
+        for payment in (
+            PaymentTransaction.objects
+            .filter(gateway="stripe", intent_id__in=[i.id for i in intents])
+            .select_related("order")
+        )
+    }
+
+    # Intent created but its id never recorded (crash between the
+    # gateway call and the save) → match by order, one more query
+    orphans = {
+        intent.metadata.get("order_id"): intent
+        for intent in intents
+        if intent.id not in payments and intent.metadata.get("order_id")
+    }
+    if orphans:
+        for payment in (
+            PaymentTransaction.objects
+            .filter(gateway="stripe", intent_id="", order_id__in=list(orphans))
+            .select_related("order")
+        ):
+            intent = orphans[str(payment.order_id)]
+            if not dry_run:
+                PaymentTransaction.objects.filter(pk=payment.pk, intent_id="").update(
+                    intent_id=intent.id,
+                    client_secret=intent.get("client_secret") or "",
+                )
+            payment.intent_id = intent.id
+            payments[intent.id] = payment
+
+    for intent in intents:
+        payment = payments.get(intent.id)
+        if payment is None:
+            stats["unknown"] += 1
+            continue
+
+        if intent.status not in ("succeeded", "canceled") or not _is_pending(payment):
+            continue
+
+        stats[intent.status] += 1
+        if dry_run:
+            continue
+
+        with transaction.atomic():
+            if intent.status == "succeeded":
+                handle_payment_intent_succeeded(intent=intent)
+            else:
+                handle_payment_intent_failed(intent=intent)
+
+        logger.warning(
+            "Reconciled missed %s for order %s",
+            intent.status, payment.order_id,
+        )
+
+    return stats
+
+
+# =====================================================
+# INCREMENTAL RUN
+# =====================================================
+def reconcile_payments(*, page_size=100, max_pages=None, dry_run=False, on_page=None) -> dict:
+    """
+    Page through intents created since (watermark - lookback),
+    newest first, checkpointing after every page so an interrupted
+    run resumes where it stopped.
+    """
+    checkpoint, state = _load()
+
+    if not state.get("window"):
+        now = int(time.time())
+        watermark = state.get("watermark")
+        state["window"] = (
+            watermark - settings.RECONCILE_LOOKBACK_HOURS * 3600
+            if watermark else now - INITIAL_WINDOW_HOURS * 3600
+        )
+        state["after"] = None
+        state["newest"] = watermark or 0
+
+    totals = {"pages": 0, "seen": 0, "succeeded": 0, "canceled": 0, "unknown": 0}
+
+    while max_pages is None or totals["pages"] < max_pages:
+        page = list_payment_intents(
+            created_gte=state["window"],
+            starting_after=state["after"],
+            limit=page_size,
+        )
+        intents = list(page.data)
+
+        stats = reconcile_page(intents, dry_run=dry_run)
+        totals["pages"] += 1
+        for key in ("seen", "succeeded", "canceled", "unknown"):
+            totals[key] += stats[key]
+        if on_page:
+            on_page(totals["pages"], stats)
+
+        if intents:
+            state["after"] = intents[-1].id
+            state["newest"] = max(state["newest"], max(i.created for i in intents))
+
+        if not page.has_more or not intents:
+            # Run complete → next run starts from the new watermark
+            state = {"watermark": state["newest"] or state.get("watermark")}
+            if not dry_run:
+                _save(checkpoint, state)
+            totals["complete"] = True
+            return totals
+
+        if not dry_run:
+            _save(checkpoint, state)
+
+    totals["complete"] = False
+    return totals
+
+
+def reset_checkpoint() -> None:
+    SyncCheckpoint.objects.filter(name=CHECKPOINT_NAME).delete()
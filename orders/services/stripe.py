@@ -10,6 +10,8 @@ from orders.services.inventory_service import lock_inventory, restore_inventory
 logger = logging.getLogger("payments.stripe")
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
+if settings.STRIPE_API_BASE:
+    stripe.api_base = settings.STRIPE_API_BASE
 
 
 # ======================================================
@@ -63,6 +65,26 @@ def retrieve_payment_intent(intent_id):
     return stripe.PaymentIntent.retrieve(intent_id)
 
 
+# ======================================================
+# CANCEL INTENT (EXPIRED ORDERS)
+# ======================================================
+def cancel_payment_intent(intent_id):
+    return stripe.PaymentIntent.cancel(intent_id)
+
+
+# ======================================================
+# LIST INTENTS (RECONCILIATION)
+# ======================================================
+def list_payment_intents(*, created_gte, starting_after=None, limit=100):
+    """
+    One page of PaymentIntents, newest first.
+    """
+    params = {"limit": limit, "created": {"gte": created_gte}}
+    if starting_after:
+        params["starting_after"] = starting_after
+    return stripe.PaymentIntent.list(**params)
+
+
 # ======================================================
 # WEBHOOK EVENT HANDLERS (IDEMPOTENT)
 # ======================================================
@@ -0,0 +1,185 @@
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.shortcuts import redirect
+from django.utils import timezone
+
+from orders.models import CheckoutTicket, SyncCheckpoint
+
+
+CHECKPOINT_NAME = "checkout-waiting-room"
+SESSION_KEY = "checkout_ticket"
+
+# One admission pass per node per second is plenty
+ADMIT_THROTTLE_KEY = "waiting-room:admit"
+
+# A waiting shopper who stopped polling this long ago is skipped
+ABANDONED_SECONDS = 30
+LAST_SEEN_RESOLUTION = timedelta(seconds=10)
+
+
+# =====================================================
+# CHECKOUT WAITING ROOM
+# =====================================================
+# At most WAITING_ROOM_CAPACITY shoppers (all web nodes together)
+# hold an admission lease for checkout / create_order at a time.
+# Everyone else gets a ticket and polls a cheap status endpoint:
+# one primary-key read per poll, plus at most one admission pass
+# per node per second. State lives in the database, so every node
+# sees the same queue. Capacity 0 turns the waiting room off.
+def enabled() -> bool:
+    return settings.WAITING_ROOM_CAPACITY > 0
+
+
+def current_ticket(request):
+    ticket_id = request.session.get(SESSION_KEY)
+    if not ticket_id:
+        return None
+    return CheckoutTicket.objects.filter(pk=ticket_id, user=request.user).first()
+
+
+def enter(request) -> CheckoutTicket:
+    ticket = CheckoutTicket.objects.create(user=request.user)
+    request.session[SESSION_KEY] = ticket.pk
+    return ticket
+
+
+def release(request) -> None:
+    """
+    Checkout finished: free the slot for the next shopper.
+    """
+    ticket_id = request.session.pop(SESSION_KEY, None)
+    if ticket_id:
+        CheckoutTicket.objects.filter(pk=ticket_id).update(status=CheckoutTicket.DONE)
+
+
+def admit() -> int:
+    """
+    Admit the oldest live waiters into free slots.
+    Serialized across nodes by a lock on one checkpoint row.
+    Returns the number admitted.
+    """
+    now = timezone.now()
+    SyncCheckpoint.objects.get_or_create(name=CHECKPOINT_NAME)
+
+    with transaction.atomic():
+        checkpoint = SyncCheckpoint.objects.select_for_update().get(name=CHECKPOINT_NAME)
+
+        CheckoutTicket.objects.filter(
+            status=CheckoutTicket.ADMITTED,
+            expires_at__lte=now,
+        ).update(status=CheckoutTicket.DONE)
+
+        active = CheckoutTicket.objects.filter(status=CheckoutTicket.ADMITTED).count()
+        free = settings.WAITING_ROOM_CAPACITY - active
+        if free <= 0:
+            return 0
+
+        ids = list(
+            CheckoutTicket.objects
+            .filter(
+                status=CheckoutTicket.WAITING,
+                last_seen__gte=now - timedelta(seconds=ABANDONED_SECONDS),
+            )
+            .order_by("id")
+            .values_list("pk", flat=True)[:free]
+        )
+        if not ids:
+            return 0
+
+        CheckoutTicket.objects.filter(pk__in=ids).update(
+            status=CheckoutTicket.ADMITTED,
+            expires_at=now + timedelta(seconds=settings.WAITING_ROOM_LEASE_SECONDS),
+        )
+        checkpoint.cursor = str(max(ids))
+        checkpoint.save(update_fields=["cursor", "updated_at"])
+
+    cache.set(f"{ADMIT_THROTTLE_KEY}:through", max(ids), 60)
+    return len(ids)
+
+
+def maybe_admit() -> None:
+    if cache.add(ADMIT_THROTTLE_KEY, True, timeout=1):
+        admit()
+
+
+def _admitted_through() -> int:
+    through = cache.get(f"{ADMIT_THROTTLE_KEY}:through")
+    if through is None:
+        cursor = (
+            SyncCheckpoint.objects
+            .filter(name=CHECKPOINT_NAME)
+            .values_list("cursor", flat=True)
+            .first()
+        )
+        through = int(cursor) if cursor else 0
+        cache.set(f"{ADMIT_THROTTLE_KEY}:through", through, 60)
+    return through
+
+
+def status(request) -> dict:
+    """
+    Poll payload for the waiting page.
+    """
+    ticket = current_ticket(request)
+    if ticket is None or ticket.status == CheckoutTicket.DONE:
+        ticket = enter(request)
+
+    if ticket.status == CheckoutTicket.WAITING:
+        now = timezone.now()
+        if ticket.last_seen < now - LAST_SEEN_RESOLUTION:
+            CheckoutTicket.objects.filter(pk=ticket.pk).update(last_seen=now)
+
+        maybe_admit()
+        ticket.refresh_from_db(fields=["status", "expires_at"])
+
+    if ticket.is_admitted:
+        return {"admitted": True}
+
+    return {
+        "admitted": False,
+        # Approximate: abandoned tickets ahead are skipped at admission
+        "ahead": max(ticket.pk - _admitted_through() - 1, 0),
+        "poll_seconds": settings.WAITING_ROOM_POLL_SECONDS,
+    }
+
+
+def admission_required(view):
+    """
+    Let the request through only with a live admission lease;
+    otherwise queue the shopper and send them to the waiting page.
+    Put it under @login_required.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not enabled():
+            return view(request, *args, **kwargs)
+
+        ticket = current_ticket(request)
+        if ticket is None or ticket.status == CheckoutTicket.DONE:
+            ticket = enter(request)
+
+        if not ticket.is_admitted and ticket.status == CheckoutTicket.WAITING:
+            # Quiet times: the first request is admitted straight away
+            maybe_admit()
+            ticket.refresh_from_db(fields=["status", "expires_at"])
+
+        if ticket.is_admitted:
+            return view(request, *args, **kwargs)
+
+        if ticket.status == CheckoutTicket.ADMITTED:
+            # Lease ran out before checkout finished → back of the line
+            ticket = enter(request)
+
+        return redirect("orders:waiting_room")
+
+    return wrapper
+
+
+def prune(days=1) -> int:
+    cutoff = timezone.now() - timedelta(days=days)
+    deleted, _ = CheckoutTicket.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
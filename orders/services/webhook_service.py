@@ -1,7 +1,49 @@
+import logging
+import time
+import traceback
+from datetime import datetime, timezone as dt_timezone
+
+import stripe
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models import F
 from django.utils import timezone
 
-from orders.models import WebhookEvent
+from orders.models import Order, WebhookEvent
+from orders.services.stripe import (
+    handle_payment_intent_failed,
+    handle_payment_intent_succeeded,
+)
+
+logger = logging.getLogger("payments.webhooks")
+
+
+WEBHOOK_DRAIN_JOB = "webhooks.drain"
+
+
+def _event_order_id(event):
+    """
+    Order referenced by a payment_intent event, if it exists.
+    """
+    data = event.get("data") or {}
+    metadata = (data.get("object") or {}).get("metadata") or {}
+    order_id = metadata.get("order_id")
+    if not order_id:
+        return None
+
+    try:
+        return Order.objects.filter(pk=order_id).values_list("pk", flat=True).first()
+    except ValidationError:
+        # Not a valid UUID
+        return None
+
+
+def _event_created(event):
+    created = event.get("created")
+    if not created:
+        return None
+    return datetime.fromtimestamp(int(created), tz=dt_timezone.utc)
 
 
 @transaction.atomic
@@ -18,6 +60,8 @@ def record_webhook_event(*, event):
             "event_type": event["type"],
             "payload": event,
             "processed": False,
+            "order_id": _event_order_id(event),
+            "event_created": _event_created(event),
         },
     )
     return webhook
@@ -41,3 +85,184 @@ def mark_webhook_processed(*, webhook):
     webhook.processed = True
     webhook.processed_at = timezone.now()
     webhook.save(update_fields=["processed", "processed_at"])
+
+
+def process_webhook_event(*, webhook_id, force=False):
+    """
+    Apply one recorded Stripe event.
+    Safe to run more than once; `force` re-applies processed events
+    (handlers are idempotent).
+    """
+    with transaction.atomic():
+        webhook = (
+            WebhookEvent.objects
+            .select_for_update()
+            .filter(pk=webhook_id)
+            .first()
+        )
+        if webhook is None or (webhook.processed and not force):
+            return
+
+        event = stripe.Event.construct_from(webhook.payload, stripe.api_key)
+        intent = event.data.object
+
+        if event.type == "payment_intent.succeeded":
+            handle_payment_intent_succeeded(intent=intent)
+
+        elif event.type in ("payment_intent.payment_failed", "payment_intent.canceled"):
+            handle_payment_intent_failed(intent=intent)
+
+        mark_webhook_processed(webhook=webhook)
+
+
+# =====================================================
+# BATCH PROCESSOR
+# =====================================================
+# The webhook endpoint only verifies and records events. Unprocessed
+# events are drained here in batches: events of the same order are
+# applied in Stripe's creation order, and a failing event holds back
+# the later events of its order for the rest of the drain (in any
+# later batch too) so a "succeeded" is never applied before an
+# earlier "failed".
+def pending_events():
+    return WebhookEvent.objects.filter(
+        processed=False,
+        attempts__lt=settings.WEBHOOK_MAX_ATTEMPTS,
+    )
+
+
+def _group_by_order(events) -> list:
+    """
+    [[events of one order, oldest first], ...] in arrival order.
+    Events without an order are independent groups.
+    """
+    groups = {}
+    for event in events:
+        key = event.order_id or event.pk
+        groups.setdefault(key, []).append(event)
+
+    for group in groups.values():
+        group.sort(key=lambda e: (e.event_created or e.received_at, e.received_at))
+
+    return list(groups.values())
+
+
+def record_failure(webhook):
+    WebhookEvent.objects.filter(pk=webhook.pk).update(
+        attempts=F("attempts") + 1,
+        last_error=traceback.format_exc()[-5_000:],
+    )
+
+
+def process_webhook_batch(*, batch_size=None, skip=None, failed_orders=None) -> dict:
+    """
+    Drain up to `batch_size` pending events.
+    Returns throughput and lag metrics for the batch.
+
+    `skip` (event ids) and `failed_orders` (order ids) exclude events
+    that failed during this drain and every event of their orders;
+    failures here are added to them.
+    """
+    batch_size = batch_size or settings.WEBHOOK_BATCH_SIZE
+    skip = set() if skip is None else skip
+    failed_orders = set() if failed_orders is None else failed_orders
+    started = time.perf_counter()
+
+    events = list(
+        pending_events()
+        .exclude(pk__in=skip)
+        .exclude(order_id__in=failed_orders)
+        .order_by("received_at")
+        .only("pk", "order_id", "event_created", "received_at")[:batch_size]
+    )
+
+    processed = failed = held_back = 0
+    lags = []
+
+    for group in _group_by_order(events):
+        for position, webhook in enumerate(group):
+            try:
+                process_webhook_event(webhook_id=webhook.pk)
+            except Exception:
+                logger.exception("Webhook %s failed", webhook.pk)
+                record_failure(webhook)
+                failed += 1
+                held_back += len(group) - position - 1
+                skip.add(webhook.pk)
+                if webhook.order_id:
+                    failed_orders.add(webhook.order_id)
+                break
+
+            processed += 1
+            lags.append((timezone.now() - webhook.received_at).total_seconds())
+
+    seconds = time.perf_counter() - started
+    stats = {
+        "processed": processed,
+        "failed": failed,
+        "held_back": held_back,
+        "orders": len({e.order_id for e in events if e.order_id}),
+        "seconds": round(seconds, 3),
+        "events_per_second": round(processed / seconds, 1) if seconds and processed else 0.0,
+        "lag_avg_seconds": round(sum(lags) / len(lags), 3) if lags else 0.0,
+        "lag_max_seconds": round(max(lags), 3) if lags else 0.0,
+    }
+
+    if events:
+        logger.info("Webhook batch processed", extra=stats)
+
+    return stats
+
+
+def backlog_metrics() -> dict:
+    """
+    Size and age of the unprocessed backlog.
+    """
+    oldest = (
+        pending_events()
+        .order_by("received_at")
+        .values_list("received_at", flat=True)
+        .first()
+    )
+    return {
+        "backlog": pending_events().count(),
+        "oldest_pending_seconds": (
+            round((timezone.now() - oldest).total_seconds(), 3) if oldest else 0.0
+        ),
+        "dead": WebhookEvent.objects.filter(
+            processed=False,
+            attempts__gte=settings.WEBHOOK_MAX_ATTEMPTS,
+        ).count(),
+    }
+
+
+def drain_webhooks(*, batch_size=None, max_batches=None) -> dict:
+    """
+    Process batches until the backlog is empty; summed metrics.
+    """
+    totals = {"processed": 0, "failed": 0, "batches": 0, "seconds": 0.0, "lag_max_seconds": 0.0}
+    skip, failed_orders = set(), set()
+
+    while max_batches is None or totals["batches"] < max_batches:
+        stats = process_webhook_batch(batch_size=batch_size, skip=skip, failed_orders=failed_orders)
+        if not stats["processed"] and not stats["failed"]:
+            break
+
+        totals["batches"] += 1
+        totals["processed"] += stats["processed"]
+        totals["failed"] += stats["failed"]
+        totals["seconds"] += stats["seconds"]
+        totals["lag_max_seconds"] = max(totals["lag_max_seconds"], stats["lag_max_seconds"])
+
+    # Events of failed orders left for the next drain
+    totals["held_back"] = (
+        pending_events()
+        .filter(order_id__in=failed_orders)
+        .exclude(pk__in=skip)
+        .count()
+    )
+    totals["seconds"] = round(totals["seconds"], 3)
+    totals["events_per_second"] = (
+        round(totals["processed"] / totals["seconds"], 1) if totals["seconds"] else 0.0
+    )
+    return totals
@@ -1,3 +1,404 @@
-from django.test import TestCase
+import random
+import threading
+from collections import Counter
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DatabaseError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from orders.models import (
+    InventoryMovement,
+    InventorySnapshot,
+    Order,
+    OrderItem,
+    OutboxJob,
+    WebhookEvent,
+)
+from orders.services import (
+    inventory_service,
+    ledger_service,
+    outbox,
+    pricing_service,
+    webhook_service,
+)
+from orders.services.order_service import create_order_from_cart
+from pages.models import Collection, Product
+
+from .management.commands.bench_checkout import ADDRESS
+
+
+def _products(*stocks, slug="test"):
+    collection = Collection.objects.create(name=slug.title(), slug=slug)
+    return [
+        Product.objects.create(
+            collection=collection,
+            name=f"{slug.title()} product {i}",
+            slug=f"{slug}-{i}",
+            price=Decimal("499.00"),
+            stock=stock,
+        )
+        for i, stock in enumerate(stocks)
+    ]
+
+
+def _order(user, lines, **fields):
+    """
+    Order with `lines` ({product: qty}) and nothing applied to stock.
+    """
+    order = Order.objects.create(
+        user=user,
+        subtotal=Decimal("0.00"),
+        total_amount=Decimal("0.00"),
+        **{**ADDRESS, **fields},
+    )
+    OrderItem.objects.bulk_create([
+        OrderItem(
+            order=order,
+            product=product,
+            product_name=product.name,
+            product_sku=product.slug,
+            product_slug=product.slug,
+            price=product.price,
+            quantity=qty,
+        )
+        for product, qty in lines.items()
+    ])
+    return order
+
+
+def _stock(products) -> list:
+    stock = dict(Product.objects.filter(pk__in=[p.pk for p in products]).values_list("pk", "stock"))
+    return [stock[p.pk] for p in products]
+
+
+# =====================================================
+# GUARDED STOCK UPDATES
+# =====================================================
+class OrderInventoryTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="inventory")
+
+    def test_lock_takes_every_line_once(self):
+        a, b = _products(5, 3)
+        order = _order(self.user, {a: 2, b: 3})
+
+        inventory_service.lock_inventory(order)
+        inventory_service.lock_inventory(order)
+
+        self.assertEqual(_stock([a, b]), [3, 0])
+        self.assertTrue(Order.objects.get(pk=order.pk).stock_locked)
+        self.assertEqual(
+            sorted(InventoryMovement.objects.filter(order=order).values_list("delta", "reason")),
+            [(-3, InventoryMovement.SALE), (-2, InventoryMovement.SALE)],
+        )
+
+    def test_shortfall_applies_nothing(self):
+        a, b = _products(5, 1)
+        order = _order(self.user, {a: 2, b: 2})
+
+        with self.assertRaisesMessage(ValueError, b.name):
+            inventory_service.lock_inventory(order)
+
+        self.assertEqual(_stock([a, b]), [5, 1])
+        self.assertFalse(Order.objects.get(pk=order.pk).stock_locked)
+        self.assertFalse(InventoryMovement.objects.filter(order=order).exists())
+
+    def test_restore_gives_back_once(self):
+        a, b = _products(5, 3)
+        order = _order(self.user, {a: 2, b: 1})
+        inventory_service.lock_inventory(order)
+
+        inventory_service.restore_inventory(order)
+        inventory_service.restore_inventory(order)
+
+        self.assertEqual(_stock([a, b]), [5, 3])
+        self.assertEqual(
+            InventoryMovement.objects
+            .filter(order=order, reason=InventoryMovement.RESTORE)
+            .count(),
+            2,
+        )
+
+
+# =====================================================
+# SIGNED QUOTES
+# =====================================================
+class PricingQuoteTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username="quote")
+        self.a, self.b = _products(5, 5, slug="quote")
+        self.cart = {
+            str(self.a.pk): {"qty": 2, "price": "499.00"},
+            str(self.b.pk): {"qty": 1, "price": "499.00"},
+        }
+        self.quote, _loaded = pricing_service.quote_cart(self.cart, user=self.user)
+        self.token = pricing_service.sign(self.quote)
+
+    def test_verify_returns_the_signed_quote(self):
+        quote = pricing_service.verify(self.token, user=self.user, cart=self.cart)
+
+        self.assertEqual(quote, self.quote)
+        self.assertEqual(quote["subtotal"], "1497.00")
+        self.assertEqual([line["qty"] for line in quote["lines"]], [2, 1])
+
+    def test_verify_rejects_tampered_token(self):
+        self.assertIsNone(pricing_service.verify(self.token[:-2] + "xx", user=self.user, cart=self.cart))
+        self.assertIsNone(pricing_service.verify("", user=self.user, cart=self.cart))
+
+    def test_verify_rejects_other_user(self):
+        other = get_user_model().objects.create_user(username="other")
+        self.assertIsNone(pricing_service.verify(self.token, user=other, cart=self.cart))
+
+    def test_verify_rejects_changed_cart(self):
+        changed = {**self.cart, str(self.b.pk): {"qty": 2, "price": "499.00"}}
+        smaller = {str(self.a.pk): self.cart[str(self.a.pk)]}
+
+        self.assertIsNone(pricing_service.verify(self.token, user=self.user, cart=changed))
+        self.assertIsNone(pricing_service.verify(self.token, user=self.user, cart=smaller))
+
+    def test_verify_rejects_stale_quote(self):
+        with override_settings(CHECKOUT_QUOTE_MAX_AGE=-1):
+            self.assertIsNone(pricing_service.verify(self.token, user=self.user, cart=self.cart))
+
+    def test_checkout_uses_the_quote(self):
+        # Repriced after the quote was shown: the shopper pays the quote
+        Product.objects.filter(pk=self.a.pk).update(price=Decimal("999.00"))
+        quote = pricing_service.verify(self.token, user=self.user, cart=self.cart)
+
+        order = create_order_from_cart(
+            user=self.user,
+            cart=self.cart,
+            address_data=ADDRESS,
+            payment_method="COD",
+            quote=quote,
+        )
+
+        self.assertEqual(order.subtotal, Decimal(self.quote["subtotal"]))
+        self.assertEqual(order.total_amount, Decimal(self.quote["total"]))
+        self.assertEqual(
+            sorted(order.items.values_list("product_id", "price", "quantity")),
+            [(self.a.pk, Decimal("499.00"), 2), (self.b.pk, Decimal("499.00"), 1)],
+        )
+        self.assertEqual(_stock([self.a, self.b]), [3, 4])
+
+    def test_checkout_with_quote_still_checks_stock(self):
+        Product.objects.filter(pk=self.a.pk).update(stock=1)
+
+        with self.assertRaisesMessage(ValueError, "Invalid quantity"):
+            create_order_from_cart(
+                user=self.user,
+                cart=self.cart,
+                address_data=ADDRESS,
+                payment_method="COD",
+                quote=self.quote,
+            )
+        self.assertFalse(Order.objects.filter(user=self.user).exists())
+
+
+# =====================================================
+# LEDGER SNAPSHOTS
+# =====================================================
+class LedgerSnapshotTests(TestCase):
+    def setUp(self):
+        cache.delete(ledger_service.GAPS_KEY)
+        (self.product,) = _products(10, slug="ledger")
+        ledger_service.log_movements({self.product.pk: 10}, reason=InventoryMovement.RESTOCK)
+
+    def _pending_sale(self):
+        # An id taken by a transaction that has not committed yet
+        pending = InventoryMovement.objects.create(
+            product=self.product, delta=-2, reason=InventoryMovement.SALE,
+        )
+        InventoryMovement.objects.filter(pk=pending.pk).delete()
+        inventory_service.decrement_stock({self.product.pk: 1})
+        return pending
+
+    def _marks(self):
+        return list(
+            InventorySnapshot.objects
+            .filter(product=self.product)
+            .order_by("pk")
+            .values_list("movement_id", "stock")
+        )
+
+    @mock.patch.object(ledger_service, "_xid_horizon", return_value=None)
+    def test_late_commit_below_the_mark_is_counted(self, _horizon):
+        pending = self._pending_sale()
+
+        ledger_service.take_snapshots()
+        self.assertEqual(self._marks(), [(pending.pk - 1, 10)])
+
+        # The slow transaction commits
+        pending.save()
+        Product.objects.filter(pk=self.product.pk).update(stock=7)
+
+        ledger_service.take_snapshots()
+        self.assertEqual(self._marks()[-1], (pending.pk + 1, 7))
+        self.assertEqual(ledger_service.drift([self.product.pk]), [])
+
+    @mock.patch.object(ledger_service, "_xid_horizon", return_value=None)
+    def test_rolled_back_gap_is_given_up_on(self, _horizon):
+        pending = self._pending_sale()
+
+        ledger_service.take_snapshots()
+        with override_settings(LEDGER_GAP_SECONDS=-1):
+            ledger_service.take_snapshots()
+
+        self.assertEqual(self._marks()[-1], (pending.pk + 1, 9))
+
+    def test_gap_is_given_up_on_once_older_transactions_end(self):
+        pending = self._pending_sale()
+
+        with mock.patch.object(ledger_service, "_xid_horizon", return_value=(100, 105)):
+            ledger_service.take_snapshots()
+        self.assertEqual(self._marks()[-1][0], pending.pk - 1)
+
+        with mock.patch.object(ledger_service, "_xid_horizon", return_value=(104, 110)):
+            ledger_service.take_snapshots()
+        self.assertEqual(self._marks()[-1][0], pending.pk - 1)
+
+        with mock.patch.object(ledger_service, "_xid_horizon", return_value=(105, 110)):
+            ledger_service.take_snapshots()
+        self.assertEqual(self._marks()[-1], (pending.pk + 1, 9))
+
+
+# =====================================================
+# OUTBOX LEASES
+# =====================================================
+class OutboxClaimTests(TestCase):
+    def _running(self, attempts):
+        job = outbox.enqueue("tests.crash", max_attempts=3)
+        OutboxJob.objects.filter(pk=job.pk).update(
+            status=OutboxJob.RUNNING,
+            attempts=attempts,
+            locked_at=timezone.now() - timedelta(days=1),
+        )
+        return job
+
+    def test_expired_lease_is_claimed_again(self):
+        job = self._running(attempts=1)
+
+        self.assertEqual([claimed.pk for claimed in outbox.claim()], [job.pk])
+        self.assertEqual(OutboxJob.objects.get(pk=job.pk).attempts, 2)
+
+    def test_expired_lease_on_last_attempt_is_dead_lettered(self):
+        job = self._running(attempts=3)
+
+        self.assertEqual(outbox.claim(), [])
+        job.refresh_from_db()
+        self.assertEqual(job.status, OutboxJob.DEAD)
+        self.assertEqual(job.attempts, 3)
+
+
+# =====================================================
+# WEBHOOK DRAIN
+# =====================================================
+class WebhookDrainTests(TestCase):
+    def setUp(self):
+        user = get_user_model().objects.create_user(username="webhooks")
+        self.order = _order(user, {})
+        self.created = 1_700_000_000
+
+    def _record(self, event_type, order=None):
+        self.created += 1
+        metadata = {"order_id": str(order.pk)} if order else {}
+        return webhook_service.record_webhook_event(event={
+            "id": f"evt_{self.created}",
+            "type": event_type,
+            "created": self.created,
+            "data": {"object": {"id": "pi_test", "object": "payment_intent", "metadata": metadata}},
+        })
+
+    @mock.patch.object(webhook_service, "handle_payment_intent_succeeded")
+    @mock.patch.object(webhook_service, "handle_payment_intent_failed", side_effect=RuntimeError)
+    def test_failed_event_holds_back_its_order_across_batches(self, failed, succeeded):
+        failing = self._record("payment_intent.payment_failed", self.order)
+        later = self._record("payment_intent.succeeded", self.order)
+        other = self._record("payment_intent.succeeded")
+
+        stats = webhook_service.drain_webhooks(batch_size=1)
+
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(stats["held_back"], 1)
+        self.assertEqual(succeeded.call_count, 1)
+        processed = dict(WebhookEvent.objects.values_list("pk", "processed"))
+        self.assertEqual(
+            [processed[failing.pk], processed[later.pk], processed[other.pk]],
+            [False, False, True],
+        )
+
+
+# =====================================================
+# PARALLEL CHECKOUT
+# =====================================================
+# Same scenario as bench_checkout, kept small enough for CI. Needs a
+# test database threads can share (settings put SQLite's on disk).
+class ParallelCheckoutTests(TransactionTestCase):
+    WORKERS = 8
+    CHECKOUTS = 40
+    STOCK = 30
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("Threads cannot share an in-memory SQLite database.")
+
+        self.products = _products(*[self.STOCK] * 5, slug="checkout")
+        self.user = get_user_model().objects.create_user(username="checkout")
+
+    def _checkout(self, seed, outcomes, lock):
+        rng = random.Random(seed)
+        try:
+            for _ in range(self.CHECKOUTS // self.WORKERS):
+                # Shared products, shuffled line order per cart
+                lines = rng.sample(self.products, rng.randint(1, len(self.products)))
+                cart = {
+                    str(product.pk): {"qty": rng.randint(1, 3), "price": str(product.price)}
+                    for product in lines
+                }
+                try:
+                    create_order_from_cart(
+                        user=self.user,
+                        cart=cart,
+                        address_data=ADDRESS,
+                        payment_method="COD",
+                    )
+                    result = "ok"
+                except ValueError:
+                    result = "out_of_stock"
+                except DatabaseError as exc:
+                    result = f"db_error: {exc}"
+                with lock:
+                    outcomes[result] += 1
+        finally:
+            connection.close()
+
+    def test_no_deadlock_and_stock_is_conserved(self):
+        outcomes = Counter()
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(target=self._checkout, args=(seed, outcomes, lock))
+            for seed in range(self.WORKERS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        errors = {result: n for result, n in outcomes.items() if result.startswith("db_error")}
+        self.assertEqual(errors, {})
+        self.assertEqual(sum(outcomes.values()), self.CHECKOUTS)
+        self.assertGreater(outcomes["ok"], 0)
+
+        sold = Counter()
+        for order in Order.objects.filter(user=self.user, stock_locked=True).prefetch_related("items"):
+            for item in order.items.all():
+                sold[item.product_id] += item.quantity
+
+        for product in Product.objects.filter(pk__in=[p.pk for p in self.products]):
+            self.assertGreaterEqual(product.stock, 0)
+            self.assertEqual(product.stock, self.STOCK - sold[product.pk])
@@ -18,6 +18,16 @@ urlpatterns = [
         views.create_order,
         name="create_order",
     ),
+    path(
+        "waiting-room/",
+        views.waiting_room_page,
+        name="waiting_room",
+    ),
+    path(
+        "waiting-room/status/",
+        views.waiting_room_status,
+        name="waiting_room_status",
+    ),
 
     # ==================================================
     # PAYMENT FLOW (STRIPE)
@@ -1,72 +1,67 @@
-from decimal import Decimal
+import logging
 
 from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.db import transaction
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
+from django.utils import timezone
+from django.views.decorators.cache import never_cache
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_POST
+from django.views.decorators.http import require_GET, require_POST
 from orders.services.inventory_service import restore_inventory
 
 import stripe
 
+from cart.reservations import cart_key, held_quantities
 from pages.models import Product
 from orders.models import Order
+from orders.services import outbox, pricing_service, waiting_room
 from orders.services.order_service import (
+    PAYMENT_INTENT_JOB,
     create_order_from_cart,
     start_online_payment,
 )
-from orders.services.stripe import (
-    handle_payment_intent_succeeded,
-    handle_payment_intent_failed,
-)
 from orders.services.webhook_service import (
+    WEBHOOK_DRAIN_JOB,
     record_webhook_event,
-    mark_webhook_processed,
 )
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
 
+logger = logging.getLogger("payments.stripe")
+
 
 # =====================================================
 # CHECKOUT
 # =====================================================
 @login_required
+@waiting_room.admission_required
 def checkout(request):
-    cart = request.session.get("cart", {})
+    cart = request.cart
     if not cart:
         return redirect("cart:cart_detail")
 
-    items = []
-    subtotal = Decimal("0.00")
-
-    for pid, item in cart.items():
-        product = get_object_or_404(Product, id=pid, is_active=True)
+    # One product query; the signed quote is reused by create_order
+    try:
+        quote, products = pricing_service.quote_cart(cart, user=request.user)
+    except (Product.DoesNotExist, ValueError):
+        return redirect("cart:cart_detail")
 
-        qty = int(item.get("qty", 0))
-        if qty <= 0 or qty > product.stock:
+    held = held_quantities(cart_key(request.session, create=False))
+    quantities = {line["product_id"]: line["qty"] for line in quote["lines"]}
+    for product in products:
+        if quantities[product.id] > product.available_stock + held.get(product.id, 0):
             return redirect("cart:cart_detail")
 
-        price = product.price
-        line_total = price * qty
-        subtotal += line_total
-
-        items.append({
-            "product": product,
-            "quantity": qty,
-            "price": price,
-            "line_total": line_total,
-        })
-
     return render(
         request,
         "orders/checkout.html",
         {
-            "cart_items": items,
-            "cart_subtotal": subtotal,
-            "cart_total": subtotal,
+            "cart_items": quote["lines"],
+            "quote": quote,
+            "quote_token": pricing_service.sign(quote),
         },
     )
 
@@ -76,9 +71,9 @@ def checkout(request):
 # =====================================================
 @login_required
 @require_POST
-@transaction.atomic
+@waiting_room.admission_required
 def create_order(request):
-    cart = request.session.get("cart", {})
+    cart = request.cart
     if not cart:
         return redirect("cart:cart_detail")
 
@@ -99,18 +94,54 @@ def create_order(request):
             "country": "India",
         },
         payment_method=payment_method,
+        reservation_key=cart_key(request.session, create=False),
+        quote=pricing_service.verify(
+            request.POST.get("quote"),
+            user=request.user,
+            cart=cart,
+        ),
     )
 
-    request.session["cart"] = {}
-    request.session.modified = True
+    request.cart.clear()
+    waiting_room.release(request)
 
     if payment_method == "COD":
         return redirect("orders:order_success", order_id=order.id)
 
-    start_online_payment(order=order)
+    # The PaymentIntent is created by the outbox worker
     return redirect("orders:payment", order_id=order.id)
 
 
+# =====================================================
+# CHECKOUT WAITING ROOM
+# =====================================================
+@never_cache
+@login_required
+@require_GET
+def waiting_room_page(request):
+    if not waiting_room.enabled():
+        return redirect("orders:checkout")
+
+    state = waiting_room.status(request)
+    if state["admitted"]:
+        return redirect("orders:checkout")
+
+    return render(
+        request,
+        "orders/waiting_room.html",
+        {"ahead": state["ahead"], "poll_seconds": state["poll_seconds"]},
+    )
+
+
+@never_cache
+@login_required
+@require_GET
+def waiting_room_status(request):
+    if not waiting_room.enabled():
+        return JsonResponse({"admitted": True})
+    return JsonResponse(waiting_room.status(request))
+
+
 # =====================================================
 # PAYMENT PAGE
 # =====================================================
@@ -129,7 +160,25 @@ def payment(request, order_id):
     )
 
     if not payment or not payment.client_secret:
-        return redirect("orders:checkout")
+        # Worker has not created the intent yet → wait page that reloads
+        waited = (timezone.now() - order.created_at).total_seconds()
+        if (
+            waited < settings.PAYMENT_INTENT_WAIT_SECONDS
+            and outbox.has_pending(PAYMENT_INTENT_JOB, str(order.id))
+        ):
+            return render(
+                request,
+                "orders/payment.html",
+                {"order": order, "preparing": True},
+            )
+
+        # No worker picked it up in time: create it inline (idempotent)
+        try:
+            payment = start_online_payment(order=order)
+        except stripe.error.StripeError:
+            logger.exception("PaymentIntent creation failed for %s", order.id)
+            messages.error(request, "Payment is temporarily unavailable. Please try again.")
+            return redirect("orders:payment_failed", order_id=order.id)
 
     return render(
         request,
@@ -203,7 +252,6 @@ def cancel_order(request, order_id):
 # STRIPE WEBHOOK (SOURCE OF TRUTH)
 # =====================================================
 @csrf_exempt
-@transaction.atomic
 def stripe_webhook(request):
     payload = request.body
     sig_header = request.META.get("HTTP_STRIPE_SIGNATURE")
@@ -217,20 +265,14 @@ def stripe_webhook(request):
     except Exception:
         return HttpResponse(status=400)
 
-    webhook = record_webhook_event(event=event)
-    if webhook.processed:
-        return HttpResponse(status=200)
-
-    event_type = event["type"]
-    intent = event["data"]["object"]
-
-    if event_type == "payment_intent.succeeded":
-        handle_payment_intent_succeeded(intent=intent)
-
-    elif event_type in ("payment_intent.payment_failed", "payment_intent.canceled"):
-        handle_payment_intent_failed(intent=intent)
+    # Verify + persist only. One queued drain job covers a whole
+    # burst (a running drain may already be past this event, so only
+    # a *queued* one counts); the worker applies events in batches.
+    with transaction.atomic():
+        record_webhook_event(event=event)
+        if not outbox.has_pending(WEBHOOK_DRAIN_JOB, "drain", include_running=False):
+            outbox.enqueue(WEBHOOK_DRAIN_JOB, key="drain")
 
-    mark_webhook_processed(webhook=webhook)
     return HttpResponse(status=200)
 
 
@@ -1,10 +1,18 @@
+from django import forms
+from django.conf import settings
 from django.contrib import admin, messages
 from django.db import transaction
 from django.db.models import F
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
+from orders.models import InventoryMovement
+from orders.services.inventory_service import decrement_stock, increment_stock
+from orders.services.ledger_service import log_movements
+
+from . import stock_shards
 from .models import Collection, Product
+from .signals import notify_products_updated
 
 
 # =====================================================
@@ -57,13 +65,42 @@ class CollectionAdmin(admin.ModelAdmin):
 # =====================================================
 # PRODUCT ADMIN
 # =====================================================
+class ProductAdminForm(forms.ModelForm):
+    # Stock when the page was loaded: a stock edit is applied as the
+    # difference from it, so sales made meanwhile are kept
+    stock_seen = forms.IntegerField(required=False, widget=forms.HiddenInput)
+
+    class Meta:
+        model = Product
+        fields = "__all__"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk and not self.is_bound:
+            self.fields["stock_seen"].initial = self.instance.stock
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if self.instance.pk and "stock" in self.fields and cleaned_data.get("stock_seen") is None:
+            raise forms.ValidationError("This page is out of date, reload it before changing stock.")
+        return cleaned_data
+
+    def stock_delta(self) -> int:
+        if not self.instance.pk or "stock" not in self.cleaned_data:
+            return 0
+        return self.cleaned_data["stock"] - self.cleaned_data["stock_seen"]
+
+
 @admin.register(Product)
 class ProductAdmin(admin.ModelAdmin):
+    form = ProductAdminForm
+
     list_display = (
         "name",
         "collection",
         "price",
         "stock",
+        "stock_shards",
         "is_active",
         "is_featured",
         "image_preview",
@@ -97,7 +134,7 @@ class ProductAdmin(admin.ModelAdmin):
             "fields": ("collection", "name", "slug", "is_active", "is_featured"),
         }),
         (_("Pricing & Inventory"), {
-            "fields": ("price", "stock"),
+            "fields": ("price", "stock", "stock_seen"),
         }),
         (_("Description"), {
             "fields": ("description",),
@@ -139,11 +176,21 @@ class ProductAdmin(admin.ModelAdmin):
         "mark_featured",
         "mark_unfeatured",
         "increase_stock_by_10",
+        "enable_hot_mode",
+        "disable_hot_mode",
     ]
 
+    def _update_products(self, queryset, **fields) -> int:
+        # Ids first: on a changelist filtered by the updated field the
+        # queryset matches nothing afterwards
+        ids = list(queryset.values_list("pk", flat=True))
+        updated = Product.objects.filter(pk__in=ids).update(**fields)
+        notify_products_updated(ids)
+        return updated
+
     @admin.action(description="Mark selected products as active")
     def mark_active(self, request, queryset):
-        updated = queryset.update(is_active=True)
+        updated = self._update_products(queryset, is_active=True)
         self.message_user(
             request,
             f"{updated} products marked as active.",
@@ -152,7 +199,7 @@ class ProductAdmin(admin.ModelAdmin):
 
     @admin.action(description="Mark selected products as inactive")
     def mark_inactive(self, request, queryset):
-        updated = queryset.update(is_active=False)
+        updated = self._update_products(queryset, is_active=False)
         self.message_user(
             request,
             f"{updated} products marked as inactive.",
@@ -161,7 +208,7 @@ class ProductAdmin(admin.ModelAdmin):
 
     @admin.action(description="Mark selected products as featured")
     def mark_featured(self, request, queryset):
-        updated = queryset.update(is_featured=True)
+        updated = self._update_products(queryset, is_featured=True)
         self.message_user(
             request,
             f"{updated} products marked as featured.",
@@ -170,7 +217,7 @@ class ProductAdmin(admin.ModelAdmin):
 
     @admin.action(description="Remove featured flag")
     def mark_unfeatured(self, request, queryset):
-        updated = queryset.update(is_featured=False)
+        updated = self._update_products(queryset, is_featured=False)
         self.message_user(
             request,
             f"{updated} products unfeatured.",
@@ -184,7 +231,17 @@ class ProductAdmin(admin.ModelAdmin):
         Uses DB-level constraints as final guard.
         """
         with transaction.atomic():
-            updated = queryset.update(stock=F("stock") + 10)
+            ids = list(queryset.values_list("pk", flat=True))
+            plain_ids = list(queryset.filter(stock_shards=0).values_list("pk", flat=True))
+            updated = Product.objects.filter(pk__in=plain_ids).update(stock=F("stock") + 10)
+            notify_products_updated(plain_ids, stock_only=True)
+            for pk, shards in queryset.filter(stock_shards__gt=0).values_list("pk", "stock_shards"):
+                stock_shards.give(pk, 10, shards=shards)
+                updated += 1
+            log_movements(
+                {pk: 10 for pk in ids},
+                reason=InventoryMovement.RESTOCK,
+            )
 
         self.message_user(
             request,
@@ -192,6 +249,65 @@ class ProductAdmin(admin.ModelAdmin):
             level=messages.SUCCESS
         )
 
+    @admin.action(description="Enable hot-product mode (sharded stock)")
+    def enable_hot_mode(self, request, queryset):
+        for pk in queryset.values_list("pk", flat=True):
+            stock_shards.enable(pk, settings.HOT_PRODUCT_SHARDS)
+        self.message_user(
+            request,
+            f"Stock split across {settings.HOT_PRODUCT_SHARDS} shards "
+            f"for {queryset.count()} products.",
+            level=messages.SUCCESS
+        )
+
+    @admin.action(description="Disable hot-product mode")
+    def disable_hot_mode(self, request, queryset):
+        for pk in queryset.filter(stock_shards__gt=0).values_list("pk", flat=True):
+            stock_shards.disable(pk)
+        self.message_user(
+            request,
+            "Shard stock folded back into products.",
+            level=messages.INFO
+        )
+
+    # -------------------------
+    # LEDGER
+    # -------------------------
+    @transaction.atomic
+    def save_model(self, request, obj, form, change):
+        """
+        Direct stock edits are logged as adjustments. On an existing
+        product the stock counters are never written from the form: the
+        edit is applied as a delta from the stock the page was loaded
+        with, so checkouts made since then are kept.
+        """
+        if not change:
+            super().save_model(request, obj, form, change)
+            if obj.stock:
+                log_movements({obj.pk: obj.stock}, reason=InventoryMovement.ADJUSTMENT)
+            return
+
+        model_fields = {field.name for field in Product._meta.concrete_fields}
+        fields = [
+            name for name in form.cleaned_data
+            if name in model_fields and name not in ("stock", "reserved_stock")
+        ]
+        obj.save(update_fields=[*fields, "updated_at"])
+
+        delta = form.stock_delta()
+        try:
+            if delta > 0:
+                increment_stock({obj.pk: delta}, reason=InventoryMovement.ADJUSTMENT)
+            elif delta < 0:
+                decrement_stock({obj.pk: -delta}, reason=InventoryMovement.ADJUSTMENT)
+        except ValueError:
+            self.message_user(
+                request,
+                f"Stock not changed: cannot remove {-delta}, not enough left.",
+                level=messages.ERROR,
+            )
+        obj.refresh_from_db(fields=["stock", "reserved_stock"])
+
     # -------------------------
     # PERMISSION HARDENING
     # -------------------------
@@ -207,6 +323,7 @@ class ProductAdmin(admin.ModelAdmin):
         Prevent non-superusers from editing stock directly.
         """
         readonly = list(self.readonly_fields)
-        if not request.user.is_superuser:
+        # Hot products: stock is the sum of its shards
+        if not request.user.is_superuser or (obj and obj.stock_shards):
             readonly.append("stock")
         return readonly
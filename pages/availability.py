@@ -0,0 +1,133 @@
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from . import catalog_bus
+from .models import Product
+from .page_cache import CACHE_ALIAS
+
+
+# =====================================================
+# AVAILABILITY SNAPSHOT (IN-PROCESS)
+# =====================================================
+# Listing pages no longer bake stock into cached HTML; badges are
+# patched client-side from pages:availability, which answers from
+# this per-process snapshot instead of querying per request:
+#
+#   {product_id: "in" | "low" | "out"}
+#
+# Stock changes rotate a version key in the shared cache (after
+# commit). A process sees the new version on its next lookup and
+# rebuilds with one narrow query, at most once per REFRESH_SECONDS.
+# Product edits seen on catalog_bus (from any node) mark it stale too.
+# Unknown and inactive products are "out".
+
+IN_STOCK = "in"
+LOW_STOCK = "low"
+OUT_OF_STOCK = "out"
+
+VERSION_KEY = "catalog:availability:version"
+
+# Ids accepted by one availability request
+MAX_IDS = 200
+
+_lock = threading.Lock()
+_snapshot = {"version": None, "built_at": 0.0, "states": {}}
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _state(stock, reserved, hot) -> str:
+    # Hot products take no holds: their stock is the shard sum
+    available = stock if hot else stock - reserved
+    if available <= 0:
+        return OUT_OF_STOCK
+    if available <= settings.LOW_STOCK_THRESHOLD:
+        return LOW_STOCK
+    return IN_STOCK
+
+
+def _current_version():
+    version = _cache().get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        _cache().add(VERSION_KEY, version, None)
+        version = _cache().get(VERSION_KEY, version)
+    return version
+
+
+def _build(version) -> dict:
+    states = {
+        product_id: _state(stock, reserved, hot)
+        for product_id, stock, reserved, hot in (
+            Product.objects
+            .filter(is_active=True)
+            .values_list("pk", "stock", "reserved_stock", "stock_shards")
+            .iterator(chunk_size=2_000)
+        )
+    }
+    return {"version": version, "built_at": time.monotonic(), "states": states}
+
+
+def snapshot() -> dict:
+    """
+    The current snapshot, rebuilt if the shared version moved on.
+    """
+    global _snapshot
+
+    catalog_bus.poll()
+
+    current = _snapshot
+    version = _current_version()
+    if version == current["version"]:
+        return current
+    if time.monotonic() - current["built_at"] < settings.AVAILABILITY_REFRESH_SECONDS:
+        # Changed, but rebuilt very recently: serve slightly stale
+        return current
+
+    # One rebuild per process at a time; others serve the old one
+    if not _lock.acquire(blocking=current["version"] is None):
+        return current
+    try:
+        if _snapshot is current:
+            _snapshot = _build(version)
+        return _snapshot
+    finally:
+        _lock.release()
+
+
+def lookup(product_ids) -> dict:
+    """
+    {product_id: state} for the given ids.
+    """
+    states = snapshot()["states"]
+    return {
+        product_id: states.get(product_id, OUT_OF_STOCK)
+        for product_id in product_ids
+    }
+
+
+def invalidate() -> None:
+    """
+    Rotate the shared version once the current transaction commits.
+    """
+    transaction.on_commit(
+        lambda: _cache().set(VERSION_KEY, uuid.uuid4().hex, None)
+    )
+
+
+def _on_change(tags) -> None:
+    global _snapshot
+
+    if any(tag.startswith("product:") for tag in tags):
+        # Rebuild on the next lookup, whatever the shared version says
+        _snapshot = {**_snapshot, "version": None}
+
+
+catalog_bus.subscribe(_on_change)
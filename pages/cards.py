@@ -0,0 +1,128 @@
+from django.db.models import Exists, OuterRef
+from django.urls import reverse
+
+from .models import Product, ProductCard
+
+
+# =====================================================
+# PRODUCT CARD MAINTENANCE
+# =====================================================
+# Cards are refreshed incrementally from pages/signals.py:
+# - full refresh   → product / collection edits
+# - stock refresh  → stock-only saves and bulk stock updates
+
+CARD_FIELDS = [
+    "collection",
+    "name",
+    "url",
+    "image_url",
+    "price",
+    "price_display",
+    "collection_name",
+    "in_stock",
+    "is_active",
+    "is_featured",
+    "created_at",
+    "refreshed_at",
+]
+
+BATCH_SIZE = 500
+
+
+def build_card(product) -> ProductCard:
+    """
+    Project a Product (with collection loaded) into its card.
+    """
+    return ProductCard(
+        product_id=product.pk,
+        collection_id=product.collection_id,
+        name=product.name,
+        url=reverse(
+            "pages:product_detail",
+            kwargs={
+                "collection_slug": product.collection.slug,
+                "product_slug": product.slug,
+            },
+        ),
+        image_url=product.image_url,
+        price=product.price,
+        price_display=f"₹{product.price}",
+        collection_name=product.collection.name,
+        in_stock=product.is_in_stock(),
+        is_active=product.is_active,
+        is_featured=product.is_featured,
+        created_at=product.created_at,
+    )
+
+
+def refresh_cards(product_ids) -> int:
+    """
+    Rebuild cards for the given products (upsert).
+    """
+    product_ids = list(product_ids)
+    refreshed = 0
+
+    for start in range(0, len(product_ids), BATCH_SIZE):
+        products = (
+            Product.objects
+            .select_related("collection")
+            .filter(pk__in=product_ids[start:start + BATCH_SIZE])
+        )
+        cards = [build_card(product) for product in products]
+
+        ProductCard.objects.bulk_create(
+            cards,
+            update_conflicts=True,
+            unique_fields=["product"],
+            update_fields=CARD_FIELDS,
+        )
+        refreshed += len(cards)
+
+    return refreshed
+
+
+def refresh_stock_flags(product_ids) -> int:
+    """
+    Cheap path for stock changes: one UPDATE, no Python per row.
+    """
+    return (
+        ProductCard.objects
+        .filter(product_id__in=list(product_ids))
+        .update(
+            in_stock=Exists(
+                Product.objects.filter(
+                    pk=OuterRef("product_id"),
+                    is_active=True,
+                    stock__gt=0,
+                )
+            )
+        )
+    )
+
+
+def refresh_collection_cards(collection_id) -> int:
+    return refresh_cards(
+        Product.objects
+        .filter(collection_id=collection_id)
+        .values_list("pk", flat=True)
+        .iterator()
+    )
+
+
+def rebuild_all_cards() -> int:
+    refreshed = refresh_cards(
+        Product.objects.values_list("pk", flat=True).iterator()
+    )
+    ProductCard.objects.exclude(
+        product_id__in=Product.objects.values("pk")
+    ).delete()
+    return refreshed
+
+
+def cards_in_order(product_ids) -> list:
+    """
+    Cards for already-ordered ids (e.g. ranked search results).
+    """
+    product_ids = [int(pk) for pk in product_ids]
+    cards = ProductCard.objects.in_bulk(product_ids)
+    return [cards[pk] for pk in product_ids if pk in cards]
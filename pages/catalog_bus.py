@@ -0,0 +1,189 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DatabaseError, transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from . import page_cache
+from .models import CatalogChange
+
+logger = logging.getLogger("pages.catalog_bus")
+
+
+# =====================================================
+# CATALOG INVALIDATION BUS
+# =====================================================
+# page_cache tag versions live in the shared cache, which is per node
+# with the file backend. Every invalidation is therefore also written
+# to CatalogChange, in the same transaction as the change itself, and
+# each process polls the table (one indexed query at most every
+# CATALOG_BUS_POLL_SECONDS):
+#
+#   - tag versions of its node's shared cache are advanced to
+#     "v<change id>" (never moved back, so replays are harmless)
+#   - subscribers drop exactly the in-process entries carrying the
+#     changed tags (tiered cache LRU, availability snapshot)
+#
+# Ids are allocated before commit, so a slow transaction can commit
+# an id below the watermark. Ids the watermark skips are kept as gaps
+# and re-read on every poll until they show up, or for
+# CATALOG_BUS_GAP_SECONDS (a rolled-back transaction never fills its
+# gap).
+
+# Gaps remembered after one jump of the watermark, newest first
+MAX_GAPS = 1_000
+
+# Watermark and gaps of the node's shared cache: a restarted process
+# resumes from them instead of skipping what happened while it was down
+STATE_KEY = "catalog:bus:state"
+
+RETENTION = timedelta(days=1)
+
+_lock = threading.Lock()
+_state = {"watermark": None, "gaps": {}, "polled_at": 0.0, "seen": set()}
+_subscribers = []
+
+
+def subscribe(callback) -> None:
+    """
+    callback(tags: set) runs in every process for every change,
+    local ones included.
+    """
+    _subscribers.append(callback)
+
+
+# =====================================================
+# PUBLISH
+# =====================================================
+def publish(tags) -> None:
+    """
+    Log invalidated tags with the current transaction; apply them
+    locally once it commits.
+    """
+    changes = CatalogChange.objects.bulk_create(
+        [CatalogChange(tag=tag) for tag in sorted(set(tags))]
+    )
+    rows = [(change.id, change.tag) for change in changes]
+    transaction.on_commit(lambda: _apply(rows))
+
+
+def _apply(rows) -> None:
+    if not rows:
+        return
+
+    latest = {}
+    for change_id, tag in rows:
+        latest[tag] = max(change_id, latest.get(tag, 0))
+
+    page_cache.advance_tags(latest)
+
+    with _lock:
+        _state["seen"].update(change_id for change_id, _tag in rows)
+
+    tags = set(latest)
+    for callback in _subscribers:
+        callback(tags)
+
+
+# =====================================================
+# POLL
+# =====================================================
+def _resume() -> tuple:
+    saved = caches[page_cache.CACHE_ALIAS].get(STATE_KEY)
+    if saved is not None:
+        return saved["watermark"], dict(saved["gaps"])
+    # Fresh shared cache: nothing in it can be stale
+    return CatalogChange.objects.aggregate(last=Max("id"))["last"] or 0, {}
+
+
+def _track_gaps(rows, now) -> None:
+    """
+    Move the watermark past `rows`, remembering the ids it skipped.
+    """
+    found = {change_id for change_id, _tag in rows}
+    gaps = _state["gaps"]
+    for change_id in found:
+        gaps.pop(change_id, None)
+
+    watermark = _state["watermark"]
+    if rows and rows[-1][0] > watermark:
+        top = rows[-1][0]
+        for change_id in range(max(watermark + 1, top - MAX_GAPS), top):
+            if change_id not in found:
+                gaps[change_id] = now
+        _state["watermark"] = top
+
+    for change_id, at in list(gaps.items()):
+        if now - at > settings.CATALOG_BUS_GAP_SECONDS:
+            del gaps[change_id]
+
+
+def poll(*, force=False) -> int:
+    """
+    Apply changes made by other processes. Cheap to call often.
+    Returns changes applied.
+    """
+    now = time.monotonic()
+    if not force and now - _state["polled_at"] < settings.CATALOG_BUS_POLL_SECONDS:
+        return 0
+    if not _lock.acquire(blocking=force):
+        # Another thread of this process is polling
+        return 0
+
+    try:
+        _state["polled_at"] = now
+        if _state["watermark"] is None:
+            _state["watermark"], _state["gaps"] = _resume()
+
+        rows = list(
+            CatalogChange.objects
+            .filter(Q(id__gt=_state["watermark"]) | Q(id__in=list(_state["gaps"])))
+            .order_by("id")
+            .values_list("id", "tag")
+        )
+
+        seen = _state["seen"]
+        fresh = [(change_id, tag) for change_id, tag in rows if change_id not in seen]
+
+        gaps_before = len(_state["gaps"])
+        # Wall clock: gaps are shared with other processes of the node
+        _track_gaps(rows, time.time())
+        changed = bool(rows) or len(_state["gaps"]) != gaps_before
+
+        # Ids at or below the watermark are never read again
+        watermark = _state["watermark"]
+        seen -= {
+            change_id for change_id in seen
+            if change_id <= watermark and change_id not in _state["gaps"]
+        }
+        saved = {"watermark": watermark, "gaps": dict(_state["gaps"])}
+    except DatabaseError:
+        logger.exception("Catalog bus poll failed")
+        return 0
+    finally:
+        _lock.release()
+
+    _apply(fresh)
+
+    if changed:
+        cache = caches[page_cache.CACHE_ALIAS]
+        current = cache.get(STATE_KEY)
+        if current is None or current["watermark"] <= saved["watermark"]:
+            cache.set(STATE_KEY, saved, None)
+
+    return len(fresh)
+
+
+def prune() -> int:
+    """
+    Drop log rows older than RETENTION.
+    """
+    deleted, _ = CatalogChange.objects.filter(
+        created_at__lt=timezone.now() - RETENTION
+    ).delete()
+    return deleted
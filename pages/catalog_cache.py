@@ -0,0 +1,72 @@
+from .models import Collection, Product, ProductCard
+from .tiered_cache import TieredCache
+
+
+# =====================================================
+# CATALOG DATA (TIERED CACHE ADAPTERS)
+# =====================================================
+# Read-mostly catalog rows used by pages.views. Each entry carries
+# the same tags as the pages that render it, so it is invalidated
+# by pages/signals.py together with those pages.
+catalog = TieredCache("catalog")
+
+FEATURED_LIMIT = 8
+
+
+def active_collections() -> list:
+    return catalog.get_or_set(
+        "collections",
+        lambda: list(
+            Collection.objects
+            .filter(is_active=True)
+            .only("id", "name", "slug", "image")
+            .order_by("name")
+        ),
+        tags=["catalog:collections"],
+    )
+
+
+def featured_cards() -> list:
+    """
+    Home page grid: featured first, then newest.
+    """
+    return catalog.get_or_set(
+        "featured",
+        lambda: list(
+            ProductCard.objects
+            .filter(is_active=True)
+            .order_by("-is_featured", "-created_at")[:FEATURED_LIMIT]
+        ),
+        tags=["catalog:products"],
+    )
+
+
+def collection_by_slug(slug):
+    """
+    Active collection, or None (misses are cached too).
+    """
+    return catalog.get_or_set(
+        f"collection:{slug}",
+        lambda: Collection.objects.filter(slug=slug, is_active=True).first(),
+        tags=[f"collection:{slug}"],
+    )
+
+
+def product_by_slug(collection_slug, product_slug):
+    """
+    Active product with its collection, or None.
+    """
+    return catalog.get_or_set(
+        f"product:{collection_slug}/{product_slug}",
+        lambda: (
+            Product.objects
+            .select_related("collection")
+            .filter(
+                collection__slug=collection_slug,
+                slug=product_slug,
+                is_active=True,
+            )
+            .first()
+        ),
+        tags=[f"product:{collection_slug}/{product_slug}", f"related:{collection_slug}"],
+    )
@@ -0,0 +1,11 @@
+from orders.services import outbox
+
+from . import stock_shards
+
+
+# =====================================================
+# OUTBOX HANDLERS (run by manage.py run_worker)
+# =====================================================
+@outbox.handler(stock_shards.MATERIALIZE_JOB)
+def materialize_hot_stock(payload):
+    stock_shards.materialize([payload["product_id"]])
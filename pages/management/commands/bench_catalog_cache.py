@@ -0,0 +1,95 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test.utils import CaptureQueriesContext
+
+from pages import catalog_cache, page_cache
+from pages.models import Product
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the catalog adapters (pages.catalog_cache) cold, from the "
+        "shared cache and from the in-process LRU, then hit one cold key "
+        "from many threads to check single-flight regeneration. Prints "
+        "the hit/miss counters."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        product = (
+            Product.objects
+            .filter(is_active=True)
+            .select_related("collection")
+            .first()
+        )
+        if product is None:
+            raise CommandError("Needs at least one active product.")
+
+        lookups = {
+            "collections": catalog_cache.active_collections,
+            "featured": catalog_cache.featured_cards,
+            "collection by slug": lambda: catalog_cache.collection_by_slug(product.collection.slug),
+            "product by slug": lambda: catalog_cache.product_by_slug(product.collection.slug, product.slug),
+        }
+        tags = [
+            "catalog:collections",
+            "catalog:products",
+            f"collection:{product.collection.slug}",
+            f"product:{product.collection.slug}/{product.slug}",
+        ]
+
+        # Autocommit: the rotation runs right away
+        page_cache.invalidate_tags(*tags)
+
+        for name, lookup in lookups.items():
+            cold = self._time(lookup, 1)
+            catalog_cache.catalog.clear_local()
+            shared = self._time(lookup, 1)
+            local = self._time(lookup, options["repeat"])
+            self.stdout.write(
+                f"{name:20} cold {cold[0]:7.2f} ms ({cold[1]} queries) | "
+                f"shared {shared[0]:6.2f} ms ({shared[1]}) | "
+                f"local {local[0]:6.3f} ms ({local[1]})"
+            )
+
+        self._stampede(lookups["product by slug"], tags[-1], options["threads"])
+        self.stdout.write(f"Counters: {catalog_cache.catalog.stats()}")
+
+    def _time(self, lookup, repeat):
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            for _ in range(repeat):
+                lookup()
+            elapsed = (time.perf_counter() - started) * 1000 / repeat
+        return elapsed, len(ctx.captured_queries) // repeat
+
+    def _stampede(self, lookup, tag, threads):
+        page_cache.invalidate_tags(tag)
+        before = catalog_cache.catalog.stats().get("misses", 0)
+        barrier = threading.Barrier(threads)
+
+        def worker():
+            try:
+                barrier.wait()
+                lookup()
+            finally:
+                close_old_connections()
+                connection.close()
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        regenerated = catalog_cache.catalog.stats().get("misses", 0) - before
+        style = self.style.SUCCESS if regenerated == 1 else self.style.WARNING
+        self.stdout.write(style(
+            f"{threads} concurrent lookups of a cold key → {regenerated} regeneration(s)."
+        ))
@@ -0,0 +1,133 @@
+import random
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from pages import search
+from pages.models import Collection, Product
+
+
+WORDS = (
+    "cotton linen denim cargo jacket shirt tee hoodie oversized slim "
+    "classic vintage washed black white olive navy stone relaxed cropped "
+    "utility bomber overshirt knit wool chino pleated tapered straight "
+    "premium heavyweight breathable stretch organic essential signature"
+).split()
+
+
+def _vocabulary(rng, size=5_000):
+    """
+    Real catalog words plus pseudo-words, so term selectivity
+    resembles a real catalog instead of every row matching.
+    """
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    filler = {
+        "".join(rng.choices(letters, k=rng.randint(4, 9)))
+        for _ in range(size)
+    }
+    return list(WORDS) + sorted(filler)
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare full-text search against the legacy icontains scan "
+        "on a synthetic catalog. All data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100_000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--batch-size", type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            self.stdout.write("Synthetic catalog rolled back.")
+
+    # -------------------------
+    # BENCHMARK
+    # -------------------------
+    def _run(self, options):
+        rng = random.Random(42)
+        total = options["products"]
+        batch_size = options["batch_size"]
+
+        vocabulary = _vocabulary(rng)
+
+        collection = Collection.objects.create(
+            name="Benchmark Collection",
+            slug="benchmark-collection",
+        )
+
+        self.stdout.write(f"Creating {total} products…")
+        for start in range(0, total, batch_size):
+            Product.objects.bulk_create([
+                Product(
+                    collection=collection,
+                    name=" ".join(rng.choices(vocabulary, k=3)).title(),
+                    slug=f"bench-{i}",
+                    price=Decimal(rng.randint(299, 4999)),
+                    description=" ".join(rng.choices(vocabulary, k=60)),
+                    stock=rng.randint(0, 50),
+                )
+                for i in range(start, min(start + batch_size, total))
+            ])
+
+        # bulk_create bypasses signals → index in one pass
+        started = time.perf_counter()
+        search.rebuild_index()
+        self.stdout.write(
+            f"Index built in {time.perf_counter() - started:.2f}s "
+            f"({search.get_backend()})"
+        )
+
+        base_qs = (
+            Product.objects
+            .select_related("collection")
+            .filter(is_active=True)
+            .only("id", "name", "slug", "price", "image", "collection__slug", "created_at")
+            .order_by("-created_at")
+        )
+
+        queries = ["denim", "black jacket", "organic cotton tee", "zzz-no-match"]
+
+        for query in queries:
+            def legacy():
+                qs = base_qs.filter(
+                    Q(name__icontains=query) | Q(description__icontains=query)
+                )
+                return qs.count(), list(qs[:12])
+
+            def fulltext():
+                qs = search.search_products(base_qs, query)
+                return qs.count(), list(qs[:12])
+
+            legacy_ms, legacy_hits = self._time(legacy, options["repeat"])
+            fts_ms, fts_hits = self._time(fulltext, options["repeat"])
+
+            self.stdout.write(
+                f"{query!r:24} icontains {legacy_ms:8.1f}ms ({legacy_hits} hits) | "
+                f"full-text {fts_ms:8.1f}ms ({fts_hits} hits) | "
+                f"x{legacy_ms / max(fts_ms, 0.001):.1f}"
+            )
+
+    @staticmethod
+    def _time(fn, repeat):
+        best = None
+        hits = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            hits, _rows = fn()
+            elapsed = (time.perf_counter() - started) * 1000
+            best = elapsed if best is None else min(best, elapsed)
+        return best, hits
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from pages.related import rebuild_all_related
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the RelatedProduct table for every active product "
+        "(same collection, price proximity, co-purchases)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        written = rebuild_all_related(batch_size=options["batch_size"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {written} related entries in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,113 @@
+import multiprocessing
+import time
+import uuid
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test.utils import override_settings
+
+from pages import catalog_bus, catalog_cache
+from pages.models import Product
+
+
+def _node(index, product_id, ready, changed, changed_at, results, timeout):
+    """
+    Runs in a child process with its own in-memory CACHES, i.e. as a
+    separate node: warm the product, wait for the rename, then read
+    until the new name shows up.
+    """
+    connections.close_all()
+    location = f"catalog-bus-demo-{index}-{uuid.uuid4().hex}"
+
+    with override_settings(CACHES={"default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": location,
+    }}):
+        catalog_bus._state.update(watermark=None, gaps={}, polled_at=0.0, seen=set())
+        catalog_cache.catalog.clear_local()
+        catalog_cache.catalog.counters.clear()
+
+        product = Product.objects.select_related("collection").get(pk=product_id)
+        slugs = (product.collection.slug, product.slug)
+        old_name = catalog_cache.product_by_slug(*slugs).name
+        ready.release()
+
+        if not changed.wait(timeout):
+            results.put((index, None, {}))
+            return
+
+        seconds = None
+        while time.time() - changed_at.value < timeout:
+            if catalog_cache.product_by_slug(*slugs).name != old_name:
+                seconds = time.time() - changed_at.value
+                break
+            time.sleep(0.01)
+
+        results.put((index, seconds, catalog_cache.catalog.stats()))
+
+    connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Start several processes, each with its own in-memory cache (a "
+        "node), warm one product in all of them, rename it here and "
+        "report how long each node takes to serve the new name and "
+        "which local entries it dropped. The name is restored afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--nodes", type=int, default=4)
+        parser.add_argument("--timeout", type=float, default=15)
+
+    def handle(self, *args, **options):
+        product = Product.objects.filter(is_active=True).first()
+        if product is None:
+            raise CommandError("Needs at least one active product.")
+
+        nodes = max(options["nodes"], 1)
+        context = multiprocessing.get_context("fork")
+        ready = context.Semaphore(0)
+        changed = context.Event()
+        changed_at = context.Value("d", 0.0)
+        results = context.Queue()
+
+        # Children must not share the parent's connection
+        connections.close_all()
+        processes = [
+            context.Process(
+                target=_node,
+                args=(i, product.pk, ready, changed, changed_at, results, options["timeout"]),
+            )
+            for i in range(nodes)
+        ]
+        for process in processes:
+            process.start()
+
+        original = product.name
+        try:
+            for _ in range(nodes):
+                if not ready.acquire(timeout=options["timeout"]):
+                    raise CommandError("A node did not start in time.")
+
+            product.name = f"{original} ({uuid.uuid4().hex[:6]})"
+            product.save()
+            changed_at.value = time.time()
+            changed.set()
+
+            for _ in range(nodes):
+                index, seconds, stats = results.get(timeout=options["timeout"] * 2)
+                if seconds is None:
+                    self.stdout.write(f"node {index}: still stale after {options['timeout']}s")
+                    continue
+                self.stdout.write(
+                    f"node {index}: new name after {seconds * 1000:.0f} ms, "
+                    f"{stats.get('dropped', 0)} local entries dropped, "
+                    f"{stats.get('misses', 0)} regenerations"
+                )
+        finally:
+            changed.set()
+            for process in processes:
+                process.join(options["timeout"])
+            product.name = original
+            product.save()
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pages.cards import rebuild_all_cards
+
+
+class Command(BaseCommand):
+    help = "Rebuild the ProductCard listing read model from Product rows."
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        with transaction.atomic():
+            count = rebuild_all_cards()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {count} product cards in {time.perf_counter() - started:.2f}s"
+        ))
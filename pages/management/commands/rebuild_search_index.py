@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from pages import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index in bulk."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--database", default="default")
+
+    def handle(self, *args, **options):
+        using = options["database"]
+        backend = search.get_backend(using)
+
+        started = time.perf_counter()
+        with transaction.atomic(using=using):
+            count = search.rebuild_index(using=using)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {count} products ({backend}) in {elapsed:.2f}s"
+        ))
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    from pages.search import create_search_schema
+    create_search_schema(schema_editor.connection)
+
+
+def drop_search_index(apps, schema_editor):
+    from pages.search import drop_search_schema
+    drop_search_schema(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0008_product_stock_never_negative'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
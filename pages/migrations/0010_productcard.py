@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-17 00:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0009_product_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductCard',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='pages.product')),
+                ('name', models.CharField(max_length=150)),
+                ('url', models.CharField(max_length=300)),
+                ('image_url', models.CharField(blank=True, max_length=500)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('price_display', models.CharField(max_length=32)),
+                ('collection_name', models.CharField(max_length=100)),
+                ('in_stock', models.BooleanField(default=False)),
+                ('is_active', models.BooleanField(default=True)),
+                ('is_featured', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+                ('refreshed_at', models.DateTimeField(auto_now=True)),
+                ('collection', models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='pages.collection')),
+            ],
+            options={
+                'ordering': ['-created_at', '-product'],
+                'indexes': [models.Index(fields=['is_active', '-created_at', '-product'], name='card_listing_idx'), models.Index(fields=['collection', 'is_active', '-created_at', '-product'], name='card_collection_idx'), models.Index(fields=['is_active', '-is_featured', '-created_at'], name='card_featured_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-17 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pages', '0011_relatedproduct'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='reserved_stock',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Units held by active cart reservations'),
+        ),
+    ]
@@ -1,6 +1,6 @@
 from decimal import Decimal
 
-from django.db import models, transaction
+from django.db import models
 from django.db.models import Q
 from django.urls import reverse
 from django.core.validators import MinValueValidator
@@ -130,6 +130,19 @@ class Product(models.Model):
         help_text="Available inventory count"
     )
 
+    reserved_stock = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Units held by active cart reservations"
+    )
+
+    stock_shards = models.PositiveSmallIntegerField(
+        default=0,
+        editable=False,
+        help_text="Hot-product mode: stock split across this many "
+                  "counter rows (0 = off). `stock` is then their sum."
+    )
+
     is_active = models.BooleanField(
         default=True,
         help_text="Disable to hide product without deleting"
@@ -185,6 +198,13 @@ class Product(models.Model):
         """
         return self.is_active and self.stock > 0
 
+    @property
+    def available_stock(self) -> int:
+        """
+        Stock not held by someone else's cart.
+        """
+        return max(self.stock - self.reserved_stock, 0)
+
     def can_fulfill(self, quantity: int) -> bool:
         """
         Cart / checkout validation helper.
@@ -195,45 +215,27 @@ class Product(models.Model):
             and self.stock >= quantity
         )
 
-    @transaction.atomic
-    def reduce_stock(self, quantity: int) -> None:
+    def reduce_stock(self, quantity: int, *, reason="SALE", order=None) -> None:
         """
-        Safe stock reduction.
-        MUST be called during order creation inside atomic blocks.
+        Safe stock reduction (guarded UPDATE, hot-product aware).
+        Recorded in the inventory ledger.
         """
         if quantity <= 0:
             raise ValueError("Quantity must be positive")
 
-        product = (
-            Product.objects
-            .select_for_update()
-            .only("id", "stock")
-            .get(pk=self.pk)
-        )
-
-        if product.stock < quantity:
-            raise ValueError("Insufficient stock")
+        from orders.services.inventory_service import decrement_stock
+        decrement_stock({self.pk: quantity}, reason=reason, order=order)
 
-        product.stock -= quantity
-        product.save(update_fields=["stock"])
-
-    @transaction.atomic
-    def increase_stock(self, quantity: int) -> None:
+    def increase_stock(self, quantity: int, *, reason="RESTOCK", order=None) -> None:
         """
         Used for refunds, cancellations, restocks.
+        Recorded in the inventory ledger.
         """
         if quantity <= 0:
             raise ValueError("Quantity must be positive")
 
-        product = (
-            Product.objects
-            .select_for_update()
-            .only("id", "stock")
-            .get(pk=self.pk)
-        )
-
-        product.stock += quantity
-        product.save(update_fields=["stock"])
+        from orders.services.inventory_service import increment_stock
+        increment_stock({self.pk: quantity}, reason=reason, order=order)
 
     @property
     def image_url(self) -> str:
@@ -241,3 +243,160 @@ class Product(models.Model):
         Safe image accessor for templates, order history & admin.
         """
         return self.image.url if self.image else ""
+
+
+# =====================================================
+# STOCK SHARDS (HOT-PRODUCT MODE)
+# =====================================================
+class StockShard(models.Model):
+    """
+    One slice of a hot product's stock. Checkouts decrement a random
+    shard with a conditional UPDATE instead of locking the product row.
+
+    Maintained by pages.stock_shards — never edit by hand.
+    """
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="stock_shard_rows",
+    )
+    shard = models.PositiveSmallIntegerField()
+    stock = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "shard"],
+                name="unique_stock_shard",
+            ),
+            models.CheckConstraint(
+                condition=Q(stock__gte=0),
+                name="stock_shard_never_negative",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product_id}#{self.shard}: {self.stock}"
+
+
+# =====================================================
+# PRODUCT CARD (DENORMALIZED LISTING READ MODEL)
+# =====================================================
+class ProductCard(models.Model):
+    """
+    One narrow, precomputed row per product for listing pages.
+    Listings read this table with no joins and no per-row Python work.
+
+    Maintained by pages.cards — never edit by hand.
+    """
+
+    product = models.OneToOneField(
+        Product,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="card",
+    )
+
+    collection = models.ForeignKey(
+        Collection,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_constraint=False,
+    )
+
+    name = models.CharField(max_length=150)
+    url = models.CharField(max_length=300)
+    image_url = models.CharField(max_length=500, blank=True)
+
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    price_display = models.CharField(max_length=32)
+
+    collection_name = models.CharField(max_length=100)
+
+    in_stock = models.BooleanField(default=False)
+    is_active = models.BooleanField(default=True)
+    is_featured = models.BooleanField(default=False)
+
+    created_at = models.DateTimeField()
+    refreshed_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at", "-product"]
+        indexes = [
+            models.Index(
+                fields=["is_active", "-created_at", "-product"],
+                name="card_listing_idx",
+            ),
+            models.Index(
+                fields=["collection", "is_active", "-created_at", "-product"],
+                name="card_collection_idx",
+            ),
+            models.Index(
+                fields=["is_active", "-is_featured", "-created_at"],
+                name="card_featured_idx",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.name
+
+
+# =====================================================
+# RELATED PRODUCTS (PRECOMPUTED)
+# =====================================================
+class RelatedProduct(models.Model):
+    """
+    Precomputed "you may also like" list per product.
+    Points at ProductCard so the detail page reads its
+    related cards in one indexed join.
+
+    Maintained by pages.related — never edit by hand.
+    """
+
+    product = models.ForeignKey(
+        Product,
+        on_delete=models.CASCADE,
+        related_name="related_entries",
+    )
+
+    related = models.ForeignKey(
+        ProductCard,
+        on_delete=models.CASCADE,
+        related_name="related_to",
+    )
+
+    score = models.FloatField()
+    rank = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ["product", "rank"]
+        indexes = [
+            models.Index(fields=["product", "rank"]),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["product", "related"],
+                name="unique_related_product",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.product_id} → {self.related_id} ({self.score:.2f})"
+
+
+class CatalogChange(models.Model):
+    """
+    Append-only log of invalidated catalog cache tags.
+
+    The id is the catalog version: every process polls for ids it has
+    not applied yet (pages.catalog_bus), so an edit on one node
+    reaches the caches of every other node.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    tag = models.CharField(max_length=320)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"#{self.id} {self.tag}"
@@ -0,0 +1,238 @@
+import hashlib
+import uuid
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import patch_cache_control
+
+from . import catalog_bus
+from .models import Product
+
+
+# =====================================================
+# CATALOG PAGE CACHE (TAG-INVALIDATED)
+# =====================================================
+# Each cached page stores the versions of the tags it was rendered
+# under. Invalidating a tag just rotates its version, so every page
+# carrying it misses on the next read — nothing is scanned or deleted.
+#
+# Tags:
+#   catalog:products            shop + home product grids
+#   catalog:collections         home + collection list
+#   collection:<slug>           one collection listing
+#   related:<slug>              detail pages of a collection (breadcrumb,
+#                               related cards)
+#   product:<coll>/<slug>       one product detail page
+
+TIMEOUT = getattr(settings, "CATALOG_PAGE_CACHE_TIMEOUT", 60 * 15)
+CACHE_ALIAS = getattr(settings, "CATALOG_PAGE_CACHE_ALIAS", "default")
+
+# Browsers / reverse proxies can't see tag invalidation → keep it short
+HTTP_MAX_AGE = getattr(settings, "CATALOG_HTTP_MAX_AGE", 60)
+
+# Product fields that only change a product's own page (listing
+# badges are patched client-side from pages:availability)
+STOCK_FIELDS = frozenset({"stock", "updated_at"})
+
+
+def _cache():
+    return caches[CACHE_ALIAS]
+
+
+def _tag_key(tag: str) -> str:
+    return f"catalog:tag:{tag}"
+
+
+def _page_key(request) -> str:
+    """
+    Path + normalized query string (sorted, blanks dropped).
+    """
+    params = sorted(
+        (key, value)
+        for key, values in request.GET.lists()
+        for value in values
+        if value.strip()
+    )
+    raw = request.get_host() + request.path + "?" + "&".join(f"{k}={v}" for k, v in params)
+    return "catalog:page:" + hashlib.md5(raw.encode()).hexdigest()
+
+
+def tag_versions(tags) -> dict:
+    """
+    Current version per tag. Unknown tags get a fresh version.
+    """
+    # Pick up invalidations made on other nodes first
+    catalog_bus.poll()
+
+    cache = _cache()
+    keys = {_tag_key(tag): tag for tag in tags}
+    found = cache.get_many(keys.keys())
+
+    missing = [key for key in keys if key not in found]
+    if missing:
+        # add(): concurrent first readers settle on one version
+        for key in missing:
+            cache.add(key, uuid.uuid4().hex, None)
+        found.update(cache.get_many(missing))
+
+    return {keys[key]: version for key, version in found.items()}
+
+
+# =====================================================
+# INVALIDATION
+# =====================================================
+def invalidate_tags(*tags) -> None:
+    """
+    Log the tags on the catalog bus (same transaction). Their versions
+    advance once it commits, so no request can re-cache pre-commit
+    data, and every other node follows on its next poll.
+    """
+    tags = {tag for tag in tags if tag}
+    if not tags:
+        return
+
+    catalog_bus.publish(tags)
+
+
+def _sequence(version) -> int:
+    # Bus versions are "v<change id>"; random ones predate any change
+    if isinstance(version, str) and version[:1] == "v" and version[1:].isdigit():
+        return int(version[1:])
+    return -1
+
+
+def advance_tags(changes: dict) -> None:
+    """
+    Move tags ({tag: change id}) to version "v<change id>" unless
+    they are already there or newer.
+    """
+    cache = _cache()
+    keys = {_tag_key(tag): change_id for tag, change_id in changes.items()}
+    current = cache.get_many(keys.keys())
+
+    newer = {
+        key: f"v{change_id}"
+        for key, change_id in keys.items()
+        if _sequence(current.get(key)) < change_id
+    }
+    if newer:
+        cache.set_many(newer, None)
+
+
+def product_tags(collection_slug, product_slug, *, stock_only=False) -> set:
+    tags = {f"product:{collection_slug}/{product_slug}"}
+    if not stock_only:
+        tags |= {
+            "catalog:products",
+            f"collection:{collection_slug}",
+            f"related:{collection_slug}",
+        }
+    return tags
+
+
+def collection_tags(slug) -> set:
+    return {
+        "catalog:products",
+        "catalog:collections",
+        f"collection:{slug}",
+        f"related:{slug}",
+    }
+
+
+def invalidate_products(product_ids, *, stock_only=False) -> None:
+    """
+    Invalidate pages for the given product ids. Used by bulk
+    `.update()` paths where model signals don't fire; collect the ids
+    before updating, a filtered queryset may match nothing afterwards.
+    """
+    tags = set()
+    for product_slug, collection_slug in (
+        Product.objects
+        .filter(pk__in=list(product_ids))
+        .values_list("slug", "collection__slug")
+    ):
+        tags |= product_tags(collection_slug, product_slug, stock_only=stock_only)
+
+    invalidate_tags(*tags)
+
+
+# =====================================================
+# VIEW DECORATOR
+# =====================================================
+def cache_catalog_page(tags):
+    """
+    Cache GET responses of a catalog view.
+
+    Catalog HTML is identical for every visitor (per-visitor bits are
+    loaded from pages:visitor_state), so one entry serves everyone and
+    the response is marked publicly cacheable.
+
+    `tags` is a list, or a callable receiving the view kwargs.
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            if not _request_is_cacheable(request):
+                return view_func(request, *args, **kwargs)
+
+            page_tags = tags(**kwargs) if callable(tags) else tags
+            cache = _cache()
+            key = _page_key(request)
+
+            entry = cache.get(key)
+            versions = tag_versions(page_tags)
+
+            if entry and entry["versions"] == versions:
+                response = HttpResponse(
+                    entry["content"],
+                    content_type=entry["content_type"],
+                )
+                response["X-Catalog-Cache"] = "hit"
+                patch_cache_control(response, public=True, max_age=HTTP_MAX_AGE)
+                return response
+
+            response = view_func(request, *args, **kwargs)
+
+            if _response_is_cacheable(request, response):
+                cache.set(
+                    key,
+                    {
+                        "versions": versions,
+                        "content": response.content,
+                        "content_type": response["Content-Type"],
+                    },
+                    TIMEOUT,
+                )
+                response["X-Catalog-Cache"] = "miss"
+                patch_cache_control(response, public=True, max_age=HTTP_MAX_AGE)
+
+            return response
+
+        return _wrapped
+
+    return decorator
+
+
+def _request_is_cacheable(request) -> bool:
+    # Never touch request.user / request.session here: loading the
+    # session adds `Vary: Cookie` and defeats shared caching.
+    return request.method == "GET"
+
+
+def _response_is_cacheable(request, response) -> bool:
+    if response.status_code != 200 or response.streaming:
+        return False
+    if response.cookies:
+        return False
+    # Page embeds a per-visitor CSRF token (templates should use
+    # data-csrf-token placeholders instead)
+    if request.META.get("CSRF_COOKIE_NEEDS_UPDATE"):
+        return False
+    # Something read the session → output may be per-visitor
+    session = getattr(request, "session", None)
+    if session is not None and session.accessed:
+        return False
+    return True
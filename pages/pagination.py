@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.core import signing
+from django.core.paginator import EmptyPage, PageNotAnInteger, Paginator
+from django.db.models import Q
+
+
+# =====================================================
+# LISTING PAGINATION (PAGE NUMBERS → KEYSET CURSORS)
+# =====================================================
+# The first NUMBERED_PAGES pages keep classic ?page=N links so SEO
+# links stay stable. Past that, "next" switches to an opaque ?cursor=
+# token keyed on (created_at, id): every deeper page is a bounded range
+# scan on the created_at index, with no COUNT(*) and no OFFSET.
+
+PER_PAGE = 12
+NUMBERED_PAGES = 5
+
+CURSOR_SALT = "pages.listing.cursor"
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _encode_cursor(direction: str, product) -> str:
+    micros = (product.created_at - _EPOCH) // timedelta(microseconds=1)
+    return signing.dumps([direction, micros, product.pk], salt=CURSOR_SALT)
+
+
+def _decode_cursor(token: str):
+    """
+    Returns (direction, created_at, pk) or None for a bad token.
+    """
+    try:
+        direction, micros, pk = signing.loads(token, salt=CURSOR_SALT)
+    except (signing.BadSignature, TypeError, ValueError):
+        return None
+
+    if direction not in ("n", "p"):
+        return None
+
+    return direction, _EPOCH + timedelta(microseconds=int(micros)), int(pk)
+
+
+class ListingPage:
+    """
+    Template-facing page object for both pagination modes.
+
+    Cursor pages have no `number` / `num_pages` / `count`:
+    computing them is exactly the cost keyset pagination avoids.
+    """
+
+    def __init__(
+        self,
+        object_list,
+        *,
+        has_next,
+        has_previous,
+        next_query="",
+        previous_query="",
+        number=None,
+        num_pages=None,
+        count=None,
+    ):
+        self.object_list = list(object_list)
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_query = next_query
+        self.previous_query = previous_query
+        self.number = number
+        self.num_pages = num_pages
+        self.count = count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+
+def _query(params, **extra) -> str:
+    params = params.copy()
+    for key, value in extra.items():
+        params[key] = value
+    return params.urlencode()
+
+
+# =====================================================
+# PUBLIC API
+# =====================================================
+def paginate_listing(request, queryset, *, per_page=PER_PAGE, keyset=True):
+    """
+    Paginate a listing queryset.
+
+    `queryset` must be ordered by ("-created_at", "-pk") when `keyset`
+    is enabled. Ranked results (search) should pass keyset=False.
+    """
+    params = request.GET.copy()
+    params.pop("page", None)
+    params.pop("cursor", None)
+
+    token = request.GET.get("cursor")
+    cursor = _decode_cursor(token) if (keyset and token) else None
+
+    if cursor:
+        return _keyset_page(queryset, cursor, params, per_page)
+
+    return _numbered_page(request, queryset, params, per_page, keyset)
+
+
+def _numbered_page(request, queryset, params, per_page, keyset):
+    paginator = Paginator(queryset, per_page)
+
+    try:
+        page = paginator.page(request.GET.get("page", 1))
+    except (PageNotAnInteger, EmptyPage):
+        page = paginator.page(1)
+
+    next_query = ""
+    if page.has_next():
+        if keyset and page.number >= NUMBERED_PAGES:
+            next_query = _query(
+                params, cursor=_encode_cursor("n", page.object_list[len(page) - 1])
+            )
+        else:
+            next_query = _query(params, page=page.next_page_number())
+
+    previous_query = ""
+    if page.has_previous():
+        previous_query = _query(params, page=page.previous_page_number())
+
+    return ListingPage(
+        page.object_list,
+        has_next=page.has_next(),
+        has_previous=page.has_previous(),
+        next_query=next_query,
+        previous_query=previous_query,
+        number=page.number,
+        num_pages=paginator.num_pages,
+        count=paginator.count,
+    )
+
+
+def _keyset_page(queryset, cursor, params, per_page):
+    direction, created_at, pk = cursor
+
+    if direction == "n":
+        rows = list(
+            queryset
+            .filter(
+                Q(created_at__lt=created_at) |
+                Q(created_at=created_at, pk__lt=pk)
+            )
+            .order_by("-created_at", "-pk")[:per_page + 1]
+        )
+        has_next = len(rows) > per_page
+        has_previous = True
+        rows = rows[:per_page]
+    else:
+        rows = list(
+            queryset
+            .filter(
+                Q(created_at__gt=created_at) |
+                Q(created_at=created_at, pk__gt=pk)
+            )
+            .order_by("created_at", "pk")[:per_page + 1]
+        )
+        has_previous = len(rows) > per_page
+        has_next = True
+        rows = rows[:per_page][::-1]
+
+    if not rows:
+        return ListingPage([], has_next=False, has_previous=False)
+
+    return ListingPage(
+        rows,
+        has_next=has_next,
+        has_previous=has_previous,
+        next_query=_query(params, cursor=_encode_cursor("n", rows[-1])) if has_next else "",
+        previous_query=_query(params, cursor=_encode_cursor("p", rows[0])) if has_previous else "",
+    )
@@ -0,0 +1,168 @@
+import math
+
+from django.db import transaction
+
+from orders.models import ProductPairCount
+
+from .models import Product, ProductCard, RelatedProduct
+
+
+# =====================================================
+# RELATED PRODUCTS SCORING
+# =====================================================
+# score = SAME_COLLECTION_WEIGHT   (same collection)
+#       + PRICE_WEIGHT × 1 / (1 + |Δprice| / price)
+#       + CO_PURCHASE_WEIGHT × log(1 + orders bought together)
+#
+# Co-purchase counts come from orders.ProductPairCount.
+
+TOP_K = 8
+CANDIDATES_PER_COLLECTION = 50
+
+SAME_COLLECTION_WEIGHT = 1.0
+PRICE_WEIGHT = 0.5
+CO_PURCHASE_WEIGHT = 1.0
+
+
+def _co_purchase_counts(product_id) -> dict:
+    """
+    {other_product_id: number of purchased orders containing both},
+    read from the incremental co-purchase table (build_copurchases).
+    """
+    return dict(
+        ProductPairCount.objects
+        .filter(product_id=product_id)
+        .values_list("other_id", "orders")
+    )
+
+
+def _price_proximity(price, other_price) -> float:
+    if not price:
+        return 0.0
+    return 1.0 / (1.0 + abs(float(price) - float(other_price)) / float(price))
+
+
+def score_related(product) -> list:
+    """
+    Returns [(related_product_id, score)] best first, at most TOP_K.
+    """
+    co_purchased = _co_purchase_counts(product.pk)
+
+    candidates = {
+        row["pk"]: row
+        for row in (
+            Product.objects
+            .filter(collection_id=product.collection_id, is_active=True)
+            .exclude(pk=product.pk)
+            .order_by("-created_at")
+            .values("pk", "price", "collection_id")[:CANDIDATES_PER_COLLECTION]
+        )
+    }
+    candidates.update({
+        row["pk"]: row
+        for row in (
+            Product.objects
+            .filter(pk__in=list(co_purchased), is_active=True)
+            .values("pk", "price", "collection_id")
+        )
+    })
+
+    scored = []
+    for pk, row in candidates.items():
+        score = PRICE_WEIGHT * _price_proximity(product.price, row["price"])
+        if row["collection_id"] == product.collection_id:
+            score += SAME_COLLECTION_WEIGHT
+        score += CO_PURCHASE_WEIGHT * math.log1p(co_purchased.get(pk, 0))
+        scored.append((pk, score))
+
+    scored.sort(key=lambda pair: (-pair[1], -pair[0]))
+    return scored[:TOP_K]
+
+
+# =====================================================
+# MAINTENANCE
+# =====================================================
+@transaction.atomic
+def refresh_related(product_ids) -> int:
+    """
+    Recompute the related list of each given product.
+    """
+    products = Product.objects.filter(pk__in=list(product_ids))
+    written = 0
+
+    for product in products.only("pk", "price", "collection_id", "is_active"):
+        RelatedProduct.objects.filter(product=product).delete()
+        if not product.is_active:
+            continue
+
+        scored = score_related(product)
+        existing_cards = set(
+            ProductCard.objects
+            .filter(pk__in=[pk for pk, _score in scored])
+            .values_list("pk", flat=True)
+        )
+
+        entries = [
+            RelatedProduct(
+                product=product,
+                related_id=pk,
+                score=score,
+                rank=rank,
+            )
+            for rank, (pk, score) in enumerate(
+                (pair for pair in scored if pair[0] in existing_cards),
+                start=1,
+            )
+        ]
+        RelatedProduct.objects.bulk_create(entries)
+        written += len(entries)
+
+    return written
+
+
+def refresh_related_around(product_ids) -> int:
+    """
+    Incremental update after products change: the products
+    themselves, every product currently listing them and, for active
+    products nobody lists yet (new or reactivated), the newest
+    siblings of their collection.
+    """
+    product_ids = set(product_ids)
+    listing = list(
+        RelatedProduct.objects
+        .filter(related_id__in=product_ids)
+        .values_list("product_id", "related_id")
+    )
+    listed = {related_id for _product_id, related_id in listing}
+    refresh = product_ids | {product_id for product_id, _related_id in listing}
+
+    collection_ids = set(
+        Product.objects
+        .filter(pk__in=product_ids - listed, is_active=True)
+        .values_list("collection_id", flat=True)
+    )
+    for collection_id in collection_ids:
+        # Same bound as the candidate set: older siblings pick the
+        # product up on the next build_related_products
+        refresh |= set(
+            Product.objects
+            .filter(collection_id=collection_id, is_active=True)
+            .order_by("-created_at")
+            .values_list("pk", flat=True)[:CANDIDATES_PER_COLLECTION]
+        )
+
+    return refresh_related(refresh)
+
+
+def rebuild_all_related(batch_size=500) -> int:
+    ids = list(
+        Product.objects
+        .filter(is_active=True)
+        .values_list("pk", flat=True)
+    )
+    RelatedProduct.objects.exclude(product_id__in=ids).delete()
+
+    written = 0
+    for start in range(0, len(ids), batch_size):
+        written += refresh_related(ids[start:start + batch_size])
+    return written
@@ -0,0 +1,229 @@
+import re
+
+from django.db import DatabaseError, connections
+from django.db.models import Q
+
+
+# =====================================================
+# FULL-TEXT PRODUCT SEARCH
+# =====================================================
+# Backends:
+# - SQLite   → FTS5 table (rowid = product id), ranked by bm25()
+# - Postgres → GIN index over a tsvector expression, ranked by ts_rank()
+# - Other    → legacy icontains scan (no ranking)
+#
+# The Postgres index is an expression index, so the database keeps it
+# current by itself. The SQLite table is a copy and is synced from the
+# Product post_save / post_delete signals (see pages/signals.py).
+
+FTS_TABLE = "pages_product_fts"
+
+# Saves limited to other fields (update_fields) skip reindexing
+INDEXED_FIELDS = frozenset({"name", "description"})
+PG_INDEX = "pages_product_search_gin"
+
+PG_VECTOR = (
+    "to_tsvector('english', "
+    "coalesce({table}.name, '') || ' ' || coalesce({table}.description, ''))"
+)
+
+MAX_TERMS = 8
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+
+# alias -> backend name, resolved once per process
+_backends = {}
+
+
+def _terms(query: str) -> list:
+    """
+    Normalize a raw search box value into safe, lower-case terms.
+    Only word characters survive, so terms can be embedded in
+    FTS5 / tsquery syntax without escaping.
+    """
+    return _TERM_RE.findall((query or "").lower())[:MAX_TERMS]
+
+
+def get_backend(using="default") -> str:
+    """
+    Resolve which search backend is available on a connection.
+    """
+    if using in _backends:
+        return _backends[using]
+
+    connection = connections[using]
+    backend = "icontains"
+
+    if connection.vendor == "postgresql":
+        backend = "postgres"
+    elif connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            tables = connection.introspection.table_names(cursor)
+        if FTS_TABLE in tables:
+            backend = "sqlite"
+
+    _backends[using] = backend
+    return backend
+
+
+# =====================================================
+# QUERYING
+# =====================================================
+def search_products(queryset, query: str):
+    """
+    Filter a Product queryset down to full-text matches.
+
+    Results are ordered by relevance (best first), newest first on ties.
+    The queryset stays lazy, so it can be sliced or paginated as usual.
+    """
+    terms = _terms(query)
+    if not terms:
+        return queryset.none()
+
+    backend = get_backend(queryset.db)
+    table = queryset.model._meta.db_table
+
+    if backend == "sqlite":
+        match = " ".join(f'"{term}"*' for term in terms)
+        return (
+            queryset
+            .extra(
+                tables=[FTS_TABLE],
+                where=[
+                    f"{FTS_TABLE} MATCH %s",
+                    f"{FTS_TABLE}.rowid = {table}.id",
+                ],
+                params=[match],
+                select={"search_rank": f"bm25({FTS_TABLE}, 10.0, 1.0)"},
+            )
+            # bm25() is lower-is-better
+            .order_by("search_rank", "-created_at")
+        )
+
+    if backend == "postgres":
+        tsquery = " & ".join(f"{term}:*" for term in terms)
+        vector = PG_VECTOR.format(table=table)
+        return (
+            queryset
+            .extra(
+                where=[f"{vector} @@ to_tsquery('english', %s)"],
+                params=[tsquery],
+                select={
+                    "search_rank": f"ts_rank({vector}, to_tsquery('english', %s))",
+                },
+                select_params=[tsquery],
+            )
+            .order_by("-search_rank", "-created_at")
+        )
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(name__icontains=term) | Q(description__icontains=term)
+    return queryset.filter(condition)
+
+
+# =====================================================
+# INDEX MAINTENANCE
+# =====================================================
+def index_products(product_ids, using="default") -> None:
+    """
+    (Re)index the given products. No-op where the database
+    maintains the index itself.
+    """
+    product_ids = [int(pk) for pk in product_ids]
+    if not product_ids or get_backend(using) != "sqlite":
+        return
+
+    placeholders = ", ".join(["%s"] * len(product_ids))
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})",
+            product_ids,
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, name, description) "
+            f"SELECT id, name, description FROM pages_product "
+            f"WHERE id IN ({placeholders})",
+            product_ids,
+        )
+
+
+def remove_products(product_ids, using="default") -> None:
+    product_ids = [int(pk) for pk in product_ids]
+    if not product_ids or get_backend(using) != "sqlite":
+        return
+
+    placeholders = ", ".join(["%s"] * len(product_ids))
+
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})",
+            product_ids,
+        )
+
+
+def rebuild_index(using="default") -> int:
+    """
+    Rebuild the whole index in bulk.
+    Returns the number of indexed products.
+    """
+    backend = get_backend(using)
+    connection = connections[using]
+
+    with connection.cursor() as cursor:
+        if backend == "sqlite":
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, name, description) "
+                f"SELECT id, name, description FROM pages_product"
+            )
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"
+            )
+        elif backend == "postgres":
+            cursor.execute(f"REINDEX INDEX {PG_INDEX}")
+
+        cursor.execute("SELECT COUNT(*) FROM pages_product")
+        return cursor.fetchone()[0]
+
+
+# =====================================================
+# SCHEMA (USED BY MIGRATIONS)
+# =====================================================
+def create_search_schema(connection) -> None:
+    if connection.vendor == "postgresql":
+        vector = PG_VECTOR.format(table="pages_product")
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {PG_INDEX} "
+                f"ON pages_product USING GIN (({vector}))"
+            )
+
+    elif connection.vendor == "sqlite":
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+                    f"USING fts5(name, description, "
+                    f"tokenize = 'unicode61 remove_diacritics 2')"
+                )
+                cursor.execute(
+                    f"INSERT INTO {FTS_TABLE} (rowid, name, description) "
+                    f"SELECT id, name, description FROM pages_product"
+                )
+        except DatabaseError:
+            # SQLite built without FTS5 → icontains fallback
+            pass
+
+    _backends.pop(connection.alias, None)
+
+
+def drop_search_schema(connection) -> None:
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(f"DROP INDEX IF EXISTS {PG_INDEX}")
+        elif connection.vendor == "sqlite":
+            cursor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+
+    _backends.pop(connection.alias, None)
@@ -0,0 +1,211 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from . import availability, cards, page_cache, related, search
+from .models import Collection, Product
+
+
+# =====================================================
+# BULK UPDATE SIGNAL
+# =====================================================
+# Queryset `.update()` calls (admin actions, inventory engine) bypass
+# model signals. Those paths announce the affected ids here instead.
+#
+# kwargs: product_ids (list), stock_only (bool)
+products_updated = Signal()
+
+
+def notify_products_updated(product_ids, *, stock_only=False) -> None:
+    product_ids = list(product_ids)
+    if product_ids:
+        products_updated.send(
+            sender=Product,
+            product_ids=product_ids,
+            stock_only=stock_only,
+        )
+
+
+# =====================================================
+# SEARCH INDEX SYNC
+# =====================================================
+def _skips_search(update_fields) -> bool:
+    return bool(update_fields) and not set(update_fields) & search.INDEXED_FIELDS
+
+
+@receiver(post_save, sender=Product)
+def sync_product_search_index(sender, instance, raw=False, using="default", update_fields=None, **kwargs):
+    if raw or _skips_search(update_fields):
+        return
+    search.index_products([instance.pk], using=using)
+
+
+@receiver(post_delete, sender=Product)
+def drop_product_search_index(sender, instance, using="default", **kwargs):
+    search.remove_products([instance.pk], using=using)
+
+
+# =====================================================
+# PAGE CACHE INVALIDATION
+# =====================================================
+def _is_stock_only(update_fields) -> bool:
+    return bool(update_fields) and set(update_fields) <= page_cache.STOCK_FIELDS
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_cache_tags(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    Slugs may change on save → capture the tags of the old URLs.
+    """
+    instance._old_cache_tags = set()
+    if raw or not instance.pk or _is_stock_only(update_fields):
+        return
+
+    old = (
+        Product.objects
+        .filter(pk=instance.pk)
+        .values_list("slug", "collection__slug")
+        .first()
+    )
+    if old:
+        instance._old_cache_tags = page_cache.product_tags(old[1], old[0])
+
+
+@receiver(post_save, sender=Product)
+def invalidate_product_pages(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+
+    stock_only = _is_stock_only(update_fields)
+
+    collection_slug = (
+        Collection.objects
+        .filter(pk=instance.collection_id)
+        .values_list("slug", flat=True)
+        .first()
+    )
+    tags = page_cache.product_tags(
+        collection_slug, instance.slug, stock_only=stock_only
+    )
+    page_cache.invalidate_tags(*tags, *getattr(instance, "_old_cache_tags", ()))
+
+
+@receiver(post_delete, sender=Product)
+def invalidate_deleted_product_pages(sender, instance, **kwargs):
+    collection_slug = (
+        Collection.objects
+        .filter(pk=instance.collection_id)
+        .values_list("slug", flat=True)
+        .first()
+    )
+    page_cache.invalidate_tags(
+        *page_cache.product_tags(collection_slug, instance.slug)
+    )
+
+
+@receiver(pre_save, sender=Collection)
+def remember_collection_cache_tags(sender, instance, raw=False, **kwargs):
+    instance._old_cache_tags = set()
+    if raw or not instance.pk:
+        return
+
+    old_slug = (
+        Collection.objects
+        .filter(pk=instance.pk)
+        .values_list("slug", flat=True)
+        .first()
+    )
+    if old_slug:
+        instance._old_cache_tags = page_cache.collection_tags(old_slug)
+
+
+@receiver(post_save, sender=Collection)
+def invalidate_collection_pages(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    page_cache.invalidate_tags(
+        *page_cache.collection_tags(instance.slug),
+        *getattr(instance, "_old_cache_tags", ()),
+    )
+
+
+@receiver(post_delete, sender=Collection)
+def invalidate_deleted_collection_pages(sender, instance, **kwargs):
+    page_cache.invalidate_tags(*page_cache.collection_tags(instance.slug))
+
+
+@receiver(products_updated)
+def invalidate_updated_product_pages(sender, product_ids, stock_only=False, **kwargs):
+    page_cache.invalidate_products(product_ids, stock_only=stock_only)
+
+
+# =====================================================
+# PRODUCT CARD SYNC
+# =====================================================
+@receiver(post_save, sender=Product)
+def sync_product_card(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw:
+        return
+    if _is_stock_only(update_fields):
+        cards.refresh_stock_flags([instance.pk])
+    else:
+        cards.refresh_cards([instance.pk])
+
+
+@receiver(post_save, sender=Collection)
+def sync_collection_cards(sender, instance, raw=False, created=False, **kwargs):
+    if raw or created:
+        return
+    cards.refresh_collection_cards(instance.pk)
+
+
+@receiver(products_updated)
+def sync_updated_product_cards(sender, product_ids, stock_only=False, **kwargs):
+    if stock_only:
+        cards.refresh_stock_flags(product_ids)
+    else:
+        cards.refresh_cards(product_ids)
+
+
+# =====================================================
+# AVAILABILITY SNAPSHOT
+# =====================================================
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def rotate_availability(sender, raw=False, **kwargs):
+    if raw:
+        return
+    availability.invalidate()
+
+
+@receiver(products_updated)
+def rotate_updated_availability(sender, **kwargs):
+    availability.invalidate()
+
+
+# =====================================================
+# RELATED PRODUCTS SYNC
+# =====================================================
+# Registered after the card receivers: related rows point at cards.
+def _refresh_related(product_ids) -> None:
+    # Detail pages that list these products render their cards
+    page_cache.invalidate_products(
+        Product.objects
+        .filter(related_entries__related_id__in=product_ids)
+        .values_list("pk", flat=True),
+        stock_only=True,
+    )
+    related.refresh_related_around(product_ids)
+
+
+@receiver(post_save, sender=Product)
+def sync_related_products(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or _is_stock_only(update_fields):
+        return
+    _refresh_related([instance.pk])
+
+
+@receiver(products_updated)
+def sync_updated_related_products(sender, product_ids, stock_only=False, **kwargs):
+    if stock_only:
+        return
+    _refresh_related(product_ids)
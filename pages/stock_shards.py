@@ -0,0 +1,181 @@
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from orders.services import outbox
+
+from .models import Product, StockShard
+from .signals import notify_products_updated
+
+MATERIALIZE_JOB = "stock_shards.materialize"
+
+
+# =====================================================
+# HOT-PRODUCT STOCK SHARDS
+# =====================================================
+# A flash-sale product would serialize every checkout on its one
+# product row. In hot-product mode its stock lives in N StockShard
+# rows instead:
+#
+#   UPDATE stock_shard SET stock = stock - 1
+#    WHERE product_id = 7 AND shard = <random> AND stock >= 1
+#
+# Concurrent checkouts mostly hit different rows. Product.stock is
+# the materialized sum (display, listings), refreshed by one delayed
+# outbox job per product at a time: a burst of orders writes the
+# product row once per HOT_STOCK_MATERIALIZE_SECONDS, not per order.
+def _shard_count(product_id) -> int:
+    return (
+        Product.objects
+        .filter(pk=product_id)
+        .values_list("stock_shards", flat=True)
+        .first()
+    ) or 0
+
+
+def _schedule_materialize(product_id) -> None:
+    # Concurrent first orders may both enqueue: one extra refresh
+    if not outbox.has_pending(MATERIALIZE_JOB, str(product_id), include_running=False):
+        outbox.enqueue(
+            MATERIALIZE_JOB,
+            {"product_id": product_id},
+            key=str(product_id),
+            delay=timedelta(seconds=settings.HOT_STOCK_MATERIALIZE_SECONDS),
+        )
+
+
+def take(product_id, quantity, *, shards=None) -> None:
+    """
+    Take `quantity` units from a hot product.
+    Raises ValueError if its shards hold fewer in total.
+    """
+    shards = shards or _shard_count(product_id)
+
+    # Fast path: one conditional UPDATE on a random shard,
+    # falling back to the others in random order
+    for shard in random.sample(range(shards), shards):
+        if (
+            StockShard.objects
+            .filter(product_id=product_id, shard=shard, stock__gte=quantity)
+            .update(stock=F("stock") - quantity)
+        ):
+            _schedule_materialize(product_id)
+            return
+
+    # No single shard has enough: draw across all of them (rare,
+    # only when stock is nearly gone)
+    with transaction.atomic():
+        rows = list(
+            StockShard.objects
+            .select_for_update()
+            .filter(product_id=product_id)
+            .order_by("shard")
+        )
+        if sum(row.stock for row in rows) < quantity:
+            name = Product.objects.filter(pk=product_id).values_list("name", flat=True).first()
+            raise ValueError(f"Insufficient stock for {name or product_id}")
+
+        remaining = quantity
+        for row in rows:
+            part = min(row.stock, remaining)
+            if part:
+                StockShard.objects.filter(pk=row.pk).update(stock=F("stock") - part)
+                remaining -= part
+            if not remaining:
+                break
+
+    _schedule_materialize(product_id)
+
+
+def give(product_id, quantity, *, shards=None) -> None:
+    """
+    Give back `quantity` units to a random shard.
+    """
+    shards = shards or _shard_count(product_id)
+
+    StockShard.objects.filter(
+        product_id=product_id,
+        shard=random.randrange(shards),
+    ).update(stock=F("stock") + quantity)
+
+    _schedule_materialize(product_id)
+
+
+def materialize(product_ids) -> int:
+    """
+    Product.stock = sum of its shards (one UPDATE).
+    """
+    product_ids = list(product_ids)
+    updated = (
+        Product.objects
+        .filter(pk__in=product_ids, stock_shards__gt=0)
+        .update(stock=Coalesce(
+            Subquery(
+                StockShard.objects
+                .filter(product_id=OuterRef("pk"))
+                .values("product_id")
+                .annotate(total=Sum("stock"))
+                .values("total")
+            ),
+            0,
+        ))
+    )
+    notify_products_updated(product_ids, stock_only=True)
+    return updated
+
+
+# =====================================================
+# SWITCHING MODES
+# =====================================================
+@transaction.atomic
+def enable(product_id, shards) -> None:
+    """
+    Split a product's stock evenly across `shards` rows
+    (re-splits if it is already hot).
+    """
+    if shards < 1:
+        raise ValueError("shards must be at least 1")
+
+    product = Product.objects.select_for_update().get(pk=product_id)
+    total = _fold(product)
+
+    base, extra = divmod(total, shards)
+    StockShard.objects.bulk_create([
+        StockShard(product=product, shard=i, stock=base + (1 if i < extra else 0))
+        for i in range(shards)
+    ])
+
+    product.stock = total
+    product.stock_shards = shards
+    product.save(update_fields=["stock", "stock_shards", "updated_at"])
+
+
+@transaction.atomic
+def disable(product_id) -> None:
+    """
+    Fold the shards back into Product.stock.
+    """
+    product = Product.objects.select_for_update().get(pk=product_id)
+    if not product.stock_shards:
+        return
+
+    product.stock = _fold(product)
+    product.stock_shards = 0
+    product.save(update_fields=["stock", "stock_shards", "updated_at"])
+
+
+def _fold(product) -> int:
+    """
+    Current total stock; removes the shard rows.
+    """
+    if not product.stock_shards:
+        return product.stock
+
+    rows = StockShard.objects.select_for_update().filter(product=product)
+    total = sum(rows.values_list("stock", flat=True))
+    rows.delete()
+    return total
@@ -1,3 +1,158 @@
+import uuid
+from decimal import Decimal
+from unittest import mock
+
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from django.urls import reverse
+
+from orders.models import InventoryMovement, OutboxJob
+from orders.services import outbox
+from orders.services.inventory_service import decrement_stock
+
+from . import page_cache, stock_shards
+from .models import Collection, Product, StockShard
+from .tiered_cache import TieredCache
+
+
+# =====================================================
+# HOT-PRODUCT STOCK SHARDS
+# =====================================================
+class StockShardTests(TestCase):
+    def setUp(self):
+        collection = Collection.objects.create(name="Hot", slug="hot")
+        self.product = Product.objects.create(
+            collection=collection,
+            name="Hot product",
+            slug="hot",
+            price=Decimal("499.00"),
+            stock=10,
+        )
+        stock_shards.enable(self.product.pk, 4)
+
+    def _shard_total(self):
+        return sum(StockShard.objects.filter(product=self.product).values_list("stock", flat=True))
+
+    def test_take_and_give_conserve_stock(self):
+        stock_shards.take(self.product.pk, 3)
+        stock_shards.take(self.product.pk, 4)
+        stock_shards.give(self.product.pk, 2)
+        self.assertEqual(self._shard_total(), 5)
+
+        with self.assertRaises(ValueError):
+            stock_shards.take(self.product.pk, 6)
+        self.assertEqual(self._shard_total(), 5)
+
+        stock_shards.disable(self.product.pk)
+        self.product.refresh_from_db()
+        self.assertEqual((self.product.stock, self.product.stock_shards), (5, 0))
+
+    def test_product_row_is_refreshed_once_per_burst(self):
+        for _ in range(5):
+            stock_shards.take(self.product.pk, 1)
+
+        jobs = OutboxJob.objects.filter(name=stock_shards.MATERIALIZE_JOB)
+        self.assertEqual(jobs.count(), 1)
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 10)
+
+        outbox.load_handlers()
+        job = jobs.get()
+        OutboxJob.objects.filter(pk=job.pk).update(run_after=job.created_at)
+        self.assertTrue(outbox.run_job(outbox.claim()[0]))
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 5)
+
+
+# =====================================================
+# ADMIN STOCK EDITS
+# =====================================================
+class ProductAdminStockTests(TestCase):
+    def setUp(self):
+        collection = Collection.objects.create(name="Admin", slug="admin")
+        self.product = Product.objects.create(
+            collection=collection,
+            name="Admin product",
+            slug="admin-product",
+            price=Decimal("499.00"),
+            stock=10,
+        )
+        self.client.force_login(get_user_model().objects.create_superuser(username="admin"))
+        self.url = reverse("admin:pages_product_change", args=[self.product.pk])
+
+    def _save(self, **fields):
+        # The form as loaded now, submitted after `fields` are edited
+        form = self.client.get(self.url).context["adminform"].form
+        data = {
+            "collection": self.product.collection_id,
+            "name": self.product.name,
+            "slug": self.product.slug,
+            "price": "499.00",
+            "stock": form.initial["stock"],
+            "stock_seen": form["stock_seen"].value(),
+            "description": "",
+            "is_active": "on",
+        }
+        return lambda: self.client.post(self.url, {**data, **fields})
+
+    def _adjustments(self):
+        return list(
+            InventoryMovement.objects
+            .filter(product=self.product, reason=InventoryMovement.ADJUSTMENT)
+            .values_list("delta", flat=True)
+        )
+
+    def test_sales_while_form_is_open_are_kept(self):
+        submit = self._save(description="New copy")
+        decrement_stock({self.product.pk: 3})
+
+        self.assertEqual(submit().status_code, 302)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.description, "New copy")
+        self.assertEqual(self.product.stock, 7)
+        self.assertEqual(self._adjustments(), [])
+
+    def test_stock_edit_applies_as_delta(self):
+        submit = self._save(stock=15)
+        decrement_stock({self.product.pk: 3})
+
+        self.assertEqual(submit().status_code, 302)
+
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, 12)
+        self.assertEqual(self._adjustments(), [5])
+
+
+# =====================================================
+# TIERED CACHE
+# =====================================================
+class TieredCacheTests(TestCase):
+    def setUp(self):
+        # The shared cache outlives test runs: fresh keys and tags
+        self.cache = TieredCache(f"test-{uuid.uuid4().hex}", max_entries=10, local_ttl=60)
+        self.tag = f"test:{uuid.uuid4().hex}"
+
+    def test_local_hit_skips_tag_versions(self):
+        self.cache.get_or_set("key", lambda: 1, tags={self.tag})
+
+        with mock.patch.object(page_cache, "tag_versions") as versions:
+            self.assertEqual(self.cache.get_or_set("key", lambda: 2, tags={self.tag}), 1)
+        versions.assert_not_called()
+
+    def test_invalidation_drops_the_local_entry(self):
+        self.cache.get_or_set("key", lambda: 1, tags={self.tag})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            page_cache.invalidate_tags(self.tag)
+
+        self.assertEqual(self.cache.get_or_set("key", lambda: 2, tags={self.tag}), 2)
+
+    def test_value_read_before_a_drop_is_not_kept_locally(self):
+        def producer():
+            self.cache._on_change({self.tag})
+            return 1
 
-# Create your tests here.
+        self.assertEqual(self.cache.get_or_set("key", producer, tags={self.tag}), 1)
+        self.assertEqual(len(self.cache.local), 0)
@@ -0,0 +1,220 @@
+import hashlib
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from . import catalog_bus, page_cache
+
+
+# =====================================================
+# TIERED CACHE (IN-PROCESS LRU → SHARED CACHE → DB)
+# =====================================================
+# get_or_set() looks in this process's LRU, then in the shared cache
+# (CACHES, i.e. file, DB or Redis), and only then runs the producer.
+#
+# Shared keys are versioned by page_cache tags: the current versions
+# of the entry's tags are part of the key, so the signals that already
+# invalidate catalog pages invalidate these entries too, in every
+# process. Reading the versions is one small get_many, paid only on
+# the way to the shared cache.
+#
+# Local entries are keyed without versions: a warm hit is a dict
+# lookup. They remember their tags, and catalog_bus drops the ones
+# whose tags changed (here at commit, other nodes on their next poll).
+#
+# A cold key is regenerated once: one thread per process (lock) and
+# one process per key (cache.add lock); the others wait for its result.
+
+_MISSING = object()
+
+
+class LRU:
+    """
+    Thread-safe in-process LRU with a size bound and per-entry TTL.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by drop_tags: a value read before a drop may be stale
+        self.generation = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            expires, value, _tags = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, tags=(), *, generation=None) -> None:
+        """
+        With `generation`: skipped if drop_tags ran since it was read.
+        """
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, value, frozenset(tags))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def drop_tags(self, tags) -> int:
+        """
+        Remove entries carrying any of `tags`. Returns entries removed.
+        """
+        with self._lock:
+            self.generation += 1
+            stale = [key for key, entry in self._entries.items() if entry[2] & tags]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TieredCache:
+    """
+    Values handed out are shared between requests: treat them as
+    read-only.
+    """
+
+    # Cross-process regeneration lock: held at most this long
+    LOCK_SECONDS = 10
+    POLL_SECONDS = 0.05
+
+    def __init__(self, namespace, *, alias=None, max_entries=None, local_ttl=None, timeout=None):
+        self.namespace = namespace
+        self.alias = alias or page_cache.CACHE_ALIAS
+        self.timeout = timeout or page_cache.TIMEOUT
+        self.local = LRU(
+            settings.CATALOG_LOCAL_CACHE_ENTRIES if max_entries is None else max_entries,
+            settings.CATALOG_LOCAL_CACHE_TTL if local_ttl is None else local_ttl,
+        )
+        self.counters = Counter()
+        self._counter_lock = threading.Lock()
+        self._flights = {}
+        self._flights_lock = threading.Lock()
+        catalog_bus.subscribe(self._on_change)
+
+    # -------------------------
+    # KEYS / COUNTERS
+    # -------------------------
+    def _local_key(self, key) -> str:
+        return f"tiered:{self.namespace}:{key}"
+
+    def _shared_key(self, key, tags) -> str:
+        versions = page_cache.tag_versions(tags)
+        digest = hashlib.md5(
+            "|".join(f"{tag}={versions[tag]}" for tag in sorted(versions)).encode()
+        ).hexdigest()
+        return f"{self._local_key(key)}:{digest}"
+
+    def _count(self, name, amount=1) -> None:
+        with self._counter_lock:
+            self.counters[name] += amount
+
+    def _on_change(self, tags) -> None:
+        dropped = self.local.drop_tags(tags)
+        if dropped:
+            self._count("dropped", dropped)
+
+    def stats(self) -> dict:
+        with self._counter_lock:
+            stats = dict(self.counters)
+        stats["local_entries"] = len(self.local)
+        return stats
+
+    # -------------------------
+    # LOOKUP
+    # -------------------------
+    def _local_lookup(self, local_key):
+        value = self.local.get(local_key)
+        if value is not _MISSING:
+            self._count("local_hits")
+        return value
+
+    def get_or_set(self, key, producer, *, tags):
+        """
+        Cached value of `producer()` for `key`, valid until one of
+        `tags` is invalidated. None is cached like any other value.
+        """
+        # Drops from other nodes first (throttled, usually no query)
+        catalog_bus.poll()
+
+        local_key = self._local_key(key)
+        value = self._local_lookup(local_key)
+        if value is not _MISSING:
+            return value
+
+        # Read before the versions: an invalidation after this point
+        # keeps the value out of the LRU
+        generation = self.local.generation
+        shared_key = self._shared_key(key, tags)
+
+        # Single flight within this process
+        with self._flights_lock:
+            flight = self._flights.setdefault(shared_key, threading.Lock())
+
+        with flight:
+            try:
+                # Filled by the thread this one waited for
+                value = self.local.get(local_key)
+                if value is not _MISSING:
+                    self._count("waits")
+                    return value
+
+                value = caches[self.alias].get(shared_key, _MISSING)
+                if value is not _MISSING:
+                    self._count("shared_hits")
+                else:
+                    value = self._regenerate(shared_key, producer)
+                self.local.set(local_key, value, tags, generation=generation)
+                return value
+            finally:
+                with self._flights_lock:
+                    self._flights.pop(shared_key, None)
+
+    def _regenerate(self, shared_key, producer):
+        shared = caches[self.alias]
+        lock_key = f"{shared_key}:lock"
+
+        # Single flight across processes; give up waiting after
+        # LOCK_SECONDS and compute it here
+        locked = shared.add(lock_key, 1, self.LOCK_SECONDS)
+        if not locked:
+            deadline = time.monotonic() + self.LOCK_SECONDS
+            while time.monotonic() < deadline:
+                time.sleep(self.POLL_SECONDS)
+                value = shared.get(shared_key, _MISSING)
+                if value is not _MISSING:
+                    self._count("waits")
+                    return value
+
+        try:
+            value = producer()
+            self._count("misses")
+            shared.set(shared_key, value, self.timeout)
+            return value
+        finally:
+            if locked:
+                shared.delete(lock_key)
+
+    def clear_local(self) -> None:
+        self.local.clear()
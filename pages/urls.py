@@ -46,6 +46,24 @@ urlpatterns = [
         name="product_detail"
     ),
 
+    # =========================
+    # VISITOR STATE (JSON)
+    # =========================
+    path(
+        "visitor/",
+        views.visitor_state,
+        name="visitor_state"
+    ),
+
+    # =========================
+    # STOCK BADGES (JSON)
+    # =========================
+    path(
+        "availability/",
+        views.product_availability,
+        name="availability"
+    ),
+
     # =========================
     # STATIC / MARKETING PAGES
     # =========================
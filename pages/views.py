@@ -1,15 +1,30 @@
-from django.shortcuts import render, get_object_or_404
-from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
-from django.db.models import Q
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.middleware.csrf import get_token
+from django.shortcuts import render
+from django.utils.cache import patch_cache_control
+from django.views.decorators.cache import never_cache
 from django.views.decorators.http import require_GET
 
-from .models import Collection, Product
+from . import availability
+from .cards import cards_in_order
+from .catalog_cache import (
+    active_collections,
+    collection_by_slug,
+    featured_cards,
+    product_by_slug,
+)
+from .models import Product, ProductCard
+from .page_cache import cache_catalog_page
+from .pagination import paginate_listing
+from .search import search_products
 
 
 # =====================================================
 # HOME PAGE
 # =====================================================
 @require_GET
+@cache_catalog_page(["catalog:products", "catalog:collections"])
 def home(request):
     """
     Homepage:
@@ -20,40 +35,18 @@ def home(request):
 
     query = request.GET.get("q", "").strip()
 
-    products_qs = (
-        Product.objects
-        .select_related("collection")
-        .filter(is_active=True)
-        .only(
-            "id",
-            "name",
-            "slug",
-            "price",
-            "image",
-            "collection__slug",
-            "collection__name",
-            "created_at",
-            "is_featured",
-        )
-        .order_by("-is_featured", "-created_at")
-    )
-
     if query:
-        products_qs = products_qs.filter(
-            Q(name__icontains=query) |
-            Q(description__icontains=query)
+        matches = search_products(
+            Product.objects.filter(is_active=True).only("id", "created_at"),
+            query,
         )
-
-    collections = (
-        Collection.objects
-        .filter(is_active=True)
-        .only("id", "name", "slug", "image")
-        .order_by("name")
-    )
+        products = cards_in_order(product.pk for product in matches[:8])
+    else:
+        products = featured_cards()
 
     context = {
-        "products": products_qs[:8],
-        "collections": collections,
+        "products": products,
+        "collections": active_collections(),
         "query": query,
         "page_title": "ClawStory – Premium Fashion Store",
         "meta_description": (
@@ -71,43 +64,33 @@ def home(request):
 # SHOP PAGE
 # =====================================================
 @require_GET
+@cache_catalog_page(["catalog:products"])
 def shop(request):
     """
     Product listing page with pagination and search.
+    - Cards come from the ProductCard read model
+    - Deep pages use keyset cursors (see pages/pagination.py)
     """
 
     query = request.GET.get("q", "").strip()
 
-    products_qs = (
-        Product.objects
-        .select_related("collection")
-        .filter(is_active=True)
-        .only(
-            "id",
-            "name",
-            "slug",
-            "price",
-            "image",
-            "collection__slug",
-            "collection__name",
-            "created_at",
-        )
-        .order_by("-created_at")
-    )
-
     if query:
-        products_qs = products_qs.filter(
-            Q(name__icontains=query) |
-            Q(description__icontains=query)
+        # Ranked search results can't be keyset-paginated on created_at
+        matches = search_products(
+            Product.objects.filter(is_active=True).only("id", "created_at"),
+            query,
+        )
+        page_obj = paginate_listing(request, matches, keyset=False)
+        page_obj.object_list = cards_in_order(
+            product.pk for product in page_obj.object_list
+        )
+    else:
+        page_obj = paginate_listing(
+            request,
+            ProductCard.objects
+            .filter(is_active=True)
+            .order_by("-created_at", "-pk"),
         )
-
-    paginator = Paginator(products_qs, 12)
-    page_number = request.GET.get("page", 1)
-
-    try:
-        page_obj = paginator.page(page_number)
-    except (PageNotAnInteger, EmptyPage):
-        page_obj = paginator.page(1)
 
     context = {
         "products": page_obj,
@@ -127,20 +110,14 @@ def shop(request):
 # COLLECTION LIST
 # =====================================================
 @require_GET
+@cache_catalog_page(["catalog:collections"])
 def collection_list(request):
     """
     List of all active collections.
     """
 
-    collections = (
-        Collection.objects
-        .filter(is_active=True)
-        .only("id", "name", "slug", "image")
-        .order_by("name")
-    )
-
     context = {
-        "collections": collections,
+        "collections": active_collections(),
         "page_title": "Collections – ClawStory",
         "meta_description": (
             "Explore curated fashion collections at ClawStory. "
@@ -156,42 +133,23 @@ def collection_list(request):
 # COLLECTION DETAIL
 # =====================================================
 @require_GET
+@cache_catalog_page(lambda slug: [f"collection:{slug}"])
 def collection_detail(request, slug):
     """
     Product list within a collection.
     """
 
-    collection = get_object_or_404(
-        Collection,
-        slug=slug,
-        is_active=True
-    )
+    collection = collection_by_slug(slug)
+    if collection is None:
+        raise Http404("No Collection matches the given query.")
 
-    products_qs = (
-        collection.products
-        .filter(is_active=True)
-        .select_related("collection")
-        .only(
-            "id",
-            "name",
-            "slug",
-            "price",
-            "image",
-            "collection__slug",
-            "collection__name",
-            "created_at",
-        )
-        .order_by("-created_at")
+    page_obj = paginate_listing(
+        request,
+        ProductCard.objects
+        .filter(collection=collection, is_active=True)
+        .order_by("-created_at", "-pk"),
     )
 
-    paginator = Paginator(products_qs, 12)
-    page_number = request.GET.get("page", 1)
-
-    try:
-        page_obj = paginator.page(page_number)
-    except (PageNotAnInteger, EmptyPage):
-        page_obj = paginator.page(1)
-
     context = {
         "collection": collection,
         "products": page_obj,
@@ -210,34 +168,31 @@ def collection_detail(request, slug):
 # PRODUCT DETAIL
 # =====================================================
 @require_GET
+@cache_catalog_page(lambda collection_slug, product_slug: [
+    f"product:{collection_slug}/{product_slug}",
+    f"related:{collection_slug}",
+])
 def product_detail(request, collection_slug, product_slug):
     """
     Individual product detail page.
     """
 
-    product = get_object_or_404(
-        Product.objects.select_related("collection"),
-        collection__slug=collection_slug,
-        slug=product_slug,
-        is_active=True
-    )
+    product = product_by_slug(collection_slug, product_slug)
+    if product is None:
+        raise Http404("No Product matches the given query.")
 
+    # Precomputed by pages.related → one indexed join, no per-card work
     related_products = (
-        Product.objects
-        .filter(
-            collection=product.collection,
-            is_active=True
-        )
-        .exclude(id=product.id)
-        .only(
-            "id",
-            "name",
-            "slug",
-            "price",
-            "image",
-            "created_at",
-        )
-        .order_by("-created_at")[:4]
+        ProductCard.objects
+        .filter(related_to__product=product, is_active=True)
+        .order_by("related_to__rank")[:4]
+    )
+
+    # Precomputed by orders.services.recommendation_service
+    bought_together = (
+        ProductCard.objects
+        .filter(bought_with__product=product, is_active=True)
+        .order_by("bought_with__rank")[:4]
     )
 
     meta_description = (
@@ -249,6 +204,7 @@ def product_detail(request, collection_slug, product_slug):
     context = {
         "product": product,
         "related_products": related_products,
+        "bought_together": bought_together,
         "page_title": f"{product.name} – ClawStory",
         "meta_description": meta_description,
         "meta_robots": "index,follow",
@@ -257,6 +213,61 @@ def product_detail(request, collection_slug, product_slug):
     return render(request, "pages/product_detail.html", context)
 
 
+# =====================================================
+# VISITOR STATE (PER-USER HEADER BITS)
+# =====================================================
+@never_cache
+@require_GET
+def visitor_state(request):
+    """
+    Cart badge, login state and CSRF token for the current visitor.
+    Fetched client-side by base.html so catalog HTML never reads the
+    session and stays identical (and cacheable) for everyone.
+    """
+
+    user = request.user
+
+    return JsonResponse({
+        "cart_count": len(request.cart),
+        "authenticated": user.is_authenticated,
+        "username": user.get_username() if user.is_authenticated else "",
+        "csrf_token": get_token(request),
+    })
+
+
+# =====================================================
+# AVAILABILITY (CLIENT-SIDE STOCK BADGES)
+# =====================================================
+@require_GET
+def product_availability(request):
+    """
+    Stock badges for many products in one round-trip:
+    ?ids=1,2,3 → {"products": {"1": "in", "2": "low", "3": "out"}}
+
+    Answered from the in-process snapshot (pages.availability), so
+    listing HTML can stay cached across stock changes.
+    """
+    try:
+        product_ids = [
+            int(value)
+            for value in request.GET.get("ids", "").split(",")
+            if value.strip()
+        ][:availability.MAX_IDS]
+    except ValueError:
+        return JsonResponse({"error": "Invalid ids"}, status=400)
+
+    states = availability.lookup(product_ids)
+    response = JsonResponse({
+        "products": {str(product_id): state for product_id, state in states.items()},
+    })
+    patch_cache_control(
+        response,
+        public=True,
+        max_age=settings.AVAILABILITY_REFRESH_SECONDS,
+    )
+    return response
+
+
 # =====================================================
 # STATIC PAGES (GET ONLY)
 # =====================================================